@@ -0,0 +1,271 @@
+"""
+Command-line entry point (headless: nothing here imports customtkinter/Tk).
+
+    python -m app.cli scan FOLDER [--recursive] [--sort name|taken|mtime|size|dimensions] [--reverse] [--hide-duplicates] [--json]
+    python -m app.cli thumbnail FOLDER OUT_DIR [--size 256x256] [--recursive] [--workers N] [--no-store]
+    python -m app.cli ocr FOLDER [-o results.jsonl] [--workers N] [--recursive] [--no-resume] [--no-store] [--first-page]
+    python -m app.cli search QUERY... [--limit N]
+    python -m app.cli export-ocr OUT [--format jsonl|csv]
+    python -m app.cli config [--changed]
+
+Global options (before the command): --config FILE (TOML/YAML) and --set KNOB=VALUE
+(repeatable), layered over the defaults, the default config file and IMAGE_SLIDER_* variables.
+With --set METRICS_ENABLED=true a timing summary is printed to stderr when the command
+finishes (and METRICS_FILE / METRICS_PORT export it as usual).
+Each command imports only the core modules it uses, so the cheap ones (search, export-ocr)
+never load NumPy or Pillow.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Tuple
+from app.utils.config import Config, config, parse_overrides
+from app.utils.exceptions import AppError
+from app.utils.log_manager import LogManager
+from app.utils.metrics import metrics
+
+
+def _size(value: str) -> Tuple[int, int]:
+    """ "256" or "256x192" -> (width, height) """
+    try:
+        parts = [int(v) for v in value.lower().split("x")]
+    except ValueError:
+        parts = []
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or min(parts) < 1:
+        raise argparse.ArgumentTypeError(f"expected N or WxH, got {value!r}")
+    return parts[0], parts[1]
+
+
+def _cmd_scan(args) -> int:
+    from app.core.catalog import CatalogStore, ImageCatalog
+    from app.core.image_loader import ImageLoader
+
+    loader = ImageLoader()
+    paths = loader.scan_all(Path(args.folder), recursive=args.recursive)
+    store = CatalogStore() if config.CATALOG_ENABLED and not args.no_store else None
+    catalog = ImageCatalog(store)
+    try:
+        catalog.sync(paths)
+        if args.hide_duplicates:
+            catalog.compute_hashes(loader)
+        view = catalog.arrange(args.sort, reverse=args.reverse, hide_duplicates=args.hide_duplicates)
+        for path in view.paths:
+            meta = catalog.meta(path)
+            taken = datetime.fromtimestamp(meta.taken).isoformat(sep=" ") if meta.taken else ""
+            if args.json:
+                print(json.dumps({"path": str(path), "width": meta.width, "height": meta.height,
+                                  "bytes": meta.file_size, "taken": taken or None}, ensure_ascii=False))
+            else:
+                print(f"{path}\t{meta.width}x{meta.height}\t{meta.file_size}\t{taken}")
+    finally:
+        catalog.close()
+    print(f"{len(view)} of {len(paths)} images", file=sys.stderr)
+    return 0 if len(paths) else 1
+
+
+def thumbnail_path(out_dir: Path, folder: Path, path) -> Path:
+    """out_dir/<path relative to folder>.jpg; the source extension stays (a.png.jpg, a.jpg.jpg never collide)."""
+    relative = Path(path).relative_to(folder)
+    return out_dir / relative.with_name(relative.name + ".jpg")
+
+
+def _cmd_thumbnail(args) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+    from app.core.image_loader import ImageLoader
+    from app.core.preview_store import PreviewStore
+
+    folder = Path(args.folder).resolve()
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    store = PreviewStore() if config.PREVIEW_STORE_ENABLED and not args.no_store else None
+    loader = ImageLoader(preview_store=store)
+    size = args.size or tuple(config.THUMBNAIL_SIZE)
+    paths = loader.scan_all(folder, recursive=args.recursive)
+    if not paths:
+        print(f"No images found in {args.folder}", file=sys.stderr)
+        return 1
+
+    def write(batch) -> int:
+        thumbs = loader.get_thumbnails(batch, size)
+        written = 0
+        for path in batch:
+            thumb = thumbs.get(str(path))
+            if thumb is None:
+                continue
+            target = thumbnail_path(out_dir, folder, path)
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                thumb.save(target, "JPEG", quality=85)
+            except OSError as e:
+                print(f"cannot write {target}: {e}", file=sys.stderr)
+                continue
+            written += 1
+        return written
+
+    batches = [paths[i:i + 32] for i in range(0, len(paths), 32)]
+    try:
+        with ThreadPoolExecutor(args.workers or config.PREFETCH_WORKERS * 2) as pool:
+            written = sum(pool.map(write, batches))
+    finally:
+        if store:
+            store.close()
+    print(f"{written} of {len(paths)} thumbnails ({size[0]}x{size[1]}) -> {out_dir}")
+    return 0 if written == len(paths) else 2
+
+
+def _cmd_ocr(args) -> int:
+    from app.core.batch_ocr import BatchOCRRunner
+    from app.core.image_loader import ImageLoader
+    from app.core.ocr_store import OCRResultStore
+
+    iterator = ImageLoader().load_from_folder(Path(args.folder), recursive=args.recursive)
+    if len(iterator) == 0:
+        print(f"No images found in {args.folder}", file=sys.stderr)
+        return 1
+
+    output = Path(args.output) if args.output else Path(args.folder) / "ocr_results.jsonl"
+    store = OCRResultStore() if config.OCR_STORE_ENABLED and not args.no_store else None
+    runner = BatchOCRRunner(args.engine, workers=args.workers, output_path=output,
+                            resume=not args.no_resume, store=store, pages=not args.first_page)
+
+    def progress(done: int, total: int, rate: float) -> None:
+        print(f"\r{done}/{total}  {rate:.2f} img/s", end="", file=sys.stderr, flush=True)
+
+    runner.on_progress = progress
+    try:
+        summary = runner.run(iterator.all())
+    except KeyboardInterrupt:
+        runner.cancel()
+        print("\nCancelled; run again to resume.", file=sys.stderr)
+        return 130
+    print(file=sys.stderr)
+    print(f"{summary['done']} done ({summary['cached']} from store), {summary['failed']} failed, "
+          f"{summary['skipped']} skipped "
+          f"in {summary['seconds']:.1f}s ({summary['rate']:.2f} img/s) -> {output}")
+    return 0 if summary["failed"] == 0 else 2
+
+
+def _cmd_search(args) -> int:
+    from app.core.ocr_store import OCRResultStore
+
+    store = OCRResultStore()
+    try:
+        hits = store.search(" ".join(args.query), limit=args.limit or config.SEARCH_RESULT_LIMIT)
+    finally:
+        store.close()
+    for hit in hits:
+        print(f"{hit.path}\t{hit.snippet}")
+    return 0 if hits else 1
+
+
+def _cmd_export_ocr(args) -> int:
+    from app.core.ocr_store import OCRResultStore
+
+    store = OCRResultStore()
+    try:
+        count = store.export(args.out, fmt=args.format)
+    finally:
+        store.close()
+    print(f"{count} OCR results -> {args.out}")
+    return 0
+
+
+def _cmd_config(args) -> int:
+    print(f"# config file: {config.config_file or 'none'}")
+    for key in Config.keys():
+        if args.changed and config.source(key) == "default":
+            continue
+        print(f"{key} = {getattr(config, key)!r}  # {config.source(key)}")
+    return 0
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--config", metavar="FILE", help="TOML/YAML settings (default: $IMAGE_SLIDER_CONFIG "
+                                                        "or ~/.config/image_slider/config.toml)")
+    parser.add_argument("--set", metavar="KNOB=VALUE", action="append", default=[],
+                        help="override one setting, e.g. --set OCR_WORKERS=8 (repeatable)")
+
+
+def apply_config_arguments(args) -> None:
+    """
+    Layer the settings (config file, environment, then --set: the command line wins) and
+    apply logging/metrics. Raises ConfigError for a bad file, variable or override.
+    """
+    config.load(path=args.config, overrides=parse_overrides(args.set))
+    LogManager().configure()
+    metrics.configure()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=config.APP_TITLE)
+    add_config_arguments(parser)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="list the images in a folder with header metadata")
+    scan.add_argument("folder")
+    scan.add_argument("-r", "--recursive", action="store_true")
+    scan.add_argument("--sort", choices=("name", "taken", "mtime", "size", "dimensions"), default="name")
+    scan.add_argument("--reverse", action="store_true")
+    scan.add_argument("--hide-duplicates", action="store_true", help="one image per group of near-duplicates")
+    scan.add_argument("--json", action="store_true", help="one JSON object per line")
+    scan.add_argument("--no-store", action="store_true", help="ignore the persistent catalog")
+    scan.set_defaults(func=_cmd_scan)
+
+    thumb = sub.add_parser("thumbnail", help="write a JPEG thumbnail of every image in a folder "
+                                             "(OUT_DIR/<relative path>.jpg, e.g. a.png.jpg)")
+    thumb.add_argument("folder")
+    thumb.add_argument("out_dir")
+    thumb.add_argument("-s", "--size", type=_size, default=None, help="N or WxH (default: THUMBNAIL_SIZE)")
+    thumb.add_argument("-r", "--recursive", action="store_true")
+    thumb.add_argument("-w", "--workers", type=int, default=None, help="decode threads")
+    thumb.add_argument("--no-store", action="store_true", help="ignore the persistent preview store")
+    thumb.set_defaults(func=_cmd_thumbnail)
+
+    ocr = sub.add_parser("ocr", help="OCR every image in a folder on a process pool")
+    ocr.add_argument("folder")
+    ocr.add_argument("-o", "--output", help="JSON-lines output (default: FOLDER/ocr_results.jsonl)")
+    ocr.add_argument("-w", "--workers", type=int, default=None, help=f"processes (default: {config.OCR_WORKERS})")
+    ocr.add_argument("-r", "--recursive", action="store_true")
+    ocr.add_argument("--engine", default="tesseract")
+    ocr.add_argument("--no-resume", action="store_true", help="re-OCR images already in the output file")
+    ocr.add_argument("--no-store", action="store_true", help="ignore the persistent OCR result store")
+    ocr.add_argument("--first-page", action="store_true", help="only the first page of multi-page TIFFs")
+    ocr.set_defaults(func=_cmd_ocr)
+
+    search = sub.add_parser("search", help="full-text search over stored OCR results")
+    search.add_argument("query", nargs="+")
+    search.add_argument("-n", "--limit", type=int, default=None, help="default: SEARCH_RESULT_LIMIT")
+    search.set_defaults(func=_cmd_search)
+
+    export = sub.add_parser("export-ocr", help="dump the persistent OCR result store")
+    export.add_argument("out")
+    export.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    export.set_defaults(func=_cmd_export_ocr)
+
+    settings = sub.add_parser("config", help="show the effective settings and where each came from")
+    settings.add_argument("--changed", action="store_true", help="only settings that differ from the defaults")
+    settings.set_defaults(func=_cmd_config)
+    return parser
+
+
+def main(argv=None) -> int:
+    try:
+        args = build_parser().parse_args(argv)
+        apply_config_arguments(args)
+        return args.func(args)
+    except AppError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        lines = metrics.summary_lines() if metrics.enabled else []
+        if lines:
+            print("\n".join(lines), file=sys.stderr)
+        metrics.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
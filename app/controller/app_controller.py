@@ -1,10 +1,30 @@
 from pathlib import Path
 import threading
-from typing import Optional, Callable
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from PIL import Image
-from app.core.image_loader import ImageLoader
+from app.core.animation import AnimationPlayer, is_animated
+from app.core.catalog import CatalogStore, CatalogView, ImageCatalog
+from app.core.folder_watch import FolderChange, FolderWatcher, create_watcher
+from app.core.image_cache import ImageCache
+from app.core.image_loader import ImageLoader, derived_from
+from app.controller.event_bus import EventBus
+from app.core.prefetch import PrefetchScheduler
+from app.core.raster import split_frame
+from app.core.text_index import SearchHit
+from app.core.tile_pyramid import TilePyramid
+from app.core.preprocess import OCRPreprocessor
+from app.core.region_ocr import RegionOCR
+from app.core.preview_store import PreviewStore
+from app.utils.config import config
+from app.core.batch_ocr import BatchOCRRunner
 from app.core.ocr_engine import OCREngineFactory, OCRExtractionError
+from app.core.ocr_jobs import OCRJobScheduler, Priority
+from app.core.ocr_store import OCRResultStore
 from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
 
 logger = get_logger("AppController")
 
@@ -14,19 +34,72 @@ class AppController:
     Simple, practical controller (Mediator).
     Responsibilities:
       - load images from folder (via ImageLoader)
-      - navigate next/prev
-      - run OCR in background and notify callbacks
-    Callbacks that UI can set:
+      - navigate next/prev/goto, prefetching neighbouring frames in the background
+      - sort/filter the folder by header metadata (ImageCatalog) and jump by file name
+      - group near-duplicate scans by perceptual hash: hide them, reuse OCR across identical ones
+      - full-text search over stored OCR results, jumping to the hits
+      - run OCR on a prioritized job queue (screen image first) and notify callbacks
+      - expose cache hit rates and queue depths as metrics gauges (app.utils.metrics)
+    Callbacks that UI can set (delivered through self.events; after attach_dispatcher()
+    they run on the thread that calls dispatch(), otherwise on the posting thread):
       - on_images_loaded(count: int)
-      - on_image_changed(path: Path)
+      - on_scan_progress(count: int)      (coalesced)
+      - on_images_arranged(count: int)    (after arrange_images: the iterator holds a new order/filter)
+      - on_image_changed(path: Path)      (coalesced: a burst of navigation shows the last image)
+      - on_frame_ready(path: Path)        (prefetched frame decoded; coalesced per path)
+      - on_thumbnail_ready(path: Path, thumb: Image)   (after request_thumbnails; coalesced per path)
+      - on_display_ready(path: Path, box, frame: Image)  (after render_display_async; coalesced)
+      - on_view_ready(path: Path, view, frame: Image)    (after render_view_async; coalesced)
+      - on_folder_changed(summary: dict)  (watched folder changed; counts of added/removed/modified/renamed)
       - on_ocr_complete(text: str)
+      - on_search_results(query: str, hits: List[SearchHit])   (after search_text_async; coalesced)
+      - on_batch_progress(done: int, total: int, images_per_second: float)   (coalesced)
+      - on_batch_complete(summary: dict)
       - on_error(exc: Exception)
     """
 
-    def __init__(self, ocr_engine_name: str = "tesseract"):
-        self.image_loader = ImageLoader()
+    TOPICS = ("images_loaded", "scan_progress", "images_arranged", "image_changed", "frame_ready", "thumbnail_ready",
+              "display_ready", "view_ready", "folder_changed", "ocr_complete", "search_results", "batch_progress", "batch_complete",
+              "error")
+    COALESCED = {"scan_progress", "image_changed", "frame_ready", "thumbnail_ready", "display_ready",
+                 "view_ready", "batch_progress", "images_arranged", "search_results"}
+
+    def __init__(self, ocr_engine_name: str = "tesseract", image_cache: Optional[ImageCache] = None):
+        self.ocr_engine_name = ocr_engine_name
+        # worker threads publish here; the UI drains it on its own thread
+        self.events = EventBus(coalesce=self.COALESCED)
+        for topic in self.TOPICS:
+            self.events.subscribe(topic, partial(self._call_handler, f"on_{topic}"))
+        self.preview_store = self._open_preview_store()
+        self.image_loader = ImageLoader(cache=image_cache, preview_store=self.preview_store)
+        # single decoded-image cache shared by the UI thread and OCR workers
+        self.image_cache = self.image_loader.cache
+        self.prefetcher = PrefetchScheduler(self.image_loader)
+        self.prefetcher.on_frame_ready = lambda path: self._emit("frame_ready", path, key=str(path))
         self.iterator = None
-        self._ocr_thread: Optional[threading.Thread] = None
+        # thumbnails for the filmstrip: one thread, and only the latest request matters
+        self._thumb_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self._thumb_generation = 0
+        # re-renders after a window resize; only the newest one matters
+        self._display_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="display")
+        # zoom/pan tiles, shared by every image's pyramid
+        self.tile_cache = ImageCache(config.TILE_CACHE_BYTES, name="tile_cache")
+        self.level_cache = ImageCache(config.PYRAMID_LEVEL_BYTES, name="level_cache")
+        self._pyramid: Optional[TilePyramid] = None
+        self._animation: Optional[AnimationPlayer] = None
+        self._view_generation = 0
+        self._scan_thread: Optional[threading.Thread] = None
+        # header metadata for sorting/filtering; arrangements run one at a time, off the UI thread
+        self.catalog = ImageCatalog(self._open_catalog_store())
+        self._catalog_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog")
+        self._search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self._arrangement: Optional[dict] = None
+        self._catalog_view: Optional[CatalogView] = None
+        self._watcher: Optional[FolderWatcher] = None
+        self.auto_ocr_new = config.WATCH_AUTO_OCR
+        self._scan_cancel = threading.Event()
+        self._batch_runner: Optional[BatchOCRRunner] = None
+        self._batch_thread: Optional[threading.Thread] = None
 
         # Create OCR engine (factory) — if it fails we keep None but report via on_error
         try:
@@ -36,109 +109,702 @@ class AppController:
             self.ocr_engine = None
             logger.exception("Failed to initialize OCR engine: %s", e)
 
+        # images are cleaned up (deskew, rescale, binarize) before they reach the engine;
+        # large pages are split into text blocks that are OCR'd in parallel
+        self.preprocessor = OCRPreprocessor()
+        self.region_ocr = RegionOCR(self.ocr_engine, self.preprocessor) if self.ocr_engine else None
+        # interactive OCR first, then speculative OCR of the next images; bounded worker threads
+        self.ocr_jobs = OCRJobScheduler()
+
+        # OCR results survive restarts; rows from another engine/preprocess configuration are dropped
+        self.ocr_store = self._open_ocr_store()
+        if self.ocr_store and self.ocr_engine:
+            self.ocr_store.purge_stale(self._ocr_key())
+
         # Callbacks (set by UI)
         self.on_images_loaded: Optional[Callable[[int], None]] = None
+        self.on_scan_progress: Optional[Callable[[int], None]] = None
+        self.on_images_arranged: Optional[Callable[[int], None]] = None
         self.on_image_changed: Optional[Callable[[Path], None]] = None
+        self.on_frame_ready: Optional[Callable[[Path], None]] = None
+        self.on_thumbnail_ready: Optional[Callable[[Path, Image.Image], None]] = None
+        self.on_display_ready: Optional[Callable[[Path, Tuple[int, int], Image.Image], None]] = None
+        self.on_view_ready: Optional[Callable[[Path, tuple, Image.Image], None]] = None
+        self.on_folder_changed: Optional[Callable[[dict], None]] = None
         self.on_ocr_complete: Optional[Callable[[str], None]] = None
+        self.on_search_results: Optional[Callable[[str, List[SearchHit]], None]] = None
+        self.on_batch_progress: Optional[Callable[[int, int, float], None]] = None
+        self.on_batch_complete: Optional[Callable[[dict], None]] = None
         self.on_error: Optional[Callable[[Exception], None]] = None
 
+        # cache hit rates and queue depths, sampled whenever metrics are exported
+        metrics.configure()
+        self._register_gauges()
+
     # -------- Loading & Navigation --------
-    def load_folder(self, folder_path: Path) -> int:
+    def load_folder(self, folder_path: Path, recursive: Optional[bool] = None) -> int:
         """Load images synchronously from folder_path. Returns number loaded."""
+        recursive = config.SCAN_RECURSIVE if recursive is None else recursive
         try:
-            self.iterator = self.image_loader.load_from_folder(folder_path)
+            self.stop_watching()
+            self._arrangement, self._catalog_view = None, None
+            self.iterator = self.image_loader.load_from_folder(folder_path, recursive=recursive)
+            if config.WATCH_FOLDER:
+                # same scope as the listing, so watcher adds and rescans match it
+                self.watch_folder(folder_path, recursive=recursive)
             count = len(self.iterator) if self.iterator else 0
             logger.info("Loaded %d images from %s", count, folder_path)
-            if self.on_images_loaded:
-                try:
-                    self.on_images_loaded(count)
-                except Exception as cb_e:
-                    logger.exception("on_images_loaded callback failed: %s", cb_e)
+            self.prefetcher.cancel_all()
+            self.prefetcher.schedule(self.iterator)
+            self._ocr_follow_cursor()
+            self._emit("images_loaded", count)
 
             # notify about current image
-            if self.iterator and self.iterator.current() and self.on_image_changed:
-                try:
-                    self.on_image_changed(self.iterator.current())
-                except Exception as cb_e:
-                    logger.exception("on_image_changed callback failed: %s", cb_e)
+            if self.iterator and self.iterator.current():
+                self._emit("image_changed", self.iterator.current())
             return count
         except Exception as e:
             logger.exception("Error loading folder: %s", e)
-            if self.on_error:
-                self.on_error(e)
+            self._emit("error", e)
             raise
 
+    def load_folder_async(self, folder_path: Path, recursive: Optional[bool] = None) -> bool:
+        """
+        Scan folder_path on a background thread, streaming batches into a growable
+        iterator. The first image is announced (on_image_changed) as soon as it is
+        found; on_scan_progress reports the running count and on_images_loaded the
+        final one. A new call cancels a scan that is still running.
+        """
+        recursive = config.SCAN_RECURSIVE if recursive is None else recursive
+        self.cancel_scan()
+        cancel = threading.Event()
+        self._scan_cancel = cancel
+        self.prefetcher.cancel_all()
+        iterator = self.image_loader.new_iterator()
+        self.iterator = iterator
+        self._arrangement, self._catalog_view = None, None
+        self.stop_watching()
+        if config.WATCH_FOLDER:
+            # watching starts before the scan so nothing landing mid-scan is missed
+            # (files both scanned and reported are deduplicated)
+            self.watch_folder(folder_path, recursive=recursive)
+
+        def worker():
+            count = 0
+            start = time.perf_counter()
+            try:
+                for batch in self.image_loader.scan_folder(folder_path, recursive=recursive):
+                    if cancel.is_set():
+                        logger.info("Scan of %s cancelled after %d images", folder_path, count)
+                        return
+                    first = count == 0
+                    count = iterator.extend(batch)
+                    if first:
+                        self.prefetcher.schedule(iterator)
+                        self._ocr_follow_cursor()
+                        self._emit("image_changed", iterator.current())
+                    self._emit("scan_progress", count)
+                    if count <= self.prefetcher.ahead + 1:
+                        # neighbours of the first image may only just have arrived
+                        self.prefetcher.schedule(iterator)
+                        self._ocr_follow_cursor()
+                metrics.observe("scan_folder", time.perf_counter() - start)
+                logger.info("Scanned %d images from %s", count, folder_path)
+                self._emit("images_loaded", count)
+                if self._arrangement is not None and self.iterator is iterator:
+                    # sorted while the scan ran: place the late arrivals too
+                    self._catalog_executor.submit(self._arrange, self._arrangement)
+            except Exception as e:
+                logger.exception("Error scanning folder: %s", e)
+                self._emit("error", e)
+
+        self._scan_thread = threading.Thread(target=worker, name="folder-scan", daemon=True)
+        self._scan_thread.start()
+        return True
+
+    def cancel_scan(self) -> None:
+        self._scan_cancel.set()
+
+    # -------- Watching --------
+    def watch_folder(self, folder_path: Path, recursive: bool = True) -> bool:
+        """Apply changes under folder_path to the loaded iterator as they happen."""
+        self.stop_watching()
+        try:
+            watcher = create_watcher(folder_path, recursive=recursive)
+        except Exception as e:
+            logger.warning("Cannot watch %s: %s", folder_path, e)
+            return False
+        watcher.on_changes = self._on_folder_changes
+        self._watcher = watcher.start()
+        return True
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def is_watching(self) -> bool:
+        return self._watcher is not None
+
+    def _on_folder_changes(self, changes: List[FolderChange]) -> None:
+        """Runs on the watcher thread: update the iterator in place, drop stale derived data."""
+        iterator = self.iterator
+        watcher = self._watcher
+        if iterator is None or watcher is None:
+            return
+        shown = iterator.current()
+        added: List[Path] = []
+        removed: List[Path] = []
+        modified: List[Path] = []
+        renamed = 0
+        moved_from: List[Path] = []
+        for change in changes:
+            if change.kind == "rescan":
+                found = {str(p): p for p in self.image_loader.scan_all(watcher.folder, watcher.recursive)}
+                have = {str(p) for p in iterator.all()}
+                added.extend(p for k, p in found.items() if k not in have)
+                removed.extend(Path(k) for k in have if k not in found)
+            elif change.kind == "added":
+                added.append(change.path)
+            elif change.kind == "removed":
+                removed.append(change.path)
+            elif change.kind == "modified":
+                modified.append(change.path)
+            elif change.kind == "renamed":
+                self._forget(change.old_path, ocr=False)  # same bytes: stored OCR still matches by content
+                moved_from.append(change.old_path)
+                if iterator.rename(change.old_path, change.path):
+                    renamed += 1
+                else:
+                    added.append(change.path)
+
+        known = {str(p) for p in iterator.all()}
+        new: List[Path] = []
+        for path in added:
+            if str(path) not in known:
+                known.add(str(path))
+                new.append(path)
+        if new:
+            iterator.extend(new)
+        dropped = iterator.remove(removed) if removed else 0
+        for path in removed + modified:
+            self._forget(path)
+        for path in modified:
+            iterator.forget_frames(path)
+            self._thumb_generation += 1
+
+        if self.auto_ocr_new and new:
+            self._queue_background_ocr(new)
+        self.prefetcher.schedule(iterator)
+        summary = {"added": len(new), "removed": dropped, "modified": len(modified), "renamed": renamed,
+                   "total": len(iterator)}
+        logger.info("Folder changed: %s", summary)
+        self._emit("folder_changed", summary)
+        current = iterator.current()
+        if current is not None and (str(current) != str(shown) or any(str(p) == str(current) for p in modified)):
+            self._emit("image_changed", current)
+        if self._arrangement is not None:
+            # keep the sort/filter: new files go to their place, changed headers are re-read
+            self._catalog_executor.submit(self._arrange, self._arrangement, removed + moved_from, modified)
+
+    def _forget(self, path: Path, ocr: bool = True) -> None:
+        """Drop everything derived from path: caches, tiles, previews, queued and stored OCR."""
+        derived = derived_from(path)
+        self.image_loader.invalidate(path)
+        self.tile_cache.invalidate_matching(derived)
+        self.level_cache.invalidate_matching(derived)
+        if self._pyramid is not None and derived(self._pyramid.path):
+            self._pyramid = None
+        self.ocr_jobs.cancel(lambda job: derived(job.key[0]))
+        if ocr and self.ocr_store:
+            self.ocr_store.invalidate(path=path)
+
+    def _queue_background_ocr(self, paths: Sequence[Path]) -> None:
+        if not self.ocr_store or not self.ocr_engine:
+            logger.info("Not auto-OCRing %d new images: no OCR result store to keep them in", len(paths))
+            return
+        for path in paths:
+            self.ocr_jobs.submit((str(path), None), partial(self._ocr_text, path), priority=Priority.BACKGROUND)
+
+    # -------- Sorting / filtering --------
+    def arrange_images(self, sort: Optional[str] = "name", reverse: bool = False, extensions: Optional[Sequence[str]] = None,
+                       since=None, until=None, hide_duplicates: bool = False) -> Optional[Future]:
+        """
+        Sort (ImageCatalog.SORT_KEYS; None = scan order) and optionally filter the loaded folder, in the
+        background; headers are read once per file. hide_duplicates shows one image per
+        near-duplicate group (images are hashed once, on first use). The iterator is
+        reordered in place, staying on the current image if it passes the filter.
+        on_images_arranged follows.
+        """
+        if not self.iterator:
+            return None
+        if sort is not None and sort not in ImageCatalog.SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort!r}")
+        arrangement = {"sort": sort, "reverse": reverse, "extensions": extensions, "since": since, "until": until,
+                       "hide_duplicates": hide_duplicates}
+        return self._catalog_executor.submit(self._arrange, arrangement)
+
+    def _arrange(self, arrangement: dict, forget: Sequence[Path] = (), refresh: Sequence[Path] = ()) -> int:
+        iterator = self.iterator
+        if iterator is None:
+            return 0
+        try:
+            if self._catalog_view is None:
+                # first arrangement of this folder: the iterator still holds all of it
+                self.catalog.sync(iterator.all())
+            else:
+                if forget:
+                    self.catalog.remove(forget)
+                # filtered-out files are already in the catalog; this picks up new arrivals
+                self.catalog.add([p for p in iterator.all() if p not in self.catalog] + list(refresh))
+            if arrangement.get("hide_duplicates"):
+                self.catalog.compute_hashes(self.image_loader)
+            view = self.catalog.arrange(**arrangement)
+        except Exception as e:
+            logger.exception("Arranging images failed: %s", e)
+            self._emit("error", e)
+            return 0
+        if self.iterator is not iterator:
+            return 0  # another folder was loaded meanwhile
+        shown = iterator.path_at(iterator.index)
+        iterator.reorder(view.paths, view.index_of(shown) if shown is not None else None)
+        self._catalog_view, self._arrangement = view, arrangement
+        logger.info("Arranged %d of %d images by %s%s", len(view), len(self.catalog), arrangement["sort"] or "scan order",
+                    " (reversed)" if arrangement["reverse"] else "")
+        self.prefetcher.schedule(iterator)
+        self._ocr_follow_cursor()
+        self._emit("images_arranged", len(view))
+        current = iterator.current()
+        if current is not None and str(iterator.path_at(iterator.index)) != str(shown):
+            self._emit("image_changed", current)
+        return len(view)
+
+    def find_duplicates(self, path: Optional[Path] = None) -> List[Path]:
+        """Near-duplicates of path (default: the current image) in the loaded folder; hashes it if needed."""
+        path = path or self.current_image()
+        if path is None or path not in self.catalog:
+            return []
+        self.catalog.compute_hashes(self.image_loader, [path])
+        return self.catalog.duplicates_of(path)
+
+    def goto_name(self, name: str) -> Optional[Path]:
+        """Jump to a file by name or full path (bisection in the catalog's name index once arranged)."""
+        idx = self._index_of(name)
+        return self.goto_image(idx) if idx >= 0 else None
+
+    def goto_path(self, path) -> Optional[Path]:
+        """Jump to a loaded file by its full path; a "<file>#N" page path opens that page. None if not loaded."""
+        real, frame = split_frame(path)
+        idx = self._index_of(real, exact=True)
+        return self.goto_image(idx, frame) if idx >= 0 else None
+
+    def _index_of(self, name: str, exact: bool = False) -> int:
+        iterator = self.iterator
+        if not iterator:
+            return -1
+        view = self._catalog_view
+        idx = view.index_of(name) if view is not None else -1
+        target = iterator.path_at(idx)
+        if target is not None and (str(target) == name or
+                                   (not exact and target.name.casefold() == Path(name).name.casefold())):
+            return idx
+        # not arranged yet, or the watcher appended files since: plain scan
+        wanted = Path(name).name.casefold()
+        return next((i for i, p in enumerate(iterator.all())
+                     if str(p) == name or (not exact and p.name.casefold() == wanted)), -1)
+
+    # -------- Text search --------
+    def search_text(self, query: str, limit: Optional[int] = None) -> List[SearchHit]:
+        """OCR'd images (any folder) whose text contains every word of query, best match first."""
+        if not self.ocr_store:
+            return []
+        return self.ocr_store.search(query, limit or config.SEARCH_RESULT_LIMIT)
+
+    def search_text_async(self, query: str, limit: Optional[int] = None) -> Future:
+        """search_text() off the UI thread; hits arrive through on_search_results."""
+
+        def run() -> List[SearchHit]:
+            try:
+                hits = self.search_text(query, limit)
+            except Exception as e:
+                logger.exception("Search for %r failed: %s", query, e)
+                self._emit("error", e)
+                return []
+            self._emit("search_results", query, hits)
+            return hits
+
+        return self._search_executor.submit(run)
+
+    def is_scanning(self) -> bool:
+        return bool(self._scan_thread and self._scan_thread.is_alive())
+
     def next_image(self) -> Optional[Path]:
         if not self.iterator:
             return None
         nxt = self.iterator.next()
-        if nxt and self.on_image_changed:
-            try:
-                self.on_image_changed(nxt)
-            except Exception as cb_e:
-                logger.exception("on_image_changed callback failed: %s", cb_e)
+        self.prefetcher.schedule(self.iterator, direction=1)
+        self._ocr_follow_cursor()
+        if nxt:
+            self._emit("image_changed", nxt)
         return nxt
 
     def prev_image(self) -> Optional[Path]:
         if not self.iterator:
             return None
         prev = self.iterator.prev()
-        if prev and self.on_image_changed:
-            try:
-                self.on_image_changed(prev)
-            except Exception as cb_e:
-                logger.exception("on_image_changed callback failed: %s", cb_e)
+        self.prefetcher.schedule(self.iterator, direction=-1)
+        self._ocr_follow_cursor()
+        if prev:
+            self._emit("image_changed", prev)
         return prev
 
+    def goto_image(self, idx: int, frame: int = 0) -> Optional[Path]:
+        """Jump to idx (page `frame` of a multi-page file); prefetch jobs for the old neighbourhood are cancelled."""
+        if not self.iterator:
+            return None
+        try:
+            target = self.iterator.goto(idx, frame)
+        except IndexError as e:
+            # e.g. the watcher removed files since the caller looked the index up
+            logger.debug("Ignored jump: %s", e)
+            return None
+        self.prefetcher.schedule(self.iterator)
+        self._ocr_follow_cursor()
+        if target:
+            self._emit("image_changed", target)
+        return target
+
     def current_image(self) -> Optional[Path]:
         return self.iterator.current() if self.iterator else None
 
+    def request_thumbnails(self, paths: Sequence[Path], size=None) -> Dict[str, Image.Image]:
+        """
+        Thumbnails for the visible part of a filmstrip. Those already in memory are returned
+        at once; the rest are loaded in the background and announced one by one through
+        on_thumbnail_ready. A newer request supersedes any that are still loading.
+        """
+        size = tuple(size or config.THUMBNAIL_SIZE)
+        cached: Dict[str, Image.Image] = {}
+        missing = []
+        for path in paths:
+            thumb = self.image_cache.get(("thumb", str(path), size))
+            if thumb is not None:
+                cached[str(path)] = thumb
+            else:
+                missing.append(path)
+        self._thumb_generation += 1
+        if missing:
+            self._thumb_executor.submit(self._load_thumbnails, missing, size, self._thumb_generation)
+        return cached
+
+    def _load_thumbnails(self, paths: List[Path], size, generation: int) -> None:
+        # small chunks: one preview-store query each, and a quick exit once superseded
+        for start in range(0, len(paths), 8):
+            if generation != self._thumb_generation:
+                return
+            for key, thumb in self.image_loader.get_thumbnails(paths[start:start + 8], size).items():
+                self._emit("thumbnail_ready", Path(key), thumb, key=key)
+
+    @property
+    def display_box(self) -> Tuple[int, int]:
+        return self.prefetcher.size
+
+    def set_display_box(self, box: Tuple[int, int]) -> Tuple[int, int]:
+        """Tell the controller the viewer size (bucketed); prefetching follows it. Returns the bucket."""
+        box = self.image_loader.bucket_box(tuple(box))
+        self.prefetcher.set_size(box, self.iterator)
+        return box
+
+    def get_display_image(self, path: Path, box=None) -> Image.Image:
+        """
+        Return `path` fitted into box (default: the display box), aspect ratio kept.
+        Prefetched frames come straight from the shared cache; a miss decodes
+        synchronously on the calling thread.
+        """
+        return self.image_loader.get_fitted(path, box or self.display_box)
+
+    def render_display_async(self, path: Path, box=None) -> None:
+        """get_display_image on a background thread; the frame arrives via on_display_ready."""
+        box = self.image_loader.bucket_box(tuple(box or self.display_box))
+
+        def render():
+            try:
+                frame = self.image_loader.get_fitted(path, box)
+            except Exception as e:
+                logger.warning("Display render failed for %s: %s", path, e)
+                return
+            self._emit("display_ready", path, box, frame)
+
+        self._display_executor.submit(render)
+
+    # -------- Animation --------
+    def play_animation(self, path: Path, box=None) -> Optional[AnimationPlayer]:
+        """Start playing path if it is animated (stopping any other); None for still images."""
+        self.stop_animation()
+        if not is_animated(path):
+            return None
+        self._animation = AnimationPlayer(path, self.image_loader.bucket_box(tuple(box or self.display_box))).start()
+        return self._animation
+
+    def stop_animation(self) -> None:
+        if self._animation is not None:
+            self._animation.stop()
+            self._animation = None
+
+    # -------- Zoom / pan --------
+    def pyramid(self, path: Path) -> TilePyramid:
+        """Tile pyramid for path (the last one is reused; tiles are cached across images)."""
+        pyramid = self._pyramid
+        if pyramid is None or pyramid.path != str(path):
+            pyramid = self._pyramid = TilePyramid(path, self.image_loader, self.tile_cache, self.level_cache)
+        return pyramid
+
+    def render_view_async(self, path: Path, view, out_size: Tuple[int, int]) -> None:
+        """
+        Render the view (left, top, right, bottom in source pixels) of path at out_size on the
+        display thread; the frame arrives via on_view_ready. Requests overtaken by a newer
+        one before they start are skipped, so a fast pan or zoom only renders where it ends.
+        """
+        self._view_generation += 1
+        generation = self._view_generation
+
+        def render():
+            if generation != self._view_generation:
+                return
+            try:
+                frame = self.pyramid(path).render(view, out_size)
+            except Exception as e:
+                logger.warning("View render failed for %s: %s", path, e)
+                self._emit("error", e)
+                return
+            self._emit("view_ready", path, view, frame)
+
+        self._display_executor.submit(render)
+
+    def shutdown(self) -> None:
+        """Stop background workers (call when the window closes)."""
+        self.cancel_scan()
+        self.stop_watching()
+        self.cancel_batch_ocr()
+        self.stop_animation()
+        self.ocr_jobs.shutdown()
+        self.prefetcher.shutdown()
+        self._thumb_executor.shutdown(wait=False, cancel_futures=True)
+        self._display_executor.shutdown(wait=False, cancel_futures=True)
+        self._catalog_executor.shutdown(wait=False, cancel_futures=True)
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
+        self.catalog.close()
+        self.image_loader.close()
+        if self.region_ocr:
+            self.region_ocr.close()
+        if self.ocr_engine:
+            self.ocr_engine.close()
+        if self.preview_store:
+            self.preview_store.close()
+        if self.ocr_store:
+            self.ocr_store.close()
+        # the gauges reference this controller's caches and queues
+        metrics.remove_gauges("")
+        metrics.close()
+
+    def _register_gauges(self) -> None:
+        gauges = {
+            "image_cache_hit_rate": lambda: self.image_cache.stats()["hit_rate"],
+            "image_cache_bytes": lambda: self.image_cache.stats()["bytes"],
+            "image_cache_entries": lambda: self.image_cache.stats()["entries"],
+            "tile_cache_hit_rate": lambda: self.tile_cache.stats()["hit_rate"],
+            "prefetch_pending": self.prefetcher.pending,
+            "ocr_jobs_pending": self.ocr_jobs.pending,
+            "event_bus_pending": self.events.pending,
+        }
+        for name, fn in gauges.items():
+            metrics.gauge(name, fn)
+
+    def _emit(self, topic: str, *args, key=None) -> None:
+        self.events.publish(topic, *args, key=key)
+
+    def _call_handler(self, attr: str, *args) -> None:
+        # looked up at delivery time so the UI can (re)assign on_* callbacks at any point
+        callback = getattr(self, attr, None)
+        if callback:
+            callback(*args)
+
+    def _ocr_key(self) -> str:
+        return OCRResultStore.result_key(self.ocr_engine, self.preprocessor, self.region_ocr)
+
+    @staticmethod
+    def _open_ocr_store() -> Optional[OCRResultStore]:
+        if not config.OCR_STORE_ENABLED:
+            return None
+        try:
+            return OCRResultStore()
+        except Exception as e:
+            logger.warning("OCR result store unavailable, continuing without it: %s", e)
+            return None
+
+    @staticmethod
+    def _open_catalog_store() -> Optional[CatalogStore]:
+        if not config.CATALOG_ENABLED:
+            return None
+        try:
+            return CatalogStore()
+        except Exception as e:
+            logger.warning("Catalog store unavailable, metadata will be re-read each session: %s", e)
+            return None
+
+    @staticmethod
+    def _open_preview_store() -> Optional[PreviewStore]:
+        if not config.PREVIEW_STORE_ENABLED:
+            return None
+        try:
+            return PreviewStore()
+        except Exception as e:
+            logger.warning("Preview store unavailable, continuing without it: %s", e)
+            return None
+
     # -------- OCR (async) --------
-    def extract_text_async(self, path: Path, callback: Optional[Callable[[str], None]] = None) -> bool:
+    def extract_text_async(self, path: Path, callback: Optional[Callable[[str], None]] = None,
+                           region: Optional[Tuple[float, float, float, float]] = None,
+                           priority: int = Priority.INTERACTIVE) -> Optional[Future]:
         """
-        Start OCR in background. Returns True if started.
-        Calls `callback(text)` and `self.on_ocr_complete(text)` when finished.
-        If ocr_engine is not available, reports on_error and returns False.
+        Queue OCR of path on the job scheduler and return its Future (None without an engine).
+        Calls `callback(text)` and `self.on_ocr_complete(text)` through the event bus when
+        finished; errors go to on_error.
+        region=(left, top, right, bottom) as fractions of the image size OCRs only that
+        crop (region results are not kept in the OCR store).
+        Asking again for the same image/region while it is queued or running shares that job.
         """
 
         if self.ocr_engine is None:
             err = RuntimeError("OCR engine not initialized")
             logger.error(err)
-            if self.on_error:
-                self.on_error(err)
-            return False
+            self._emit("error", err)
+            return None
 
-        def worker(p: Path):
+        def done(future: Future) -> None:
             try:
-                logger.info("Starting OCR for %s", p)
-                # Use engine.extract(Image) — engine expects PIL.Image
-                image = Image.open(p)
-                text = self.ocr_engine.extract(image)
-                logger.info("OCR finished for %s", p)
-                if callback:
-                    try:
-                        callback(text)
-                    except Exception as cb_e:
-                        logger.exception("OCR callback failed: %s", cb_e)
-                if self.on_ocr_complete:
-                    try:
-                        self.on_ocr_complete(text)
-                    except Exception as cb_e:
-                        logger.exception("on_ocr_complete callback failed: %s", cb_e)
+                text = future.result()
+            except CancelledError:
+                logger.info("OCR for %s cancelled", path)
+                return
             except OCRExtractionError as e:
-                logger.exception("OCRExtractionError: %s", e)
-                if self.on_error:
-                    self.on_error(e)
+                logger.error("OCRExtractionError: %s", e)
+                self._emit("error", e)
+                return
             except Exception as e:
-                logger.exception("Unexpected OCR failure: %s", e)
-                if self.on_error:
-                    self.on_error(e)
+                logger.error("Unexpected OCR failure: %s", e)
+                self._emit("error", e)
+                return
+            if callback:
+                self.events.call_soon(callback, text)
+            self._emit("ocr_complete", text)
+
+        return self.ocr_jobs.submit((str(path), region), partial(self._ocr_text, path, region),
+                                    priority=priority, on_done=done)
+
+    # -------- Event delivery --------
+    def attach_dispatcher(self) -> None:
+        """Queue events for dispatch() (polled by the UI loop) instead of running them on worker threads."""
+        self.events.inline = False
+
+    def dispatch(self, max_events: int = 500, budget_ms: Optional[float] = None) -> int:
+        """Deliver queued events on the calling thread within budget_ms. Returns how many ran."""
+        return self.events.drain(max_events, config.UI_DISPATCH_BUDGET_MS if budget_ms is None else budget_ms)
 
-        # Prevent concurrent OCR runs
-        if self._ocr_thread and self._ocr_thread.is_alive():
-            logger.warning("OCR already running")
+    def _ocr_text(self, path: Path, region: Optional[Tuple[float, float, float, float]] = None) -> str:
+        """Runs on an OCR job thread: store lookup, else decode + preprocess + OCR + store."""
+        engine_key = self._ocr_key()
+        store = self.ocr_store if region is None else None
+        text = store.lookup(path, engine_key) if store else None
+        if text is not None:
+            logger.info("OCR result for %s served from store", path)
+            return text
+        if store and config.DUPLICATE_REUSE_OCR:
+            text = self._ocr_from_duplicate(path, engine_key)
+            if text is not None:
+                return text
+        logger.info("Starting OCR for %s", path)
+        # native depth: a grayscale scan is not widened to RGB for OCR
+        image = self.image_loader.load_ocr_image(path)
+        box = None
+        if region is not None:
+            left, top, right, bottom = region
+            box = (left * image.width, top * image.height, right * image.width, bottom * image.height)
+        result = self.region_ocr.run(image, box)
+        text = result.text
+        logger.info("OCR finished for %s", path)
+        if result.partial:
+            # shown, but not stored: the next request OCRs the page again
+            logger.warning("OCR of %s is partial (%d regions failed); not stored", path, result.failed)
+        elif store:
+            store.store(path, engine_key, text)
+        return text
+
+    def _ocr_from_duplicate(self, path: Path, engine_key: str) -> Optional[str]:
+        """Stored text of an identical-hash copy of path (a re-scan), recorded for path too; else None."""
+        if path not in self.catalog:
+            return None
+        self.catalog.compute_hashes(self.image_loader, [path])
+        for other in self.catalog.identical_to(path):
+            text = self.ocr_store.lookup(other, engine_key)
+            if text is not None:
+                logger.info("OCR result for %s reused from its duplicate %s", path, other)
+                self.ocr_store.store(path, engine_key, text)
+                return text
+        return None
+
+    def _ocr_follow_cursor(self) -> None:
+        """
+        After navigation: cancel OCR for images the user has left and, when results are
+        kept in the store, OCR the next few images speculatively at PREFETCH priority.
+        """
+        if not self.iterator or self.ocr_engine is None:
+            return
+        idx = self.iterator.index
+        ahead = [self.iterator.path_at(i) for i in range(idx + 1, idx + 1 + config.OCR_PREFETCH_AHEAD)]
+        ahead = [p for p in ahead if p is not None]
+        keep = {str(p) for p in ahead}
+        current = self.iterator.current()
+        if current:
+            keep.add(str(current))
+        self.ocr_jobs.cancel(lambda job: job.priority <= Priority.PREFETCH and job.key[0] not in keep)
+        if not self.ocr_store:
+            return
+        for p in ahead:
+            self.ocr_jobs.submit((str(p), None), partial(self._ocr_text, p, None), priority=Priority.PREFETCH)
+
+    # -------- Batch OCR (process pool) --------
+    def extract_folder_async(self, output_path: Path, workers: Optional[int] = None, resume: bool = True) -> bool:
+        """
+        OCR every image of the loaded iterator on a process pool, appending results
+        to output_path (JSON lines). Returns False if nothing is loaded or a batch is running.
+        """
+        if not self.iterator or len(self.iterator) == 0:
+            return False
+        if self._batch_thread and self._batch_thread.is_alive():
+            logger.warning("Batch OCR already running")
             return False
 
-        self._ocr_thread = threading.Thread(target=worker, args=(path,), daemon=True)
-        self._ocr_thread.start()
+        runner = BatchOCRRunner(self.ocr_engine_name, workers=workers, output_path=output_path,
+                                resume=resume, store=self.ocr_store)
+        runner.on_progress = lambda done, total, rate: self._emit("batch_progress", done, total, rate)
+        # interactive OCR shares the CPU with the pool: hold back new batch work while it waits
+        runner.yield_to = lambda: self.ocr_jobs.has_pending(Priority.INTERACTIVE)
+        paths = self.iterator.all()
+
+        def worker():
+            try:
+                summary = runner.run(paths)
+                self._emit("batch_complete", summary)
+            except Exception as e:
+                logger.exception("Batch OCR failed: %s", e)
+                self._emit("error", e)
+
+        self._batch_runner = runner
+        self._batch_thread = threading.Thread(target=worker, name="batch-ocr", daemon=True)
+        self._batch_thread.start()
         return True
+
+    def cancel_batch_ocr(self) -> None:
+        if self._batch_runner:
+            self._batch_runner.cancel()
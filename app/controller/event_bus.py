@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from app.utils.log_manager import get_logger
+
+logger = get_logger("EventBus")
+
+_CALL = "__call__"  # topic of one-off callables posted with call_soon()
+
+
+class EventBus:
+    """
+    Hands controller events from worker threads to the UI thread.
+
+    - publish()/call_soon() may be called from any thread: events go onto a deque
+      (append/popleft are atomic, no lock on the hot path)
+    - drain() runs on the UI thread (Tk polls it with after()) and delivers events in
+      posting order to the handlers subscribed to their topic, within a time budget;
+      whatever is left waits for the next tick
+    - coalesced topics keep only the newest payload per (topic, key) until it is
+      delivered, so hundreds of progress ticks per second become one UI update per tick
+    - with inline=True (no UI loop, e.g. tests or the CLI) events are delivered
+      immediately on the publishing thread
+    """
+
+    def __init__(self, coalesce: Optional[Set[str]] = None, inline: bool = True):
+        self.inline = inline
+        self._coalesced: Set[str] = set(coalesce or ())
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._queue: deque = deque()
+        self._latest: Dict[Tuple[str, Hashable], tuple] = {}
+        self._latest_lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.merged = 0
+
+    # -------- Wiring --------
+    def subscribe(self, topic: str, handler: Callable) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic: str, handler: Callable) -> None:
+        handlers = self._handlers.get(topic, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def coalesce(self, topic: str) -> None:
+        self._coalesced.add(topic)
+
+    # -------- Posting (any thread) --------
+    def publish(self, topic: str, *args: Any, key: Hashable = None) -> None:
+        self.published += 1
+        if self.inline:
+            self._deliver(topic, args)
+            return
+        if topic not in self._coalesced:
+            self._queue.append((topic, args))
+            return
+        slot = (topic, key)
+        with self._latest_lock:
+            first = slot not in self._latest
+            if not first:
+                self.merged += 1
+            self._latest[slot] = args
+        if first:
+            # the queue holds a marker; the payload is whatever is newest when it is drained
+            self._queue.append((slot, None))
+
+    def call_soon(self, fn: Callable, *args: Any) -> None:
+        """Run fn(*args) on the draining thread."""
+        self.publish(_CALL, fn, *args)
+
+    # -------- Delivery (UI thread) --------
+    def drain(self, max_events: int = 500, budget_ms: Optional[float] = None) -> int:
+        """Deliver queued events until empty, max_events, or budget_ms elapsed. Returns count."""
+        deadline = time.perf_counter() + budget_ms / 1000.0 if budget_ms else None
+        count = 0
+        while count < max_events:
+            try:
+                topic, args = self._queue.popleft()
+            except IndexError:
+                break
+            if args is None:  # coalesced marker
+                with self._latest_lock:
+                    args = self._latest.pop(topic, None)
+                if args is None:
+                    continue
+                topic = topic[0]
+            self._deliver(topic, args)
+            count += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return count
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {"published": self.published, "delivered": self.delivered, "merged": self.merged,
+                "pending": len(self._queue)}
+
+    def _deliver(self, topic: str, args: tuple) -> None:
+        self.delivered += 1
+        if topic == _CALL:
+            handlers, args = [args[0]], args[1:]
+        else:
+            handlers = self._handlers.get(topic, ())
+        for handler in list(handlers):
+            try:
+                handler(*args)
+            except Exception as e:
+                logger.exception("Handler for '%s' failed: %s", topic, e)
@@ -1,5 +1,25 @@
-from app.core.image_loader import ImageLoader, ImageIterator
-from app.core.file_operations import FileHelper
-from app.core.ocr_engine import OCREngine
+"""
+Core (GUI-free) image, cache and OCR modules.
 
-__all__ = ["ImageLoader", "ImageIterator", "FileHelper","OCREngine"]
+Names below are imported on first access, so importing one submodule (a batch OCR worker,
+the command line) does not load the others and their NumPy/Pillow/pytesseract imports.
+"""
+import importlib
+
+_EXPORTS = {
+    "ImageLoader": "app.core.image_loader",
+    "ImageIterator": "app.core.image_loader",
+    "ImageCache": "app.core.image_cache",
+    "FileHelper": "app.core.file_operations",
+    "OCREngine": "app.core.ocr_engine",
+}
+
+__all__ = ["ImageLoader", "ImageIterator", "ImageCache", "FileHelper","OCREngine"]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
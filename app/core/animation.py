@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Optional, Tuple
+from PIL import Image
+from app.core.image_loader import ImageLoader, resample_filter
+from app.core.raster import split_frame
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Animation")
+
+Frame = Tuple[Image.Image, int]  # display-ready frame, duration in ms
+
+
+def is_animated(path) -> bool:
+    """True for an animated GIF (only the header and the start of the second frame are read)."""
+    real, _ = split_frame(path)
+    if Path(real).suffix.lower() not in config.ANIMATED_EXTENSIONS:
+        return False
+    try:
+        with Image.open(real) as img:
+            return bool(getattr(img, "is_animated", False))
+    except Exception:
+        return False
+
+
+class AnimationPlayer:
+    """
+    Plays an animated image at its native frame rate while holding only a few frames.
+
+    - A decoder thread walks the file frame by frame with seek() (sequential seeks are
+      incremental, nothing is decoded ahead of need), fits each frame into box and puts it
+      in a ring of ring_size frames; it blocks while the ring is full and loops at the end
+    - The UI takes frames with next_frame() when the previous one's duration is up, so
+      memory is ring_size display frames whatever the animation length
+    - Durations below ANIMATION_MIN_FRAME_MS are shown at 100 ms, as browsers do
+    """
+
+    def __init__(self, path, box: Tuple[int, int], ring_size: Optional[int] = None):
+        self.path = str(path)
+        self.box = tuple(box)
+        self.ring_size = max(2, ring_size or config.ANIMATION_RING_FRAMES)
+        self._ring: Deque[Frame] = deque()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.frames_decoded = 0
+        self.late = 0  # next_frame() calls that found the ring empty
+
+    def start(self) -> "AnimationPlayer":
+        self._thread = threading.Thread(target=self._decode, name="animation", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._ring.clear()
+            self._cond.notify_all()
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def next_frame(self) -> Optional[Frame]:
+        """The next frame and how long to show it, or None if the decoder is behind."""
+        with self._cond:
+            if not self._ring:
+                self.late += 1
+                return None
+            frame = self._ring.popleft()
+            self._cond.notify()
+        return frame
+
+    def _decode(self) -> None:
+        try:
+            with Image.open(split_frame(self.path)[0]) as img:
+                size = ImageLoader.fit_size(img.size, self.box)
+                index = 0
+                while not self._stop.is_set():
+                    try:
+                        img.seek(index)
+                    except EOFError:
+                        if index == 0:
+                            return
+                        index = 0  # loop
+                        continue
+                    duration = img.info.get("duration") or 100
+                    if duration < config.ANIMATION_MIN_FRAME_MS:
+                        duration = 100
+                    frame = img.convert("RGB")
+                    if frame.size != size:
+                        frame = frame.resize(size, resample_filter())
+                    self.frames_decoded += 1
+                    with self._cond:
+                        while len(self._ring) >= self.ring_size and not self._stop.is_set():
+                            self._cond.wait()
+                        if self._stop.is_set():
+                            return
+                        self._ring.append((frame, int(duration)))
+                    index += 1
+        except Exception as e:
+            logger.warning("Animation playback of %s stopped: %s", self.path, e)
+        finally:
+            logger.debug("Animation %s: %d frames decoded, %d late", self.path, self.frames_decoded, self.late)
+
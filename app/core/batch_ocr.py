@@ -0,0 +1,262 @@
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from app.core.file_operations import FileHelper
+from app.core.ocr_engine import OCREngine, OCREngineFactory
+from app.core.ocr_store import OCRResultStore
+from app.core.preprocess import OCRPreprocessor
+from app.core.raster import iter_frames, open_image
+from app.core.region_ocr import RegionOCR
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("BatchOCR")
+
+# One engine, preprocessor (and read-only result store) per worker process, created by the pool initializer
+_worker_engine: Optional[OCREngine] = None
+_worker_regions: Optional[RegionOCR] = None
+_worker_key: Optional[str] = None
+_worker_store: Optional[OCRResultStore] = None
+
+
+def _init_worker(engine_name: str, store_path: Optional[str] = None, settings: Optional[Dict] = None) -> None:
+    global _worker_engine, _worker_regions, _worker_key, _worker_store
+    # the parent's effective settings: a fresh import only sees the file and environment layers
+    if settings:
+        config.apply(settings, "parent process")
+    # tesseract is multi-threaded through OpenMP; one thread per process avoids oversubscription
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    _worker_engine = OCREngineFactory.create_engine(engine_name)
+    # the pool already uses every core: regions of a large page run one after another here
+    _worker_regions = RegionOCR(_worker_engine, OCRPreprocessor(), workers=1)
+    _worker_key = OCRResultStore.result_key(_worker_engine, _worker_regions.preprocessor, _worker_regions)
+    if store_path:
+        try:
+            _worker_store = OCRResultStore(store_path, readonly=True)
+        except Exception:
+            _worker_store = None
+
+
+def worker_context():
+    """
+    Multiprocessing context for OCR workers. Never plain fork: forking a process that runs
+    GUI/worker threads is unsafe. forkserver forks each worker from a single-threaded server
+    that imported this module once, so a worker is up in milliseconds; spawn re-imports
+    everything per worker.
+    """
+    method = config.OCR_WORKER_START
+    if method == "auto":
+        method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+    ctx = mp.get_context(method)
+    if method == "forkserver":
+        # only takes effect before the server's first start
+        ctx.set_forkserver_preload(["__main__", __name__])
+    return ctx
+
+
+def _ocr_one(path: str) -> Dict:
+    # hashing and the store lookup happen here so they run in parallel across workers
+    start = time.perf_counter()
+    signature = None
+    try:
+        signature = FileHelper.content_signature(path)
+        if _worker_store is not None:
+            text = _worker_store.get(signature, _worker_key)
+            if text is not None:
+                return {"path": path, "text": text, "error": None, "cached": True,
+                        "signature": signature, "seconds": time.perf_counter() - start}
+        with open_image(path) as img:
+            img.load()
+            result = _worker_regions.run(img)
+        return {"path": path, "text": result.text, "error": None, "cached": False,
+                "signature": signature, "seconds": time.perf_counter() - start,
+                "regions": len(result.boxes), "failed_regions": result.failed,
+                "preprocess": result.preprocess.summary() if result.preprocess else None}
+    except Exception as e:
+        return {"path": path, "text": None, "error": f"{type(e).__name__}: {e}", "cached": False,
+                "signature": signature, "seconds": time.perf_counter() - start}
+
+
+class BatchOCRRunner:
+    """
+    Runs OCREngine.extract over many images on a process pool.
+
+    - Results are appended to a JSON-lines file as they arrive (one record per image)
+    - With resume=True, paths already recorded without error in that file are skipped
+      (pages with failed regions are retried and never put in the store)
+    - With an OCRResultStore, images whose content was already OCR'd with the same
+      engine settings are answered from the store, and new results are added to it
+    - cancel() stops submitting work; whatever finished is already on disk
+    - on_progress(done, total, images_per_second) and on_result(record) are called
+      from the thread that runs run()
+    - while yield_to() returns True (e.g. interactive OCR is waiting) no new images are
+      handed to the pool and queued ones that no worker has started are taken back, so at
+      most `workers` images (the ones being OCR'd) are ahead of the interactive job
+    - with pages=True every page of a multi-page TIFF is OCR'd as its own record
+      ("<file>#N"); pages are counted from the headers and decoded in the workers via seek()
+    """
+
+    def __init__(self, engine_name: str = "tesseract", workers: Optional[int] = None,
+                 output_path=None, resume: bool = True, store: Optional[OCRResultStore] = None,
+                 pages: Optional[bool] = None):
+        self.engine_name = engine_name
+        self.pages = config.OCR_ALL_PAGES if pages is None else pages
+        self.store = store
+        self.workers = workers or config.OCR_WORKERS
+        self.output_path = Path(output_path) if output_path else None
+        self.resume = resume
+        self._cancel = threading.Event()
+
+        self.on_progress: Optional[Callable[[int, int, float], None]] = None
+        self.on_result: Optional[Callable[[Dict], None]] = None
+        self.yield_to: Optional[Callable[[], bool]] = None
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def completed_paths(self) -> Set[str]:
+        """Paths already OCR'd successfully according to the output file."""
+        done: Set[str] = set()
+        if not self.output_path or not self.output_path.exists():
+            return done
+        with open(self.output_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                # partial pages (some regions failed) are OCR'd again
+                if record.get("error") is None and not record.get("failed_regions") and "path" in record:
+                    done.add(record["path"])
+        return done
+
+    def run(self, paths: Iterable[Path]) -> Dict:
+        """Blocking run. Returns a summary dict (done, failed, cached, skipped, seconds, rate, cancelled)."""
+        self._cancel.clear()
+        if self.pages:
+            paths = (page for path in paths for page in iter_frames(path))
+        todo: List[str] = [str(p) for p in paths]
+        skipped = 0
+        if self.resume:
+            already = self.completed_paths()
+            before = len(todo)
+            todo = [p for p in todo if p not in already]
+            skipped = before - len(todo)
+            if skipped:
+                logger.info("Resuming batch OCR: %d images already done", skipped)
+
+        # fail fast in this process instead of breaking every worker
+        engine = OCREngineFactory.create_engine(self.engine_name)
+        regions = RegionOCR(engine, OCRPreprocessor(), workers=1)
+        engine_key = OCRResultStore.result_key(engine, regions.preprocessor, regions)
+        engine.close()
+
+        total = len(todo)
+        done = failed = cached = 0
+        start = time.perf_counter()
+        out = open(self.output_path, "a", encoding="utf-8") if self.output_path else None
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=worker_context(),
+            initializer=_init_worker,
+            initargs=(self.engine_name, str(self.store.db_path) if self.store else None, config.changed()),
+        )
+        try:
+            pending: Set[Future] = set()
+            submitted: Dict[Future, str] = {}
+            queue = iter(todo)
+            taken_back: "deque[str]" = deque()
+            max_in_flight = self.workers * 4
+            exhausted = False
+            while True:
+                yielding = bool(self.yield_to and self.yield_to())
+                if yielding and len(pending) > self.workers:
+                    self._take_back(pending, submitted, taken_back)
+                while not self.cancelled and not yielding and len(pending) < max_in_flight:
+                    if taken_back:
+                        path = taken_back.popleft()
+                    else:
+                        path = None if exhausted else next(queue, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(_ocr_one, path)
+                    submitted[future] = path
+                    pending.add(future)
+                if not pending:
+                    if (exhausted and not taken_back) or self.cancelled:
+                        break
+                    time.sleep(0.1)  # holding back for higher-priority work
+                    continue
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    submitted.pop(future, None)
+                    if future.cancelled():
+                        continue
+                    record = future.result()
+                    done += 1
+                    if record["error"]:
+                        failed += 1
+                        logger.warning("OCR failed for %s: %s", record["path"], record["error"])
+                    elif record["cached"]:
+                        cached += 1
+                        if self.store is not None:
+                            self.store.index_result(record["path"], record["signature"], engine_key, record["text"])
+                    elif record.get("failed_regions"):
+                        logger.warning("OCR of %s is partial (%d regions failed); not stored",
+                                       record["path"], record["failed_regions"])
+                    elif self.store is not None:
+                        self.store.put(record["signature"], engine_key, record["path"], record["text"])
+                    if out:
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        out.flush()
+                    if self.on_result:
+                        self.on_result(record)
+                if finished and self.on_progress:
+                    elapsed = time.perf_counter() - start
+                    self.on_progress(done, total, done / elapsed if elapsed else 0.0)
+                if self.cancelled:
+                    for future in pending:
+                        future.cancel()
+                    pending = {f for f in pending if not f.cancelled()}
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if out:
+                out.close()
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "done": done,
+            "failed": failed,
+            "cached": cached,
+            "skipped": skipped,
+            "total": total,
+            "seconds": elapsed,
+            "rate": done / elapsed if elapsed else 0.0,
+            "cancelled": self.cancelled,
+        }
+        logger.info("Batch OCR finished: %s", summary)
+        return summary
+
+    @staticmethod
+    def _take_back(pending: Set[Future], submitted: Dict[Future, str], taken_back: "deque[str]") -> None:
+        # futures a worker has not picked up yet can still be cancelled; they go first next time
+        paths = []
+        for future, path in list(submitted.items()):
+            if future in pending and future.cancel():
+                pending.discard(future)
+                del submitted[future]
+                paths.append(path)
+        taken_back.extendleft(reversed(paths))
+        if paths:
+            logger.debug("Took back %d queued images for higher-priority OCR", len(paths))
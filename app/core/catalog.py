@@ -0,0 +1,445 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from app.core.perceptual_hash import cluster, to_signed, to_unsigned
+from app.core.raster import split_frame
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Catalog")
+
+_EXIF_IFD = 0x8769
+_DATETIME_ORIGINAL = 36867
+_DATETIME = 306
+_DIGITS = re.compile(r"(\d+)")
+
+
+class ImageMeta(NamedTuple):
+    """Header metadata of one image file, plus its perceptual hashes once computed."""
+    path: str
+    mtime_ns: int
+    file_size: int
+    width: int
+    height: int
+    taken: Optional[float]  # EXIF capture time (epoch seconds), None if the file has none
+    dhash: Optional[int] = None  # 64-bit, see app/core/perceptual_hash.py
+    phash: Optional[int] = None
+
+
+def natural_key(name: str) -> tuple:
+    """Sort key where "img2" < "img10": text runs (case-folded) alternate with numbers."""
+    return tuple(int(part) if i % 2 else part.casefold() for i, part in enumerate(_DIGITS.split(name)))
+
+
+def _exif_time(value) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip("\x00 ")[:19], "%Y:%m:%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+def read_meta(path, stat: Optional[os.stat_result] = None) -> Optional[ImageMeta]:
+    """
+    Size and capture time from the file header; pixel data is never decoded.
+    EXIF is read where it sits in the header (JPEG APP1, TIFF IFDs, PNG eXIf before
+    the image data); for other files taken is None.
+    """
+    real, frame = split_frame(path)
+    try:
+        st = stat or os.stat(real)
+        with Image.open(real) as img:
+            if frame:
+                img.seek(frame)
+            exif = None
+            if "exif" in img.info:
+                exif = Image.Exif()
+                exif.load(img.info["exif"])
+            elif img.format in ("TIFF", "JPEG"):
+                exif = img.getexif()
+            taken = None
+            if exif:
+                taken = _exif_time(exif.get_ifd(_EXIF_IFD).get(_DATETIME_ORIGINAL)) or _exif_time(exif.get(_DATETIME))
+            return ImageMeta(str(path), st.st_mtime_ns, st.st_size, img.width, img.height, taken)
+    except Exception as e:
+        logger.debug("No metadata for %s: %s", path, e)
+        return None
+
+
+class CatalogStore:
+    """
+    Persistent header metadata and perceptual hashes (one SQLite table), so a folder's
+    headers are read and its images hashed once. Rows carry the file's mtime and size; a
+    row that no longer matches the file is a miss. Hashes are stored as signed 64-bit.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS catalog (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            file_size INTEGER NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            taken REAL,
+            dhash INTEGER,
+            phash INTEGER
+        ) WITHOUT ROWID;
+    """
+    _COLUMNS = "path, mtime_ns, file_size, width, height, taken, dhash, phash"
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or config.CATALOG_STORE_PATH).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        # stores from before hashing existed
+        have = {row[1] for row in self._conn.execute("PRAGMA table_info(catalog)")}
+        for column in ("dhash", "phash"):
+            if column not in have:
+                self._conn.execute(f"ALTER TABLE catalog ADD COLUMN {column} INTEGER")
+
+    def get_many(self, stats: Dict[str, Tuple[int, int]]) -> Dict[str, ImageMeta]:
+        """Rows for paths whose stored (mtime_ns, size) still equals the one given."""
+        found: Dict[str, ImageMeta] = {}
+        keys = list(stats)
+        with self._lock:
+            # stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                for row in self._conn.execute(f"SELECT {self._COLUMNS} FROM catalog WHERE path IN ({marks})",
+                                              chunk):
+                    meta = ImageMeta(*row[:6], to_unsigned(row[6]), to_unsigned(row[7]))
+                    if stats[meta.path] == (meta.mtime_ns, meta.file_size):
+                        found[meta.path] = meta
+        return found
+
+    def put_many(self, metas: Iterable[ImageMeta]) -> None:
+        rows = [(*m[:6], to_signed(m.dhash), to_signed(m.phash)) for m in metas]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(f"INSERT OR REPLACE INTO catalog ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   rows)
+            self._conn.execute("COMMIT")
+
+    def invalidate(self, path) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM catalog WHERE path = ?", (str(path),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CatalogView:
+    """
+    One arrangement of the catalog: the paths in display order, and where each catalog
+    row ended up (-1 when filtered out), so lookups by path or filename map to a position.
+    """
+
+    def __init__(self, catalog: "ImageCatalog", rows: np.ndarray):
+        self._catalog = catalog
+        self.rows = rows
+        self.paths: List[Path] = [catalog._paths[i] for i in rows.tolist()]
+        self.position = np.full(len(catalog._paths), -1, dtype=np.int64)
+        self.position[rows] = np.arange(len(rows))
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def index_of(self, name_or_path) -> int:
+        """
+        Position of a file by full path (O(1)) or by file name (O(log n) bisect over the
+        catalog's name index; the earliest position wins when names repeat). -1 if absent.
+        """
+        catalog = self._catalog
+        row = catalog._row.get(str(name_or_path))
+        if row is not None:
+            return int(self.position[row])
+        rows = catalog._rows_named(Path(str(name_or_path)).name)
+        positions = [int(self.position[r]) for r in rows if self.position[r] >= 0]
+        return min(positions) if positions else -1
+
+
+class ImageCatalog:
+    """
+    Header metadata of a folder's images, with cached sort orders and filters.
+
+    - sync()/add() read headers (never pixels) on a thread pool, once per file version:
+      rows are reused from memory, then from the optional CatalogStore, and only the
+      rest are read from disk and written back
+    - Metadata is columnar (NumPy arrays); each sort order is computed once and cached
+      until the set of files changes, so re-sorting or reversing is an array lookup
+    - Name order uses a natural sort ("img2" before "img10"); the same sorted name keys
+      serve filename lookups by bisection
+    - arrange() returns a CatalogView: a sort, reversed or not, optionally filtered by
+      extension and by capture date (modification time for files without EXIF), and
+      optionally showing one image per group of near-duplicates
+    - compute_hashes() adds dHash/pHash from reduced decodes (ImageLoader.perceptual_hashes),
+      persisted with the metadata; duplicate groups are pHash clusters within
+      DUPLICATE_MAX_DISTANCE bits, found with vectorized Hamming search and cached like orders
+    """
+
+    SORT_KEYS = ("name", "taken", "mtime", "size", "dimensions")
+
+    def __init__(self, store: Optional[CatalogStore] = None, workers: Optional[int] = None):
+        self.store = store
+        self.workers = workers or config.CATALOG_WORKERS
+        self._lock = threading.RLock()
+        self._metas: Dict[str, ImageMeta] = {}
+        self._paths: List[Path] = []
+        self._row: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._orders: Dict[str, np.ndarray] = {}
+        self._name_index: Optional[List[Tuple[tuple, int]]] = None
+        self._clusters: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path) -> bool:
+        return str(path) in self._row
+
+    def meta(self, path) -> Optional[ImageMeta]:
+        return self._metas.get(str(path))
+
+    # -------- Contents --------
+    def sync(self, paths: Iterable[Path]) -> int:
+        """Make the catalog hold exactly paths (in this order as the unsorted base). Returns the count."""
+        paths = [Path(p) for p in paths]
+        with self._lock:
+            metas = self._collect(paths)
+            self._paths = [p for p in paths if str(p) in metas]
+            self._metas = metas
+            self._rebuild()
+            return len(self._paths)
+
+    def add(self, paths: Iterable[Path]) -> int:
+        """Add paths or refresh ones already present whose file changed. Returns how many were read."""
+        paths = [Path(p) for p in paths]
+        with self._lock:
+            before = dict(self._metas)
+            fresh = self._collect(paths)
+            for path in paths:
+                key = str(path)
+                if key in fresh and key not in self._row:
+                    self._paths.append(path)
+            self._metas.update(fresh)
+            self._rebuild()
+            return sum(1 for k, m in fresh.items() if before.get(k) != m)
+
+    def remove(self, paths: Iterable[Path]) -> int:
+        gone = {str(p) for p in paths}
+        with self._lock:
+            kept = [p for p in self._paths if str(p) not in gone]
+            removed = len(self._paths) - len(kept)
+            if removed:
+                self._paths = kept
+                for key in gone:
+                    self._metas.pop(key, None)
+                self._rebuild()
+            return removed
+
+    # -------- Perceptual hashes --------
+    def compute_hashes(self, loader, paths: Optional[Iterable[Path]] = None) -> int:
+        """
+        Hash the images (default: all) that have no hashes yet, on a thread pool; decoding
+        runs outside the catalog lock. Returns how many were hashed.
+        """
+        with self._lock:
+            keys = [str(p) for p in (self._paths if paths is None else paths)]
+            todo = [self._metas[k] for k in keys if k in self._metas and self._metas[k].phash is None]
+        if not todo:
+            return 0
+        start = time.perf_counter()
+
+        def run(meta: ImageMeta) -> Optional[ImageMeta]:
+            try:
+                d, p = loader.perceptual_hashes(meta.path)
+            except Exception as e:
+                logger.debug("Cannot hash %s: %s", meta.path, e)
+                return None
+            return meta._replace(dhash=d, phash=p)
+
+        with ThreadPoolExecutor(max_workers=config.HASH_WORKERS, thread_name_prefix="hash") as pool:
+            hashed = [m for m in pool.map(run, todo, chunksize=16) if m is not None]
+        with self._lock:
+            # keep only results for files that did not change meanwhile
+            hashed = [m for m in hashed if m.path in self._metas and self._metas[m.path][:3] == m[:3]]
+            for meta in hashed:
+                self._metas[meta.path] = meta
+            self._rebuild_hashes()
+        if self.store:
+            self.store.put_many(hashed)
+        logger.info("Hashed %d images in %.2f s", len(hashed), time.perf_counter() - start)
+        return len(hashed)
+
+    def duplicate_labels(self, max_distance: Optional[int] = None) -> np.ndarray:
+        """Group label per catalog row; rows without a hash are groups of their own."""
+        max_distance = config.DUPLICATE_MAX_DISTANCE if max_distance is None else max_distance
+        with self._lock:
+            labels = self._clusters.get(max_distance)
+            if labels is None:
+                cols = self._columns
+                labels = self._clusters[max_distance] = cluster(cols["phash"], max_distance, cols["hashed"])
+            return labels
+
+    def duplicates_of(self, path, max_distance: Optional[int] = None) -> List[Path]:
+        """Other images in path's duplicate group."""
+        with self._lock:
+            row = self._row.get(str(path))
+            if row is None:
+                return []
+            labels = self.duplicate_labels(max_distance)
+            return [self._paths[i] for i in np.flatnonzero(labels == labels[row]) if i != row]
+
+    def identical_to(self, path) -> List[Path]:
+        """Images whose dHash and pHash both equal path's and that have the same dimensions."""
+        with self._lock:
+            meta = self._metas.get(str(path))
+            if meta is None or meta.phash is None:
+                return []
+            cols = self._columns
+            same = (cols["hashed"] & (cols["phash"] == np.uint64(meta.phash))
+                    & (cols["dhash"] == np.uint64(meta.dhash)) & (cols["pixels"] == meta.width * meta.height))
+            return [self._paths[i] for i in np.flatnonzero(same) if str(self._paths[i]) != str(path)]
+
+    # -------- Arrangement --------
+    def order(self, key: str = "name") -> np.ndarray:
+        """Catalog rows in ascending `key` order (computed once per content change)."""
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key {key!r}; expected one of {self.SORT_KEYS}")
+        with self._lock:
+            order = self._orders.get(key)
+            if order is None:
+                start = time.perf_counter()
+                if key == "name":
+                    order = np.array([row for _, row in self._names()], dtype=np.int64)
+                else:
+                    cols = self._columns
+                    primary = {"taken": cols["when"], "mtime": cols["mtime"], "size": cols["size"],
+                               "dimensions": cols["pixels"]}[key]
+                    # ties keep the name order
+                    names = self.order("name")
+                    order = names[np.argsort(primary[names], kind="stable")]
+                self._orders[key] = order
+                logger.debug("Sorted %d catalog entries by %s in %.1f ms", len(order), key,
+                             (time.perf_counter() - start) * 1000)
+            return order
+
+    def arrange(self, sort: Optional[str] = "name", reverse: bool = False, extensions: Optional[Sequence[str]] = None,
+                since: Optional[float] = None, until: Optional[float] = None,
+                hide_duplicates: bool = False) -> CatalogView:
+        """
+        Sorted (and optionally filtered) view; sort=None keeps the order paths were added in.
+        extensions are suffixes like ".jpg"; since/until bound the capture time (epoch
+        seconds or datetime), inclusive. hide_duplicates keeps the first image of each
+        duplicate group in this order (needs compute_hashes(); unhashed images always show).
+        """
+        with self._lock:
+            rows = np.arange(len(self._paths)) if sort is None else self.order(sort)
+            if reverse:
+                rows = rows[::-1]
+            if extensions or since is not None or until is not None:
+                cols = self._columns
+                keep = np.ones(len(self._paths), dtype=bool)
+                if extensions:
+                    wanted = {e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions}
+                    keep &= np.isin(cols["ext"], list(wanted))
+                if since is not None:
+                    keep &= cols["when"] >= _epoch(since)
+                if until is not None:
+                    keep &= cols["when"] <= _epoch(until)
+                rows = rows[keep[rows]]
+            if hide_duplicates and len(rows):
+                _, first = np.unique(self.duplicate_labels()[rows], return_index=True)
+                rows = rows[np.sort(first)]
+            return CatalogView(self, rows)
+
+    def close(self) -> None:
+        if self.store:
+            self.store.close()
+
+    # -------- Internals --------
+    def _collect(self, paths: List[Path]) -> Dict[str, ImageMeta]:
+        stats: Dict[str, os.stat_result] = {}
+        for path in paths:
+            try:
+                stats[str(path)] = os.stat(split_frame(path)[0])
+            except OSError as e:
+                logger.debug("Skipping %s: %s", path, e)
+        sigs = {k: (st.st_mtime_ns, st.st_size) for k, st in stats.items()}
+        found = {k: m for k, m in self._metas.items() if k in sigs and sigs[k] == (m.mtime_ns, m.file_size)}
+        missing = [k for k in sigs if k not in found]
+        if missing and self.store:
+            found.update(self.store.get_many({k: sigs[k] for k in missing}))
+            missing = [k for k in missing if k not in found]
+        if missing:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="catalog") as pool:
+                read = [m for m in pool.map(lambda k: read_meta(k, stats[k]), missing, chunksize=64) if m]
+            found.update((m.path, m) for m in read)
+            if self.store:
+                self.store.put_many(read)
+            logger.info("Read %d image headers in %.2f s", len(read), time.perf_counter() - start)
+        return found
+
+    def _rebuild(self) -> None:
+        metas = [self._metas[str(p)] for p in self._paths]
+        self._row = {str(p): i for i, p in enumerate(self._paths)}
+        mtime = np.array([m.mtime_ns / 1e9 for m in metas], dtype=np.float64)
+        taken = np.array([np.nan if m.taken is None else m.taken for m in metas], dtype=np.float64)
+        self._columns = {
+            "mtime": mtime,
+            "when": np.where(np.isnan(taken), mtime, taken),
+            "size": np.array([m.file_size for m in metas], dtype=np.int64),
+            "pixels": np.array([m.width * m.height for m in metas], dtype=np.int64),
+            "ext": np.array([p.suffix.lower() for p in self._paths], dtype=object),
+        }
+        self._orders.clear()
+        self._name_index = None
+        self._rebuild_hashes()
+
+    def _rebuild_hashes(self) -> None:
+        metas = [self._metas[str(p)] for p in self._paths]
+        self._columns["hashed"] = np.array([m.phash is not None for m in metas], dtype=bool)
+        self._columns["dhash"] = np.array([m.dhash or 0 for m in metas], dtype=np.uint64)
+        self._columns["phash"] = np.array([m.phash or 0 for m in metas], dtype=np.uint64)
+        self._clusters.clear()
+
+    def _names(self) -> List[Tuple[tuple, int]]:
+        # (natural key of the file name, full path, row), sorted; shared by name order and lookups
+        if self._name_index is None:
+            keyed = sorted((natural_key(p.name), str(p), i) for i, p in enumerate(self._paths))
+            self._name_index = [(k, row) for k, _, row in keyed]
+        return self._name_index
+
+    def _rows_named(self, name: str) -> List[int]:
+        with self._lock:
+            index = self._names()
+            key = natural_key(name)
+            rows = []
+            i = bisect_left(index, (key,))
+            while i < len(index) and index[i][0] == key:
+                rows.append(index[i][1])
+                i += 1
+            return rows
+
+
+def _epoch(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
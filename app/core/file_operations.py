@@ -1,21 +1,55 @@
+import hashlib
+import os
+import re
+import threading
+import time
 from pathlib import Path
-from typing import Iterable , List
+from typing import Iterable , Iterator , List, Tuple
+from app.utils.config import config
 from app.utils.log_manager import get_logger
+from app.utils.metrics import timed
 from app.utils.exceptions import FileLoadError,NoImageFilesFoundError,InvalidFolderError
 
 logger = get_logger("FileOps")
 
+# content_signature memo: (path, mtime_ns, size) -> digest
+_signature_memo = {}
+_signature_lock = threading.Lock()
+_SIGNATURE_MEMO_MAX = 100_000
+
+# -------- Frame addressing --------
+# Page N (N > 0) of a multi-frame file is addressed as "<file>#N"; page 0 is the file itself,
+# so single-frame code paths and cache keys are unchanged.
+_FRAME_RE = re.compile(r"^(.*)#(\d+)$")
+
+
+def frame_path(path, frame: int) -> Path:
+    return Path(path) if frame == 0 else Path(f"{path}#{frame}")
+
+
+def split_frame(path) -> Tuple[str, int]:
+    """(file on disk, frame index) for a path that may carry a "#N" frame suffix."""
+    key = str(path)
+    match = _FRAME_RE.match(key)
+    if match is None or Path(match.group(1)).suffix.lower() not in config.MULTI_FRAME_EXTENSIONS:
+        return key, 0
+    if os.path.exists(key):  # a file really named like that
+        return key, 0
+    return match.group(1), int(match.group(2))
+
+
 class FileHelper:
     """
     LightWeight helper for file validation and common FS tasks
-    
+
     Responsiblities:
     - Validate folders and file paths
     - Provide safe path resolution
+    - Stream folder contents (os.scandir based, no full listing up front)
     - Small utility functions used by image loader and controller
     """
-    
-    VALID_IMAGE_EXT = {".png",".jpg","jpeg",".bmp",".gif","tiff"}
+
+    VALID_IMAGE_EXT = {".png",".jpg",".jpeg",".bmp",".gif",".tif",".tiff"}
 
     @staticmethod
     def is_image_file(path:Path)->bool:
@@ -23,35 +57,109 @@ class FileHelper:
             return path.suffix.lower() in FileHelper.VALID_IMAGE_EXT
         except Exception as e:
             logger.error("Image can not loaded")
-    
+
+    @staticmethod
+    def iter_files(folder:Path,recursive:bool=True) -> Iterator[Path]:
+        """
+        Yield non-hidden files under folder as they are found.
+        Uses os.scandir so file/dir checks come from the DirEntry (no extra stat per entry).
+        """
+        folder = Path(folder)
+        if not folder.is_dir():
+            logger.error("Not a directory : %s",folder)
+            raise FileLoadError(f"Not a directory :{folder}")
+        stack = [str(folder)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file():
+                                if not entry.name.startswith("."):
+                                    yield Path(entry.path)
+                            elif recursive and entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                        except OSError as e:
+                            logger.warning("Skipping %s: %s", entry.path, e)
+            except OSError as e:
+                logger.warning("Can not read directory %s: %s", current, e)
+
+    @staticmethod
+    def iter_image_files(folder:Path,recursive:bool=True) -> Iterator[Path]:
+        """Like iter_files, with the extension filter applied inline."""
+        valid = FileHelper.VALID_IMAGE_EXT
+        for path in FileHelper.iter_files(folder,recursive=recursive):
+            if os.path.splitext(path.name)[1].lower() in valid:
+                yield path
+
+    @staticmethod
+    def iter_batches(items:Iterable[Path],batch_size:int=256,max_delay:float=0.25,first_batch:int=1) -> Iterator[List[Path]]:
+        """
+        Group a stream into lists. The first batch holds `first_batch` items so a
+        consumer can react to the very first hit; later batches are flushed when
+        full or when `max_delay` seconds passed since the last flush (slow shares).
+        """
+        batch: List[Path] = []
+        limit = max(1, first_batch)
+        last_flush = time.monotonic()
+        for item in items:
+            batch.append(item)
+            if len(batch) >= limit or time.monotonic() - last_flush >= max_delay:
+                yield batch
+                batch = []
+                limit = batch_size
+                last_flush = time.monotonic()
+        if batch:
+            yield batch
+
     @staticmethod
-    def list_files(folder:Path,recursive:bool=-True) -> List[Path]:
+    @timed("list_files")
+    def list_files(folder:Path,recursive:bool=True) -> List[Path]:
         """
         Return list of files inside the folders and filters out hidden files
         """
         try:
-            folder = Path(folder)
-            if not folder.is_dir():
-                logger.error("Not a directory : %s",folder)
-                raise FileLoadError("Not a directory :{folder}")
-            if recursive:
-                files = [p for p in folder.rglob("*") if p.is_file()]
-            else:
-                files = [p for p in folder.iterdir() if p.is_file()]
-                
-            #filter hidden and system files
-            files = [p for p in files if not p.name.startswith(".")]
+            files = list(FileHelper.iter_files(folder,recursive=recursive))
             logger.debug("Found %d files in %s (recursive=%s)", len(files), folder, recursive)
             return files
         except InvalidFolderError as e:
-            logger.error("Can not load the files in the folder: ",e.details)
-    
+            logger.error("Can not load the files in the folder: %s",e.details)
+
+    @staticmethod
+    def content_signature(path:Path) -> str:
+        """
+        BLAKE2b digest of the file contents (hex). Identical bytes give the same
+        signature whatever the file is called; results are memoized per
+        (path, mtime, size) so repeat calls cost a single stat. A page of a multi-page
+        file ("<file>#N") hashes the file plus its page number.
+        """
+        real, frame = split_frame(path)
+        st = os.stat(real)
+        memo_key = (str(path), st.st_mtime_ns, st.st_size)
+        with _signature_lock:
+            digest = _signature_memo.get(memo_key)
+        if digest is not None:
+            return digest
+        h = hashlib.blake2b(digest_size=16)
+        with open(real, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        if frame:
+            h.update(f"#{frame}".encode())
+        digest = h.hexdigest()
+        with _signature_lock:
+            if len(_signature_memo) >= _SIGNATURE_MEMO_MAX:
+                _signature_memo.clear()
+            _signature_memo[memo_key] = digest
+        return digest
+
     @staticmethod
     def ensure_dir(path:Path) -> Path:
         path = Path(path)
         path.mkdir(parents=True,exist_ok=True)
         return path
-    
+
     @staticmethod
     def resolve_path(pathlike) -> Path:
-        return Path(pathlike).expanduser().resolve()
\ No newline at end of file
+        return Path(pathlike).expanduser().resolve()
@@ -0,0 +1,362 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.file_operations import FileHelper
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("FolderWatch")
+
+
+class FolderChange:
+    """One change under a watched folder. kind: added, removed, modified, renamed, or rescan."""
+
+    __slots__ = ("kind", "path", "old_path")
+
+    def __init__(self, kind: str, path: Optional[Path] = None, old_path: Optional[Path] = None):
+        self.kind = kind
+        self.path = path
+        self.old_path = old_path
+
+    def __repr__(self) -> str:
+        if self.kind == "renamed":
+            return f"FolderChange(renamed, {self.old_path} -> {self.path})"
+        return f"FolderChange({self.kind}, {self.path})"
+
+
+def _is_image(path: Path) -> bool:
+    return not path.name.startswith(".") and bool(FileHelper.is_image_file(path))
+
+
+class FolderWatcher:
+    """
+    Reports image files added, removed, rewritten or renamed under a folder.
+
+    - Runs on its own daemon thread; on_changes(changes) is called from it with a batch
+      of FolderChange, at most every `debounce` seconds
+    - Only image files (FileHelper.VALID_IMAGE_EXT, not hidden) are reported; renaming a
+      temporary name to an image name is an add, the reverse a remove
+    - A "rescan" change means events were lost (kernel queue overflow): the consumer
+      should diff the folder against what it has
+    """
+
+    def __init__(self, folder, recursive: bool = True, debounce: Optional[float] = None):
+        self.folder = Path(folder)
+        self.recursive = recursive
+        self.debounce = config.WATCH_DEBOUNCE_MS / 1000.0 if debounce is None else debounce
+        self.on_changes: Optional[Callable[[List[FolderChange]], None]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FolderWatcher":
+        self._thread = threading.Thread(target=self._run, name=f"watch-{self.folder.name}", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s (%s)", self.folder, type(self).__name__)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        raise NotImplementedError
+
+    def _deliver(self, changes: List[FolderChange]) -> None:
+        changes = [c for c in changes if c.kind == "rescan" or _is_image(c.path)
+                   or (c.kind == "renamed" and _is_image(c.old_path))]
+        # a rename between an image name and a non-image name is a remove or an add
+        fixed = []
+        for c in changes:
+            if c.kind == "renamed" and not _is_image(c.path):
+                fixed.append(FolderChange("removed", c.old_path))
+            elif c.kind == "renamed" and not _is_image(c.old_path):
+                fixed.append(FolderChange("added", c.path))
+            else:
+                fixed.append(c)
+        if fixed and self.on_changes:
+            logger.debug("Folder changes: %s", fixed)
+            try:
+                self.on_changes(fixed)
+            except Exception as e:
+                logger.exception("Folder change handler failed: %s", e)
+
+
+# -------- inotify (Linux) --------
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def _libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyWatcher(FolderWatcher):
+    """
+    inotify through ctypes (no extra dependency). New files are reported on
+    IN_CLOSE_WRITE, so a scanner still writing a page is not picked up half-done;
+    IN_MOVED_FROM/IN_MOVED_TO pairs with the same cookie become renames.
+    """
+
+    def __init__(self, folder, recursive: bool = True, debounce: Optional[float] = None):
+        super().__init__(folder, recursive, debounce)
+        self._libc = _libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(str(self.folder))
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            logger.warning("Cannot watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+            return
+        self._dirs[wd] = directory
+
+    def _add_tree(self, top: str) -> List[str]:
+        """Watch top (and its subdirectories if recursive). Returns image files already there."""
+        self._add_watch(top)
+        found = []
+        if not self.recursive:
+            return found
+        for root, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            if root != top:
+                self._add_watch(root)
+                found.extend(os.path.join(root, f) for f in files)
+        return found
+
+    def _run(self) -> None:
+        created = set()  # files created but not closed yet
+        moved_from: Dict[int, Tuple[str, float]] = {}
+        changes: List[FolderChange] = []
+        last_flush = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], self.debounce)
+                if ready:
+                    try:
+                        data = os.read(self._fd, 1 << 16)
+                    except BlockingIOError:
+                        data = b""
+                    self._parse(data, created, moved_from, changes)
+                now = time.monotonic()
+                # a move whose other half never came: moved out of the watched tree
+                for cookie, (path, seen) in list(moved_from.items()):
+                    if now - seen >= self.debounce:
+                        changes.append(FolderChange("removed", Path(path)))
+                        del moved_from[cookie]
+                if changes and (not ready or now - last_flush >= self.debounce):
+                    batch, changes = changes, []
+                    last_flush = now
+                    self._deliver(batch)
+        finally:
+            os.close(self._fd)
+
+    def _parse(self, data: bytes, created: set, moved_from: Dict[int, Tuple[str, float]],
+               changes: List[FolderChange]) -> None:
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            raw = data[offset + _EVENT.size:offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changes.append(FolderChange("rescan"))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if directory == str(self.folder):
+                    logger.warning("Watched folder %s went away", directory)
+                continue
+            path = os.path.join(directory, os.fsdecode(raw.rstrip(b"\0")))
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    # files may land in a new subdirectory before its watch exists
+                    changes.extend(FolderChange("added", Path(p)) for p in self._add_tree(path))
+                    changes.extend(FolderChange("added", Path(p)) for p in self._files_in(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    changes.append(FolderChange("rescan"))
+                continue
+            if mask & IN_CREATE:
+                created.add(path)
+            elif mask & IN_CLOSE_WRITE:
+                changes.append(FolderChange("added" if path in created else "modified", Path(path)))
+                created.discard(path)
+            elif mask & IN_DELETE:
+                created.discard(path)
+                changes.append(FolderChange("removed", Path(path)))
+            elif mask & IN_MOVED_FROM:
+                moved_from[cookie] = (path, time.monotonic())
+            elif mask & IN_MOVED_TO:
+                old = moved_from.pop(cookie, None)
+                if old is None:
+                    changes.append(FolderChange("added", Path(path)))
+                else:
+                    changes.append(FolderChange("renamed", Path(path), Path(old[0])))
+
+    @staticmethod
+    def _files_in(directory: str) -> List[str]:
+        try:
+            with os.scandir(directory) as entries:
+                return [e.path for e in entries if e.is_file()]
+        except OSError:
+            return []
+
+
+# -------- Polling fallback --------
+class PollingWatcher(FolderWatcher):
+    """
+    Portable fallback: every `interval` seconds stat each known directory, and re-list
+    only those whose mtime changed, diffing names against the previous listing.
+    A new file is reported once its size and mtime held still between two polls (it may
+    still be being written before that); a remove and an add with the same size and
+    mtime in one poll are a rename. Files rewritten in place do not change their directory's mtime and
+    are not seen by this watcher.
+    """
+
+    def __init__(self, folder, recursive: bool = True, debounce: Optional[float] = None,
+                 interval: Optional[float] = None):
+        super().__init__(folder, recursive, debounce)
+        self.interval = interval or config.WATCH_POLL_SECONDS
+        self._dir_mtimes: Dict[str, int] = {}
+        self._listings: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._unsettled: Dict[str, Tuple[int, int]] = {}
+        for directory in self._walk_dirs(str(self.folder)):
+            self._snapshot(directory)
+
+    def _walk_dirs(self, top: str) -> List[str]:
+        if not self.recursive:
+            return [top]
+        out = []
+        for root, dirs, _ in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            out.append(root)
+        return out
+
+    def _list(self, directory: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+        files: Dict[str, Tuple[int, int]] = {}
+        subdirs: List[str] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        files[entry.path] = (st.st_size, st.st_mtime_ns)
+                    elif self.recursive and entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                        subdirs.append(entry.path)
+                except OSError:
+                    continue
+        return files, subdirs
+
+    def _snapshot(self, directory: str) -> None:
+        try:
+            self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+            self._listings[directory] = self._list(directory)[0]
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                changes = self._poll()
+            except Exception as e:
+                logger.warning("Polling %s failed: %s", self.folder, e)
+                continue
+            if changes:
+                self._deliver(changes)
+
+    def _poll(self) -> List[FolderChange]:
+        added: Dict[str, Tuple[int, int]] = {}
+        removed: Dict[str, Tuple[int, int]] = {}
+        for directory in list(self._dir_mtimes):
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                # directory gone: everything under it is removed
+                self._dir_mtimes.pop(directory)
+                removed.update(self._listings.pop(directory, {}))
+                continue
+            if mtime == self._dir_mtimes[directory]:
+                continue
+            self._dir_mtimes[directory] = mtime
+            files, subdirs = self._list(directory)
+            old = self._listings.get(directory, {})
+            for path in old.keys() - files.keys():
+                removed[path] = old[path]
+            for path in files.keys() - old.keys():
+                added[path] = files[path]
+            self._listings[directory] = files
+            for sub in subdirs:
+                if sub not in self._dir_mtimes:
+                    for new_dir in self._walk_dirs(sub):
+                        self._snapshot(new_dir)
+                        added.update(self._listings.get(new_dir, {}))
+
+        changes: List[FolderChange] = []
+        by_stat = {stat: path for path, stat in removed.items()}
+        for path, stat in added.items():
+            old = by_stat.pop(stat, None)
+            if old is not None:
+                # same size and mtime under a new name
+                changes.append(FolderChange("renamed", Path(path), Path(old)))
+            else:
+                self._unsettled[path] = stat  # reported once it stops changing
+        for path in by_stat.values():
+            if self._unsettled.pop(path, None) is None:  # never reported, nothing to remove
+                changes.append(FolderChange("removed", Path(path)))
+
+        for path, stat in list(self._unsettled.items()):
+            if path in added:
+                continue  # first seen in this poll
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._unsettled.pop(path)
+                continue
+            now = (st.st_size, st.st_mtime_ns)
+            if now == stat:
+                self._unsettled.pop(path)
+                changes.append(FolderChange("added", Path(path)))
+            else:
+                self._unsettled[path] = now  # still being written
+        return changes
+
+
+def create_watcher(folder, recursive: bool = True, mode: Optional[str] = None) -> FolderWatcher:
+    """inotify on Linux when available (mode "auto"/"inotify"), else polling."""
+    mode = mode or config.WATCH_MODE
+    if mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder, recursive)
+        except (OSError, AttributeError) as e:
+            if mode == "inotify":
+                raise
+            logger.info("inotify unavailable (%s); polling %s instead", e, folder)
+    return PollingWatcher(folder, recursive)
@@ -1,20 +1,139 @@
 import threading
+from collections import OrderedDict
 from PIL import Image
-from typing import Optional
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger("ImageCache")
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Approximate decoded size of an image in bytes (width x height x bands)."""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
 
 class ImageCache:
-    "Algorithm for caching the data"
-    _instance = None
-    _lock = threading.Lock()
-    _cache : dict[str , Image.Image] = {}
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(ImageCache , cls).__new__(cls)
-        return cls._instance
-    def get(self,path: str) -> Optional[Image.Image]:
-        return self._cache.get(path)
-    
-    def set(self,path:str,image:Image.Image) -> None:
-        self._cache[path] = image
+    """
+    Thread-safe LRU cache for decoded images, bounded by a memory budget in bytes.
+
+    - Keys are any hashable value (a path string for full decodes, tuples for renditions)
+    - Least recently used entries are evicted once the budget is exceeded
+    - Images larger than the whole budget are never stored
+    - hits / misses / evictions counters are exposed through stats(), and with a name
+      also as metrics counters (<name>_hits, <name>_misses, <name>_evictions)
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, name: Optional[str] = None):
+        max_bytes = config.IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        if max_bytes <= 0:
+            raise ValueError("ImageCache budget must be a positive number of bytes")
+        self._max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def current_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                self._count("misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        self._count("hits")
+        return entry[0]
+
+    def set(self, key: Hashable, image: Image.Image) -> bool:
+        """Store image under key. Returns False if it is too large to ever fit."""
+        nbytes = image_nbytes(image)
+        if nbytes > self._max_bytes:
+            logger.debug("Image too large for cache (%d bytes): %s", nbytes, key)
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (image, nbytes)
+            self._bytes += nbytes
+            self._evict()
+        return True
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            return True
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key satisfies predicate. Returns how many."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the memory budget, evicting immediately if it shrank."""
+        if max_bytes <= 0:
+            raise ValueError("ImageCache budget must be a positive number of bytes")
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        # caller holds the lock
+        while self._bytes > self._max_bytes and self._entries:
+            key, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+            self._count("evictions")
+            logger.debug("Evicted %s from image cache (%d bytes)", key, nbytes)
+
+    def _count(self, event: str) -> None:
+        if self.name:
+            metrics.count(f"{self.name}_{event}")
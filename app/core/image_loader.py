@@ -1,88 +1,544 @@
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Iterator, Optional
+from typing import Callable, Dict, List, Iterable, Iterator, Optional, Set, Tuple
 from PIL import Image
-from functools import lru_cache
 from app.core.file_operations import FileHelper
+from app.core.image_cache import ImageCache
+from app.core.perceptual_hash import HASH_INPUT, image_hashes
+from app.core.preview_store import PreviewStore
+from app.core.raster import MappedRaster, frame_count, frame_path, open_image
+from app.utils.config import config
 from app.utils.exceptions import FileLoadError
 from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics, timed
+
+logger = get_logger("ImageLoader")
+
+def derived_from(path) -> Callable[[object], bool]:
+    """
+    Predicate for cache keys that belong to path's file: the path itself, its pages
+    ("<file>#N"), or tuples holding either (renditions, thumbnails, tiles).
+    """
+    key = str(path)
+    prefix = key + "#"
+
+    def match(k) -> bool:
+        if isinstance(k, tuple):
+            return any(isinstance(part, str) and (part == key or part.startswith(prefix)) for part in k)
+        return isinstance(k, str) and (k == key or k.startswith(prefix))
+
+    return match
+
+
+# -------- Decode scale policy --------
+_RESAMPLE = {"lanczos": Image.LANCZOS, "bicubic": Image.BICUBIC, "bilinear": Image.BILINEAR,
+             "nearest": Image.NEAREST}
+
+
+def resample_filter() -> int:
+    """Pillow filter for final resizes (config.DECODE_RESAMPLE)."""
+    return _RESAMPLE[config.DECODE_RESAMPLE]
+
+
+def reduce_factor(size, target) -> int:
+    """Box-reduce factor to apply before resizing size down to target (1: none)."""
+    factor = min(size[0] // target[0], size[1] // target[1])
+    minimum = config.DECODE_REDUCE_MIN_FACTOR
+    return factor if minimum and factor >= max(2, minimum) else 1
 
-logger = get_logger()
 
 class ImageIterator:
     """
     Iterator over a list of image paths, Encapsulation navigation lagic
     Use next() , prev() , current() , has_next() , has_prev()
+    Multi-page files have a nested frame cursor: next()/prev() step through the pages
+    (counted lazily, when the file is reached) before moving to the next/previous file,
+    and current() returns the page's frame path ("<file>#N", page 0 is the file itself).
+    index, path_at() and goto() stay per file.
     """
-    def __init__(self,paths:List[Path]):
+    def __init__(self,paths:List[Path], frame_counter: Optional[Callable[[Path], int]] = None):
         self._path = list(paths)
         self._index = 0 if self._path else -1
+        self._frame = 0
+        self._frame_counter = frame_counter or frame_count
+        self._frame_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def extend(self, paths: Iterable[Path]) -> int:
+        """
+        Append paths (e.g. streamed from a background scan). The cursor stays where it is;
+        an empty iterator moves to the first path. Returns the new length.
+        """
+        with self._lock:
+            self._path.extend(paths)
+            if self._index < 0 and self._path:
+                self._index = 0
+            return len(self._path)
         
     def __len__(self)->int:
         return len(self._path)
     
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    def frame_count(self, idx: Optional[int] = None) -> int:
+        """Pages in the file at idx (default: current); counted once, on first use."""
+        path = self.path_at(self._index if idx is None else idx)
+        if path is None:
+            return 0
+        key = str(path)
+        count = self._frame_counts.get(key)
+        if count is None:
+            count = self._frame_counts[key] = max(1, self._frame_counter(path))
+        return count
+
     def current(self)-> Optional[Path]:
-        if 0 <= self._index < len(self._path):
-            return self._path[self._index]
+        path = self.path_at(self._index)
+        return frame_path(path, self._frame) if path is not None and self._frame else path
+    
+    def path_at(self, idx: int) -> Optional[Path]:
+        """Path at idx without moving the cursor (None when out of range)."""
+        if 0 <= idx < len(self._path):
+            return self._path[idx]
         return None
     
     def next(self) -> Optional[Path]:
-        if self.has_next():
+        if self._index >= 0 and self._frame + 1 < self.frame_count():
+            self._frame += 1
+        elif self._index < len(self._path) - 1:
             self._index += 1
+            self._frame = 0
         return self.current()
     
     def prev(self) -> Optional[Path]:
-        if self.has_prev():
+        if self._frame > 0:
+            self._frame -= 1
+        elif self._index > 0:
+            # stepping back lands on the last page of the previous file
             self._index -= 1
+            self._frame = self.frame_count() - 1
         return self.current()
     
     def has_next(self) -> bool:
-        return self._index < len(self._path) -1
+        return self._index < len(self._path) -1 or (self._index >= 0 and self._frame + 1 < self.frame_count())
     
     def has_prev(self) -> bool:
-        return self._index > 0
+        return self._index > 0 or self._frame > 0
     
-    def goto(self,idx: int) -> Optional[Path]:
-        if 0 <= idx < len(self._path):
-            self._index = idx
-            return self.current()
-        return IndexError("Index out of bounds")
+    def goto(self,idx: int, frame: int = 0) -> Optional[Path]:
+        """Move the cursor to idx (page `frame`); raises IndexError when idx is out of range."""
+        if not 0 <= idx < len(self._path):
+            raise IndexError(f"Image index {idx} out of range (0..{len(self._path) - 1})")
+        self._index = idx
+        self._frame = min(max(0, frame), self.frame_count() - 1) if frame else 0
+        return self.current()
     
     def all(self) -> List[Path]:
         return list(self._path)
+
+    def reorder(self, paths: Iterable[Path], index: Optional[int] = None) -> None:
+        """
+        Replace the list with paths (a new sort/filter of the folder). The cursor moves to
+        index, the current image's new position; -1 or None (it was filtered out) means the first.
+        The page cursor is kept only when index still holds the same file.
+        """
+        with self._lock:
+            shown = self.path_at(self._index)
+            self._path = list(paths)
+            if index is None or not (0 <= index < len(self._path)):
+                self._index = 0 if self._path else -1
+            else:
+                self._index = index
+            if shown is None or str(self.path_at(self._index)) != str(shown):
+                self._frame = 0
+
+    def remove(self, paths: Iterable[Path]) -> int:
+        """
+        Drop paths in place. The cursor stays on the same image; if that image itself
+        was removed it moves to the one that took its place. Returns how many were removed.
+        """
+        gone = {str(p) for p in paths}
+        with self._lock:
+            kept = [p for p in self._path if str(p) not in gone]
+            removed = len(self._path) - len(kept)
+            if not removed:
+                return 0
+            current = self.path_at(self._index)
+            before = sum(1 for p in self._path[:max(self._index, 0)] if str(p) in gone)
+            self._path = kept
+            self._index = min(self._index - before, len(kept) - 1) if kept else -1
+            if current is None or str(current) in gone:
+                self._frame = 0
+            for key in gone:
+                self._frame_counts.pop(key, None)
+            return removed
+
+    def rename(self, old: Path, new: Path) -> bool:
+        """Replace old with new at the same position (the cursor does not move)."""
+        with self._lock:
+            for i, p in enumerate(self._path):
+                if str(p) == str(old):
+                    self._path[i] = Path(new)
+                    count = self._frame_counts.pop(str(old), None)
+                    if count is not None:
+                        self._frame_counts[str(new)] = count
+                    return True
+            return False
+
+    def forget_frames(self, path: Path) -> None:
+        """Recount path's pages next time (the file was rewritten)."""
+        self._frame_counts.pop(str(path), None)
+        if str(self.path_at(self._index)) == str(path):
+            self._frame = 0
+
+    def __contains__(self, path) -> bool:
+        key = str(path)
+        return any(str(p) == key for p in self._path)
     
 class ImageLoader:
     """
     Facade for loading, recizing, caching images. uses FileHelper for FS operations
+    Decoded images live in a byte-bounded ImageCache that can be shared with workers;
+    renditions are also persisted in an optional on-disk PreviewStore.
     """
-    def __init__(self,max_cache: int = 64):
+    _SIZE_MEMO = 8192
+    # kept as decoded for OCR; other modes become L (grayscale ones) or RGB
+    _OCR_MODES = ("1", "L", "RGB")
+    _GRAY_MODES = ("LA", "I", "I;16", "F")
+
+    def __init__(self, cache: Optional[ImageCache] = None, max_cache_bytes: Optional[int] = None,
+                 preview_store: Optional[PreviewStore] = None):
         self._file_helper = FileHelper()
         self._iterator: Optional[ImageIterator] = None
-        self._max_cache = max_cache
+        self.cache = cache if cache is not None else ImageCache(max_cache_bytes, name="image_cache")
+        self.preview_store = preview_store
+        # source dimensions read from file headers, for aspect-preserving fits
+        self._sizes: Dict[str, Tuple[int, int]] = {}
+        # open memory maps of uncompressed files; files checked and found not mappable are
+        # remembered apart, so they are not re-opened and do not take map slots
+        self._rasters: "OrderedDict[str, MappedRaster]" = OrderedDict()
+        self._unmappable: Set[str] = set()
+        self._raster_lock = threading.Lock()
         
     def load_from_folder(self, folder: Path, recursive: bool = False) -> ImageIterator:
         folder = self._file_helper.resolve_path(folder)
-        files = self._file_helper.list_files(folder,recursive=recursive)
-        image_files = [p for p in files if self._file_helper.is_image_file(p)]
+        with metrics.span("list_images"):
+            image_files = list(self._file_helper.iter_image_files(folder,recursive=recursive))
         logger.info("loading %d images from %s",len(image_files),folder)
         self._iterator = ImageIterator(image_files)
         return self._iterator
     
+    def scan_folder(self, folder: Path, recursive: bool = False, batch_size: Optional[int] = None) -> Iterator[List[Path]]:
+        """
+        Stream image paths under folder in batches (the first batch is a single path).
+        Meant to feed a growable ImageIterator from a background thread.
+        """
+        folder = self._file_helper.resolve_path(folder)
+        images = self._file_helper.iter_image_files(folder,recursive=recursive)
+        return self._file_helper.iter_batches(images, batch_size or config.SCAN_BATCH_SIZE)
+    
+    @timed("list_images")
+    def scan_all(self, folder: Path, recursive: bool = False) -> List[Path]:
+        """Every image path under folder, in one list (for diffing against an iterator)."""
+        return list(self._file_helper.iter_image_files(self._file_helper.resolve_path(folder), recursive=recursive))
+
+    def new_iterator(self) -> ImageIterator:
+        """Start an empty iterator that a streaming scan will grow."""
+        self._iterator = ImageIterator([])
+        return self._iterator
+    
+    def load_pil_image(self, path) -> Image.Image:
+        """
+        Load image via PIL and keep the decoded RGB copy in the shared ImageCache
+        """
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        logger.debug("Loading image to memory: %s",key)
+        with metrics.span("load_pil_image"):
+            raster = self.raster(path)
+            if raster is not None:
+                # straight from the map into RGB: one copy, no intermediate native decode
+                image = raster.to_image("RGB")
+            else:
+                with open_image(key) as img:
+                    img.load()
+                    # Convert to RGB to avoid mode issues when displaying
+                    image = img if img.mode == "RGB" else img.convert("RGB")
+        self.cache.set(key, image)
+        return image
+
+    def load_ocr_image(self, path) -> Image.Image:
+        """
+        Load image for OCR at the file's native depth (a grayscale scan stays one byte per
+        pixel); RGB conversion is only for display. An already decoded RGB copy is reused,
+        otherwise the native image is cached under ("ocr", path)
+        """
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self.cache.get(("ocr", key))
+        if cached is not None:
+            return cached
+        logger.debug("Loading image for OCR: %s", key)
+        with metrics.span("load_ocr_image"):
+            raster = self.raster(path)
+            if raster is not None:
+                image = raster.to_image(raster.mode)
+            else:
+                with open_image(key) as img:
+                    img.load()
+                    image = img if img.mode in self._OCR_MODES else img.convert(
+                        "L" if img.mode in self._GRAY_MODES else "RGB")
+        self.cache.set(key if image.mode == "RGB" else ("ocr", key), image)
+        return image
+
+    def raster(self, path) -> Optional[MappedRaster]:
+        """Memory-mapped pixels of path if it is an uncompressed TIFF/BMP frame, else None."""
+        if not config.MMAP_UNCOMPRESSED:
+            return None
+        key = str(path)
+        with self._raster_lock:
+            if key in self._unmappable:
+                return None
+            if key in self._rasters:
+                self._rasters.move_to_end(key)
+                return self._rasters[key]
+        try:
+            raster = MappedRaster.open(path)
+        except Exception as e:
+            logger.debug("Not mapping %s: %s", key, e)
+            raster = None
+        with self._raster_lock:
+            if raster is None:
+                if len(self._unmappable) >= self._SIZE_MEMO:
+                    self._unmappable.clear()
+                self._unmappable.add(key)
+                return None
+            if key in self._rasters:
+                # another thread mapped it meanwhile: keep one map
+                raster.close()
+                return self._rasters[key]
+            self._rasters[key] = raster
+            while len(self._rasters) > config.MMAP_OPEN_FILES:
+                _, old = self._rasters.popitem(last=False)
+                old.close()
+        logger.debug("Mapped %s (%s %dx%d)", key, raster.mode, *raster.size)
+        return raster
+
+    def invalidate(self, path) -> int:
+        """
+        Forget everything derived from path's file (all its pages): decoded images,
+        renditions, thumbnails, header size, memory map, stored previews. Returns how many
+        in-memory entries were dropped.
+        """
+        derived = derived_from(path)
+        dropped = self.cache.invalidate_matching(derived)
+        for k in [k for k in self._sizes if derived(k)]:
+            self._sizes.pop(k, None)
+        with self._raster_lock:
+            for k in [k for k in self._rasters if derived(k)]:
+                self._rasters.pop(k).close()
+            self._unmappable -= {k for k in self._unmappable if derived(k)}
+        if self.preview_store is not None:
+            try:
+                self.preview_store.invalidate(path)
+            except Exception as e:
+                logger.warning("Could not drop stored previews of %s: %s", path, e)
+        return dropped
+
+    def close(self) -> None:
+        """Release memory maps (decoded images stay in the cache)."""
+        with self._raster_lock:
+            for raster in self._rasters.values():
+                raster.close()
+            self._rasters.clear()
+    
+    def image_size(self, path) -> Tuple[int, int]:
+        """(width, height) of path from its header (no pixel decode); memoized."""
+        key = str(path)
+        size = self._sizes.get(key)
+        if size is None:
+            full = self.cache.get(key)
+            if full is not None:
+                size = full.size
+            else:
+                with open_image(key) as img:
+                    size = img.size
+            if len(self._sizes) >= self._SIZE_MEMO:
+                self._sizes.clear()
+            self._sizes[key] = size
+        return size
+
+    @staticmethod
+    def fit_size(source: Tuple[int, int], box: Tuple[int, int], upscale: bool = False) -> Tuple[int, int]:
+        """Largest size with source's aspect ratio that fits inside box."""
+        scale = min(box[0] / source[0], box[1] / source[1])
+        if not upscale:
+            scale = min(scale, 1.0)
+        return max(1, round(source[0] * scale)), max(1, round(source[1] * scale))
+
+    @staticmethod
+    def bucket_box(box: Tuple[int, int], step: Optional[int] = None) -> Tuple[int, int]:
+        """Round a widget size down to the size grid renditions are cached on."""
+        step = step or config.DISPLAY_SIZE_BUCKET
+        return max(step, box[0] // step * step), max(step, box[1] // step * step)
+
+    def get_fitted(self, path: Path, box=None) -> Image.Image:
+        """
+        path scaled to fit inside box (aspect ratio kept, never enlarged). box is bucketed
+        first, so every widget size within one bucket shares a cached rendition.
+        """
+        box = self.bucket_box(tuple(box or config.DISPLAY_SIZE))
+        return self.get_resized(path, self.fit_size(self.image_size(path), box))
+
+    def is_fitted_cached(self, path: Path, box) -> bool:
+        key = str(path)
+        if key not in self._sizes:
+            return False
+        return self.is_resized_cached(path, self.fit_size(self._sizes[key], self.bucket_box(tuple(box))))
+
+    def get_resized(self,path:Path,size=None) -> Image.Image:
+        """
+        Return path resized to size (config.DISPLAY_SIZE by default). Renditions are cached under (path, size) so a
+        prefetched frame is served without touching the file again; the full-size
+        decode is only reused if it is already cached, never added for display.
+        Lookup order: memory cache, full decode in memory, preview store, original file.
+        """
+        size = tuple(size or config.DISPLAY_SIZE)
+        key = (str(path), size)
+        frame = self.cache.get(key)
+        if frame is not None:
+            return frame
+        rendition = PreviewStore.rendition_name(size)
+        img = self.cache.get(str(path))
+        if img is not None:
+            with metrics.span("resize"):
+                frame = img.resize(size, resample_filter())
+        else:
+            frame = self.preview_store.get(path, rendition) if self.preview_store else None
+            if frame is None:
+                raster = self.raster(path)
+                if raster is not None:
+                    with metrics.span("resize"):
+                        frame = raster.fit(size, resample_filter())
+                else:
+                    frame = self.decode_for_display(path, size)
+                self._store_preview(path, rendition, frame)
+        self.cache.set(key, frame)
+        return frame
+    
+    def get_thumbnail(self, path: Path, size=None) -> Image.Image:
+        """Aspect-preserving thumbnail that fits inside size (config.THUMBNAIL_SIZE by default)."""
+        return self.get_thumbnails([path], size)[str(path)]
+    
+    def get_thumbnails(self, paths: Iterable[Path], size=None) -> Dict[str, Image.Image]:
+        """
+        Thumbnails for many paths at once. Memory hits are free, the rest are fetched
+        from the preview store in one query, and only true misses decode the original.
+        Paths that cannot be decoded are left out of the result.
+        """
+        size = tuple(size or config.THUMBNAIL_SIZE)
+        rendition = PreviewStore.rendition_name(size, "thumb")
+        result: Dict[str, Image.Image] = {}
+        missing = []
+        for path in paths:
+            thumb = self.cache.get(("thumb", str(path), size))
+            if thumb is not None:
+                result[str(path)] = thumb
+            else:
+                missing.append(path)
+        if missing and self.preview_store:
+            for key, thumb in self.preview_store.get_many(missing, rendition).items():
+                result[key] = thumb
+                self.cache.set(("thumb", key, size), thumb)
+            missing = [p for p in missing if str(p) not in result]
+        for path in missing:
+            try:
+                raster = self.raster(path)
+                if raster is not None:
+                    thumb = raster.fit(self.fit_size(raster.size, size), resample_filter())
+                else:
+                    thumb = self.decode_thumbnail(path, size)
+            except Exception as e:
+                logger.warning("Thumbnail failed for %s: %s", path, e)
+                continue
+            self._store_preview(path, rendition, thumb)
+            self.cache.set(("thumb", str(path), size), thumb)
+            result[str(path)] = thumb
+        return result
+    
     @staticmethod
-    @lru_cache
-    def load_pil_image(path:str)-> Image.Image:
+    @timed("thumbnail")
+    def decode_thumbnail(path, size) -> Image.Image:
+        with open_image(path) as src:
+            if src.format == "JPEG" and config.DECODE_DRAFT:
+                src.draft("RGB", size)
+            src.load()
+            img = src if src.mode == "RGB" else src.convert("RGB")
+        target = ImageLoader.fit_size(img.size, size)
+        factor = reduce_factor(img.size, target)
+        if factor > 1:
+            img = img.reduce(factor)
+        return img if img.size == target else img.resize(target, resample_filter())
+    
+    def perceptual_hashes(self, path) -> Tuple[int, int]:
         """
-        Load image via PIL and cache it (path must be string for lru_cache hashing)
+        (dhash, phash) of path from a reduced decode: grayscale JPEG draft() at up to 1/8
+        scale, a box-reduce straight from the map for uncompressed files, else a full
+        decode reduced before hashing. Nothing is cached; the catalog persists the result.
         """
-        logger.debug("Loading image to memory: %s",path)
-        img = Image.open(path)
-        # Convert to RGB to avoid mode issues when displaying
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        return img
+        size = (HASH_INPUT * 2, HASH_INPUT * 2)
+        raster = self.raster(path)
+        if raster is not None:
+            # fixed filter, not DECODE_RESAMPLE: stored hashes must not depend on display settings
+            return image_hashes(raster.fit(self.fit_size(raster.size, size)))
+        with open_image(path) as src:
+            if src.format == "JPEG":
+                src.draft("L", size)
+            img = src.convert("L")
+        factor = min(img.width // size[0], img.height // size[1])
+        return image_hashes(img.reduce(factor) if factor >= 2 else img)
+
+    @staticmethod
+    def decode_for_display(path, size) -> Image.Image:
+        """
+        Decode path at the cheapest scale that still covers size, then do the final
+        resample (config.DECODE_*: by default JPEGs use draft() to decode at 1/2, 1/4 or
+        1/8 scale inside libjpeg, anything still at least twice the target is box-reduced
+        first, and LANCZOS does the rest).
+        """
+        target_w, target_h = size
+        with metrics.span("decode_display"), open_image(path) as src:
+            if src.format == "JPEG" and config.DECODE_DRAFT:
+                # draft keeps the result >= the requested size
+                src.draft("RGB", (target_w, target_h))
+            src.load()
+            img = src if src.mode == "RGB" else src.convert("RGB")
+        with metrics.span("resize"):
+            factor = reduce_factor(img.size, size)
+            if factor > 1:
+                img = img.reduce(factor)
+            return img.resize((target_w, target_h), resample_filter())
+    
+    def is_resized_cached(self, path: Path, size) -> bool:
+        return (str(path), tuple(size)) in self.cache
     
-    def get_resized(self,path:Path,size=(500,400)) -> Image.Image:
-        img = ImageLoader.load_pil_image(str(path))
-        return img.resize(size,Image.LANCZOS)
+    def _store_preview(self, path, rendition: str, image: Image.Image) -> None:
+        if self.preview_store is None:
+            return
+        try:
+            self.preview_store.put(path, rendition, image)
+        except Exception as e:
+            # the store is an accelerator only; never fail a load because of it
+            logger.warning("Could not persist preview for %s: %s", path, e)
     
     def iterator(self) -> Optional[ImageIterator]:
         return self._iterator
\ No newline at end of file
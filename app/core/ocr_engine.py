@@ -1,9 +1,13 @@
 import os
-import pytesseract
-from pytesseract import TesseractError
+import queue
+import shlex
+import shutil
+import threading
+from typing import List, Optional, Tuple
 from PIL import Image
 from app.utils.config import config
 from app.utils.log_manager import get_logger
+from app.utils.metrics import timed
 from app.utils.exceptions import (
     OCREngineNotFoundError,
     OCRExtractionError,
@@ -15,51 +19,96 @@ logger = get_logger("OCR Engine")
 # Abstract Base Class (Template for OCR Engines)
 class OCREngine:
     """Abstract base class defining OCR extraction behavior."""
+    name = "base"
+
     def extract(self, image: Image.Image) -> str:
         """Extract text from image. Must be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement 'extract' method.")
 
+    def cache_key(self) -> str:
+        """
+        Identifies everything that changes this engine's output (name, languages, options).
+        Stored OCR results are only reused when the key matches.
+        """
+        return self.name
+
+    def close(self) -> None:
+        """Release engine resources. Default: nothing to release."""
+        pass
+
+
+def resolve_tesseract_cmd() -> Optional[str]:
+    """config.TESSERACT_CMD if that file exists, else a "tesseract" found on PATH (None if neither)."""
+    if config.TESSERACT_CMD and os.path.isfile(config.TESSERACT_CMD):
+        return config.TESSERACT_CMD
+    return shutil.which(config.TESSERACT_CMD or "tesseract") or shutil.which("tesseract")
+
+
+def resolve_tessdata_dir(cmd: Optional[str] = None) -> Optional[str]:
+    """config.TESSDATA_DIR, else $TESSDATA_PREFIX, else a tessdata folder next to cmd (Windows installer)."""
+    if config.TESSDATA_DIR:
+        return config.TESSDATA_DIR
+    if os.environ.get("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    beside = os.path.join(os.path.dirname(cmd), "tessdata") if cmd else None
+    return beside if beside and os.path.isdir(beside) else None
+
 # Concrete Implementation using Tesseract OCR
 class TesseractOCR(OCREngine):
     """
     Tesseract OCR Engine wrapper.
     Implements exception handling and configuration setup.
     """
+    name = "tesseract"
 
     def __init__(self):
         # Ensure Tesseract binary exists
-        if not os.path.exists(config.TESSERACT_CMD):
-            logger.error("Tesseract executable not found at configured path.")
+        cmd = resolve_tesseract_cmd()
+        if cmd is None:
+            logger.error("Tesseract executable not found at the configured path or on PATH.")
             raise OCREngineNotFoundError(
-                f"Tesseract not found at: {config.TESSERACT_CMD}"
+                f"Tesseract not found at: {config.TESSERACT_CMD} (nor on PATH)"
             )
+        try:
+            import pytesseract
+        except ImportError as e:
+            logger.error("pytesseract is not installed.")
+            raise OCREngineNotFoundError(f"pytesseract is not available: {e}")
+        self._pytesseract = pytesseract
 
-        # Assign path for pytesseract
-        pytesseract.pytesseract.tesseract_cmd = config.TESSERACT_CMD
-        os.environ["TESSDATA_PREFIX"] = r"C:\Program Files\Tesseract-OCR\tessdata"
-        logger.debug(f"Tesseract command set to: {config.TESSERACT_CMD}")
+        # Assign path for pytesseract; the tesseract subprocess finds traineddata through
+        # TESSDATA_PREFIX, which is only ever set to a configured or discovered folder
+        pytesseract.pytesseract.tesseract_cmd = cmd
+        tessdata = resolve_tessdata_dir(cmd)
+        if tessdata:
+            os.environ["TESSDATA_PREFIX"] = tessdata
+        logger.debug(f"Tesseract command set to: {cmd} (tessdata: {tessdata or 'built-in default'})")
 
+    def cache_key(self) -> str:
+        return f"{self.name}|{config.OCR_LANG}|{config.ENGINE_CONFIG}"
+
+    @timed("ocr_extract")
     def extract(self, image: Image.Image) -> str:
         """
         Extract text from an image using Tesseract OCR.
         Handles all relevant OCR-specific exceptions.
         """
         try:
-            text = pytesseract.image_to_string(
+            text = self._pytesseract.image_to_string(
                 image,
-                lang="eng+fas",
-                config=str(config.ENGINE_CONFIG)
+                lang=config.OCR_LANG,
+                config=config.ENGINE_CONFIG
             )
             if not text.strip():
                 logger.warning("No text found in the provided image.")
             logger.info("OCR extraction completed successfully.")
             return text
 
-        except pytesseract.TesseractNotFoundError as e:
+        except self._pytesseract.TesseractNotFoundError as e:
             logger.exception("Tesseract engine not found.")
             raise OCREngineNotFoundError(str(e))
 
-        except pytesseract.TesseractError as e:
+        except self._pytesseract.TesseractError as e:
             # Handle extraction failure
             logger.exception("OCR extraction failed.")
             raise OCRExtractionError(f"OCR extraction error: {e}")
@@ -69,6 +118,178 @@ class TesseractOCR(OCREngine):
             logger.exception("Unexpected error during OCR extraction.")
             raise OCRExtractionError(f"Unexpected error: {e}")
 
+# Warm Tesseract through the C API (tesserocr)
+def tesseract_variables(options: str) -> List[Tuple[str, str]]:
+    """
+    (name, value) tesseract variables for a command-line option string such as
+    OCR_EXTRA_OPTIONS: "-c name=value" (or "-cname=value") and "--dpi N". Other options
+    have no C-API equivalent and are skipped with a warning.
+    """
+    variables = []
+    args = shlex.split(options or "")
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-c" and i + 1 < len(args):
+            arg, i = "-c" + args[i + 1], i + 1
+        if arg.startswith("-c") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            variables.append((name, value))
+        elif arg == "--dpi" and i + 1 < len(args):
+            variables.append(("user_defined_dpi", args[i + 1]))
+            i += 1
+        else:
+            logger.warning("Tesseract option %r is not supported by tesserocr; ignored", arg)
+        i += 1
+    return variables
+
+
+class TesserocrOCR(OCREngine):
+    """
+    Tesseract through the tesserocr C-API bindings.
+    Keeps a pool of initialized PyTessBaseAPI handles, so traineddata is loaded once per
+    handle instead of once per call, and images are handed over in memory (no temp files,
+    no subprocess). tesserocr releases the GIL while recognizing, so up to `pool_size`
+    threads OCR in parallel. The first handle is created eagerly to fail fast; the rest
+    on demand.
+    Handles are built from the settings captured at creation (language, psm, oem,
+    OCR_EXTRA_OPTIONS via SetVariable, tessdata); when the config changes, the pool is
+    rebuilt on the next call and cache_key() follows the captured settings.
+    """
+    name = "tesserocr"
+
+    def __init__(self, pool_size: int = None):
+        try:
+            import tesserocr
+        except ImportError as e:
+            logger.error("tesserocr is not installed.")
+            raise OCREngineNotFoundError(f"tesserocr is not available: {e}")
+        self._tesserocr = tesserocr
+        self._settings = self._current_settings()
+        self._generation = 0
+        self._pool_size = max(1, pool_size or config.OCR_API_POOL_SIZE)
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 1
+        self._lock = threading.Lock()
+        self._all = []
+        self._idle.put(self._new_api(self._settings, self._generation))
+
+    @staticmethod
+    def _current_settings() -> Tuple[str, int, int, str, Optional[str]]:
+        return config.OCR_LANG, config.OCR_PSM, config.OCR_OEM, config.OCR_EXTRA_OPTIONS, config.TESSDATA_DIR
+
+    def cache_key(self) -> str:
+        self._sync()
+        lang, psm, oem, extra, _ = self._settings
+        return f"{self.name}|{lang}|" + f"--psm {psm} --oem {oem} {extra}".strip()
+
+    def _sync(self) -> None:
+        """Retire every handle if the OCR settings changed since they were built."""
+        current = self._current_settings()
+        if current == self._settings:
+            return
+        stale = []
+        with self._lock:
+            if current == self._settings:
+                return
+            self._settings = current
+            self._generation += 1
+            # handles in use are ended when they come back (they are no longer in _all)
+            self._all, self._created = [], 0
+            while True:
+                try:
+                    stale.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for api in stale:
+            api.End()
+        logger.info("OCR settings changed; tesseract API handles will be rebuilt")
+
+    def _new_api(self, settings, generation: int):
+        lang, psm, oem, extra, _ = settings
+        kwargs = {"lang": lang, "psm": psm, "oem": oem}
+        tessdata = resolve_tessdata_dir(resolve_tesseract_cmd())
+        if tessdata:
+            kwargs["path"] = tessdata
+        try:
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+        except RuntimeError as e:
+            logger.exception("Failed to initialize tesseract API.")
+            raise OCRLanguageNotSupportedError(f"Could not load '{lang}': {e}")
+        for name, value in tesseract_variables(extra):
+            if not api.SetVariable(name, value):
+                logger.warning("Unknown tesseract variable %r; ignored", name)
+        with self._lock:
+            # a handle built for settings that changed meanwhile serves one call, then is ended
+            if generation == self._generation:
+                self._all.append(api)
+        logger.debug("Initialized tesseract API handle %d/%d", len(self._all), self._pool_size)
+        return api
+
+    def _acquire(self):
+        self._sync()
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                # reserve the slot under the lock so concurrent callers never over-create
+                grow = self._created < self._pool_size
+                if grow:
+                    self._created += 1
+                settings, generation = self._settings, self._generation
+            if grow:
+                try:
+                    return self._new_api(settings, generation)
+                except Exception:
+                    with self._lock:
+                        if generation == self._generation:
+                            self._created -= 1
+                    raise
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue  # the pool may have been rebuilt meanwhile: look again
+
+    def _release(self, api) -> None:
+        with self._lock:
+            current = any(api is a for a in self._all)
+            if current:
+                self._idle.put(api)
+        if not current:
+            api.End()
+
+    @timed("ocr_extract")
+    def extract(self, image: Image.Image) -> str:
+        api = self._acquire()
+        try:
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+            if not text.strip():
+                logger.warning("No text found in the provided image.")
+            return text
+        except Exception as e:
+            logger.exception("Unexpected error during OCR extraction.")
+            raise OCRExtractionError(f"Unexpected error: {e}")
+        finally:
+            api.Clear()
+            self._release(api)
+
+    def close(self) -> None:
+        # idle handles end now, handles in use when they are released
+        idle = []
+        with self._lock:
+            self._all = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for api in idle:
+            api.End()
+
+
 # Factory Method for Engine Creation
 class OCREngineFactory:
     """Factory for creating OCR engine instances."""
@@ -79,6 +300,9 @@ class OCREngineFactory:
         if engine_type == "tesseract":
             logger.debug("Creating Tesseract OCR engine instance.")
             return TesseractOCR()
+        elif engine_type == "tesserocr":
+            logger.debug("Creating tesserocr (warm API pool) engine instance.")
+            return TesserocrOCR()
         else:
             logger.error(f"Unsupported OCR engine type requested: {engine_type}")
             raise ValueError(f"Unsupported OCR engine type: {engine_type}")
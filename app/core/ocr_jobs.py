@@ -0,0 +1,235 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from enum import IntEnum
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger("OCRJobs")
+
+
+class Priority(IntEnum):
+    """Lower runs first."""
+    INTERACTIVE = 0  # the image on screen
+    PREFETCH = 1     # neighbours the user is likely to reach next
+    BACKGROUND = 2   # bulk work nobody is waiting for
+
+
+class OCRJob:
+    def __init__(self, key: Hashable, fn: Callable[[], Any], priority: int, timeout: Optional[float]):
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.timeout = timeout
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self.callbacks: List[Callable[[Future], None]] = []
+
+
+class OCRJobScheduler:
+    """
+    Bounded pool of OCR worker threads fed from a priority queue.
+
+    - submit() returns a concurrent.futures.Future; the same key while a job is queued or
+      running returns the existing future (raising its priority if the new request is
+      more urgent) instead of doing the work twice
+    - cancel() drops queued jobs; a running job cannot be interrupted, so its future is
+      cancelled for its waiters and the result is discarded when it finishes
+    - a job not finished within its timeout of starting fails with TimeoutError and is
+      abandoned the same way as a cancelled one; time spent queued does not count, and
+      one reaper thread watches every deadline
+    - one worker is kept for INTERACTIVE jobs: prefetch/background work never occupies
+      every thread, so the image on screen does not queue behind speculative OCR
+    - on_done callbacks run on the thread that settles the job (a worker, the reaper or
+      a canceller); callers publish to the controller's EventBus from there
+    """
+
+    def __init__(self, workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.workers = max(1, workers or config.OCR_JOB_WORKERS)
+        self.default_timeout = config.OCR_JOB_TIMEOUT if default_timeout is None else default_timeout
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._jobs: Dict[Hashable, OCRJob] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._background_running = 0
+        self._background_limit = max(1, self.workers - 1)
+        # (deadline, seq, job) of running jobs; a separate condition so arming a deadline
+        # never steals a wake-up meant for a worker
+        self._deadlines: List = []
+        self._deadline_cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"ocr-job-{i}", daemon=True) for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._reap, name="ocr-job-reaper", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    # -------- Submission --------
+    def submit(self, key: Hashable, fn: Callable[[], Any], priority: int = Priority.INTERACTIVE,
+               timeout: Optional[float] = None,
+               on_done: Optional[Callable[[Future], None]] = None) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OCR job scheduler is shut down")
+            job = self._jobs.get(key)
+            if job is not None and not job.future.done():
+                if on_done:
+                    job.callbacks.append(on_done)
+                if priority < job.priority and job.started is None:
+                    # re-queue at the new priority; the old heap entry is skipped when popped
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                    self._cond.notify()
+                return job.future
+
+            job = OCRJob(key, fn, priority, self.default_timeout if timeout is None else timeout)
+            if on_done:
+                job.callbacks.append(on_done)
+            self._jobs[key] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._cond.notify()
+        job.future.add_done_callback(lambda f, j=job: self._finished(j))
+        return job.future
+
+    def cancel(self, predicate: Optional[Callable[[OCRJob], bool]] = None) -> int:
+        """Cancel every unfinished job (or those matching predicate). Returns how many."""
+        with self._cond:
+            jobs = [j for j in self._jobs.values() if not j.future.done() and (predicate is None or predicate(j))]
+        for job in jobs:
+            self._abandon(job, CancelledError())
+        if jobs:
+            logger.debug("Cancelled %d OCR jobs", len(jobs))
+        return len(jobs)
+
+    def has_pending(self, max_priority: int = Priority.INTERACTIVE) -> bool:
+        """True while any job at max_priority or more urgent is queued or running."""
+        with self._cond:
+            return any(j.priority <= max_priority and not j.future.done() for j in self._jobs.values())
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        with self._deadline_cond:
+            self._deadline_cond.notify_all()
+        self.cancel()
+
+    def pending(self) -> int:
+        """Jobs queued and not started yet."""
+        with self._cond:
+            return sum(1 for job in self._jobs.values() if job.started is None)
+
+    # -------- Internals --------
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    while not self._closed and not self._runnable():
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    priority, _, candidate = heapq.heappop(self._heap)
+                    # stale entry from a priority bump, or cancelled while queued
+                    if candidate.priority == priority and candidate.started is None and not candidate.future.done():
+                        job = candidate
+                job.started = time.monotonic()
+                metrics.observe("ocr_queue_wait", job.started - job.submitted)
+                background = job.priority > Priority.INTERACTIVE
+                if background:
+                    self._background_running += 1
+            try:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                if job.timeout:
+                    self._arm(job)
+                try:
+                    result = job.fn()
+                except BaseException as e:
+                    self._settle(job, exception=e)
+                else:
+                    self._settle(job, result=result)
+                ran = time.monotonic() - job.started
+                metrics.observe("ocr_job", ran)
+                logger.debug("OCR job %s (priority %d) waited %.0f ms, ran %.0f ms", job.key, job.priority,
+                             (job.started - job.submitted) * 1000, ran * 1000)
+            finally:
+                if background:
+                    with self._cond:
+                        self._background_running -= 1
+                        self._cond.notify_all()
+
+    def _arm(self, job: OCRJob) -> None:
+        with self._deadline_cond:
+            deadline = (job.started + job.timeout, next(self._seq), job)
+            heapq.heappush(self._deadlines, deadline)
+            if self._deadlines[0] is deadline:
+                self._deadline_cond.notify()
+
+    def _reap(self) -> None:
+        while True:
+            with self._deadline_cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    if self._deadlines and self._deadlines[0][0] <= now:
+                        break
+                    self._deadline_cond.wait(self._deadlines[0][0] - now if self._deadlines else None)
+                # finished jobs stay in the heap until their deadline; _expire skips them
+                _, _, job = heapq.heappop(self._deadlines)
+            self._expire(job)
+
+    def _runnable(self) -> bool:
+        # caller holds the lock
+        if not self._heap:
+            return False
+        return self._heap[0][0] == Priority.INTERACTIVE or self._background_running < self._background_limit
+
+    def _settle(self, job: OCRJob, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        try:
+            if exception is not None:
+                job.future.set_exception(exception)
+            else:
+                job.future.set_result(result)
+        except InvalidStateError:
+            # cancelled or timed out while running: nobody is waiting for this result any more
+            logger.debug("Discarded result of abandoned OCR job %s", job.key)
+
+    def _abandon(self, job: OCRJob, reason: BaseException) -> None:
+        if job.future.cancel():
+            return
+        # already running: fail the future for its waiters; the worker's result is discarded
+        try:
+            if isinstance(reason, CancelledError):
+                job.future.set_exception(CancelledError(f"OCR job {job.key!r} cancelled"))
+            else:
+                job.future.set_exception(reason)
+        except InvalidStateError:
+            pass
+
+    def _expire(self, job: OCRJob) -> None:
+        if not job.future.done():
+            logger.warning("OCR job %s timed out after %g s", job.key, job.timeout)
+            self._abandon(job, TimeoutError(f"OCR did not finish within {job.timeout:g} s"))
+
+    def _finished(self, job: OCRJob) -> None:
+        with self._cond:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            callbacks, job.callbacks = job.callbacks, []
+        for callback in callbacks:
+            self._run_callback(callback, job.future)
+
+    @staticmethod
+    def _run_callback(callback: Callable[[Future], None], future: Future) -> None:
+        try:
+            callback(future)
+        except Exception as e:
+            logger.exception("OCR job callback failed: %s", e)
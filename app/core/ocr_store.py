@@ -0,0 +1,205 @@
+import csv
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from app.core.file_operations import FileHelper
+from app.core.text_index import SearchHit, TextIndex
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger("OCRStore")
+
+
+class OCRResultStore:
+    """
+    Persistent OCR results (SQLite), keyed by image content signature + engine key.
+
+    - The engine key (result_key()) folds in engine name, languages, ENGINE_CONFIG,
+      the preprocessing and the region-splitting settings, so changing any of them
+      turns old rows into misses
+    - purge_stale() deletes rows written under other engine keys
+    - A small in-memory LRU in front of SQLite makes repeat lookups microseconds
+    - export() dumps every row as JSON lines or CSV
+    - Every written result is also added to a full-text TextIndex in the same database
+      (OCR_SEARCH_ENABLED); search() queries it
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ocr_results (
+            signature TEXT NOT NULL,
+            engine_key TEXT NOT NULL,
+            path TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created REAL NOT NULL,
+            PRIMARY KEY (signature, engine_key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ocr_results_path ON ocr_results(path);
+    """
+    _MEMORY_ENTRIES = 4096
+
+    def __init__(self, db_path=None, readonly: bool = False):
+        self.db_path = Path(db_path or config.OCR_STORE_PATH).expanduser()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        if readonly:
+            uri = f"file:{self.db_path}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self._SCHEMA)
+        # read-only handles (batch workers) only look results up
+        self.index = TextIndex(self._conn) if config.OCR_SEARCH_ENABLED and not readonly else None
+
+    @staticmethod
+    def result_key(*parts) -> str:
+        """Key for results produced by an engine plus its pipeline (preprocessor, region splitter)."""
+        return "|".join(p.cache_key() for p in parts if p is not None)
+
+    # -------- Lookup --------
+    def get(self, signature: str, engine_key: str) -> Optional[str]:
+        key = (signature, engine_key)
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+            row = self._conn.execute(
+                "SELECT text FROM ocr_results WHERE signature = ? AND engine_key = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def lookup(self, path, engine_key: str) -> Optional[str]:
+        """get() by file path; the content signature is computed (and memoized) on the way."""
+        try:
+            signature = FileHelper.content_signature(path)
+        except OSError:
+            return None
+        text = self.get(signature, engine_key)
+        metrics.count("ocr_store_misses" if text is None else "ocr_store_hits")
+        if text is not None:
+            # same content OCR'd under another path (a copy, a rename): searchable here too
+            self.index_result(path, signature, engine_key, text)
+        return text
+
+    def search(self, query: str, limit: int = 100) -> List[SearchHit]:
+        """Stored results whose text contains every word of query, best first (empty without an index)."""
+        if self.index is None:
+            return []
+        with self._lock:
+            return self.index.search(query, limit)
+
+    # -------- Update --------
+    def put(self, signature: str, engine_key: str, path, text: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results (signature, engine_key, path, text, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (signature, engine_key, str(path), text, time.time()),
+                )
+                if self.index is not None:
+                    self.index.add(path, signature, engine_key, text)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._remember((signature, engine_key), text)
+
+    def index_result(self, path, signature: str, engine_key: str, text: str) -> None:
+        """Make a result that is already stored (under any path) searchable under path."""
+        if self.index is not None:
+            with self._lock:
+                self.index.add(path, signature, engine_key, text, replace=False)
+
+    def store(self, path, engine_key: str, text: str) -> None:
+        self.put(FileHelper.content_signature(path), engine_key, path, text)
+
+    def invalidate(self, path=None, signature: Optional[str] = None) -> int:
+        """
+        Drop results for a file path (and its pages, "<path>#N") and/or a content
+        signature. Returns rows removed.
+        """
+        clauses, params = [], []
+        if path is not None:
+            clauses.append("path = ? OR substr(path, 1, ?) = ?")
+            params.extend((str(path), len(str(path)) + 1, f"{path}#"))
+        if signature is not None:
+            clauses.append("signature = ?")
+            params.append(signature)
+        if not clauses:
+            return 0
+        with self._lock:
+            removed = self._conn.execute(
+                f"DELETE FROM ocr_results WHERE {' OR '.join(clauses)}", params
+            ).rowcount
+            if self.index is not None:
+                self.index.remove_where(' OR '.join(clauses), params)
+            self._memory.clear()
+        return removed
+
+    def purge_stale(self, engine_key: str) -> int:
+        """Delete every result produced with a different engine configuration."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM ocr_results WHERE engine_key != ?", (engine_key,)
+            ).rowcount
+            if self.index is not None:
+                self.index.remove_where("engine_key != ?", (engine_key,))
+            self._memory.clear()
+        if removed:
+            logger.info("Purged %d OCR results from other engine configurations", removed)
+        return removed
+
+    # -------- Export --------
+    def iter_rows(self, engine_key: Optional[str] = None) -> Iterator[dict]:
+        query = "SELECT path, signature, engine_key, text, created FROM ocr_results"
+        params: tuple = ()
+        if engine_key is not None:
+            query += " WHERE engine_key = ?"
+            params = (engine_key,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY path", params).fetchall()
+        for path, signature, key, text, created in rows:
+            yield {"path": path, "signature": signature, "engine_key": key, "text": text, "created": created}
+
+    def export(self, out_path, fmt: str = "jsonl", engine_key: Optional[str] = None) -> int:
+        """Write all (or one engine's) results to out_path as 'jsonl' or 'csv'. Returns row count."""
+        count = 0
+        with open(out_path, "w", encoding="utf-8", newline="") as fh:
+            if fmt == "csv":
+                writer = csv.DictWriter(fh, fieldnames=["path", "signature", "engine_key", "text", "created"])
+                writer.writeheader()
+                for row in self.iter_rows(engine_key):
+                    writer.writerow(row)
+                    count += 1
+            elif fmt == "jsonl":
+                for row in self.iter_rows(engine_key):
+                    fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    count += 1
+            else:
+                raise ValueError(f"Unsupported export format: {fmt}")
+        logger.info("Exported %d OCR results to %s", count, out_path)
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key: Tuple[str, str], text: str) -> None:
+        # caller holds the lock
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
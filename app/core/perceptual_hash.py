@@ -0,0 +1,158 @@
+import time
+from typing import List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from app.utils.log_manager import get_logger
+
+logger = get_logger("PerceptualHash")
+
+HASH_INPUT = 32  # hashes are computed from a 32x32 grayscale reduction
+_MASK64 = (1 << 64) - 1
+
+
+# -------- Hashes --------
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+_DCT = _dct_matrix(HASH_INPUT)
+
+
+def _pack(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def dhash(gray: Image.Image) -> int:
+    """64-bit difference hash: is each pixel of a 9x8 reduction brighter than its right neighbour."""
+    px = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return _pack(px[:, 1:] > px[:, :-1])
+
+
+def phash(gray: Image.Image) -> int:
+    """64-bit DCT hash: low 8x8 frequencies of a 32x32 reduction above their median (DC left out)."""
+    px = np.asarray(gray.resize((HASH_INPUT, HASH_INPUT), Image.BILINEAR), dtype=np.float64)
+    low = (_DCT @ px @ _DCT.T)[:8, :8]
+    return _pack(low > np.median(low.ravel()[1:]))
+
+
+def image_hashes(img: Image.Image) -> Tuple[int, int]:
+    """(dhash, phash) of an image; pass a small decode (a few times 32 px), the hashes need no more."""
+    gray = img if img.mode == "L" else img.convert("L")
+    return dhash(gray), phash(gray)
+
+
+def to_signed(h: Optional[int]) -> Optional[int]:
+    """uint64 hash -> int64 for SQLite INTEGER columns (and back with to_unsigned)."""
+    return None if h is None else (h - (1 << 64) if h >= 1 << 63 else h)
+
+
+def to_unsigned(h: Optional[int]) -> Optional[int]:
+    return None if h is None else h & _MASK64
+
+
+# -------- Hamming search --------
+if hasattr(np, "bitwise_count"):
+    def popcount64(x: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(x)
+else:  # NumPy < 2.0: SWAR popcount, still one vectorized pass
+    def popcount64(x: np.ndarray) -> np.ndarray:
+        x = x.astype(np.uint64, copy=True)
+        x -= (x >> np.uint64(1)) & np.uint64(0x5555555555555555)
+        x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def hamming(hashes: np.ndarray, h: int) -> np.ndarray:
+    """Distance from h to every hash in a uint64 array."""
+    return popcount64(hashes ^ np.uint64(h))
+
+
+def nearest(hashes: np.ndarray, h: int, max_distance: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(indices, distances) of hashes within max_distance of h, closest first (one vectorized scan)."""
+    dist = hamming(hashes, h)
+    idx = np.flatnonzero(dist <= max_distance)
+    order = np.argsort(dist[idx], kind="stable")
+    return idx[order], dist[idx][order]
+
+
+def _chunks(max_distance: int) -> List[Tuple[int, int]]:
+    # max_distance + 1 bit ranges covering all 64 bits: hashes within max_distance of each
+    # other are equal on at least one of them (pigeonhole)
+    n = max_distance + 1
+    bounds = np.linspace(0, 64, n + 1).astype(int)
+    return [(int(lo), int(hi - lo)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def close_pairs(hashes: np.ndarray, max_distance: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every pair (a, b), a < b, of hashes within max_distance, without comparing all pairs:
+    candidates share one of max_distance + 1 bit chunks (multi-index hashing); per chunk
+    the hashes are sorted by chunk value and each is compared with its 1st, 2nd, ... next
+    neighbour while any neighbour still shares the chunk.
+    """
+    n = len(hashes)
+    found_a, found_b = [], []
+    for shift, width in _chunks(max_distance):
+        key = (hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        active = np.arange(n - 1)
+        step = 1
+        while len(active):
+            active = active[active + step < n]
+            active = active[key[active] == key[active + step]]
+            if not len(active):
+                break
+            a, b = order[active], order[active + step]
+            keep = popcount64(hashes[a] ^ hashes[b]) <= max_distance
+            found_a.append(np.minimum(a, b)[keep])
+            found_b.append(np.maximum(a, b)[keep])
+            step += 1
+    if not found_a:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    pairs = np.unique(np.stack([np.concatenate(found_a), np.concatenate(found_b)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def connected_labels(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Component label (smallest member index) of n nodes joined by edges a-b, vectorized."""
+    labels = np.arange(n)
+    if not len(a):
+        return labels
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        before = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        # pointer jumping: follow labels to their roots
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, before):
+            return labels
+
+
+def cluster(hashes: np.ndarray, max_distance: int, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Duplicate-group label per hash: images whose hashes are linked by chains of distances
+    <= max_distance share a label. Identical hashes are collapsed first, so piles of blank
+    pages cost one entry. Entries with valid False get labels of their own.
+    """
+    start = time.perf_counter()
+    n = len(hashes)
+    idx = np.arange(n) if valid is None else np.flatnonzero(valid)
+    unique, inverse = np.unique(hashes[idx], return_inverse=True)
+    a, b = close_pairs(unique, max_distance) if max_distance > 0 else (np.empty(0, np.int64),) * 2
+    groups = connected_labels(len(unique), a, b)
+    labels = np.arange(n) + len(unique)  # singletons outside the valid set
+    labels[idx] = groups[inverse.ravel()]
+    logger.debug("Clustered %d hashes (%d distinct, %d close pairs) in %.2f s", len(idx), len(unique), len(a),
+                 time.perf_counter() - start)
+    return labels
@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.image_loader import ImageIterator, ImageLoader
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger("Prefetch")
+
+
+class PrefetchScheduler:
+    """
+    Decodes and resizes the images around the iterator cursor on a worker pool.
+
+    - Renders `ahead` images in the direction of travel and `behind` in the other one
+    - Direction follows the last move, so walking backwards swaps the window
+    - Every schedule() cancels queued jobs that fell out of the new window (goto jumps)
+    - Frames are fitted into `size` (the display box, aspect kept) and land in the
+      loader's ImageCache, where get_fitted() finds them; set_size() re-plans on resize
+    """
+
+    def __init__(self, loader: ImageLoader, size: Optional[Tuple[int, int]] = None,
+                 ahead: Optional[int] = None, behind: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self._loader = loader
+        self.size = tuple(size or config.DISPLAY_SIZE)
+        self.ahead = config.PREFETCH_AHEAD if ahead is None else ahead
+        self.behind = config.PREFETCH_BEHIND if behind is None else behind
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or config.PREFETCH_WORKERS,
+            thread_name_prefix="prefetch",
+        )
+        # re-entrant: cancel() and add_done_callback() may run _forget() synchronously
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Future] = {}
+        self._direction = 1
+        self._closed = False
+
+        # Optional callback, invoked from a worker thread with the path of a ready frame
+        self.on_frame_ready: Optional[Callable[[Path], None]] = None
+
+    @property
+    def direction(self) -> int:
+        return self._direction
+
+    def window(self, iterator: ImageIterator) -> List[Path]:
+        """Neighbours of the current image, nearest first, favouring the travel direction."""
+        if self._direction >= 0:
+            forward, backward = self.ahead, self.behind
+        else:
+            forward, backward = self.behind, self.ahead
+        idx = iterator.index
+        paths: List[Path] = []
+        for dist in range(1, max(forward, backward) + 1):
+            candidates = []
+            if dist <= forward:
+                candidates.append(idx + dist * self._direction)
+            if dist <= backward:
+                candidates.append(idx - dist * self._direction)
+            for i in candidates:
+                p = iterator.path_at(i)
+                if p is not None:
+                    paths.append(p)
+        return paths
+
+    def schedule(self, iterator: Optional[ImageIterator], direction: int = 0) -> int:
+        """
+        Re-plan prefetching around the iterator cursor.
+        direction: +1 after next, -1 after prev, 0 to keep the current one (load / goto).
+        Returns the number of newly submitted jobs.
+        """
+        if self._closed or iterator is None or len(iterator) == 0:
+            return 0
+        if direction:
+            self._direction = 1 if direction > 0 else -1
+
+        wanted = self.window(iterator)
+        wanted_keys = {str(p) for p in wanted}
+        submitted = dropped = 0
+        with self._lock:
+            for key in list(self._pending):
+                if key not in wanted_keys:
+                    # only queued jobs can be cancelled; running ones just finish into the cache
+                    dropped += self._pending.pop(key).cancel()
+            for path in wanted:
+                key = str(path)
+                if key in self._pending or self._loader.is_fitted_cached(path, self.size):
+                    continue
+                future = self._executor.submit(self._render, path)
+                self._pending[key] = future
+                future.add_done_callback(lambda f, k=key: self._forget(k, f))
+                submitted += 1
+        if dropped:
+            metrics.count("prefetch_dropped", dropped)
+        if submitted:
+            metrics.count("prefetch_submitted", submitted)
+            logger.debug("Prefetching %d images around index %d", submitted, iterator.index)
+        return submitted
+
+    def set_size(self, size: Tuple[int, int], iterator: Optional[ImageIterator] = None) -> None:
+        """Change the display box; frames queued for the old size are dropped and re-planned."""
+        size = tuple(size)
+        if size == self.size:
+            return
+        self.size = size
+        self.cancel_all()
+        self.schedule(iterator)
+
+    def pending(self) -> int:
+        """Frames queued or rendering."""
+        with self._lock:
+            return len(self._pending)
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            # cancel() runs _forget() synchronously, which edits _pending: work on a copy
+            futures = list(self._pending.values())
+            self._pending.clear()
+        dropped = sum(future.cancel() for future in futures)
+        if dropped:
+            metrics.count("prefetch_dropped", dropped)
+
+    def shutdown(self) -> None:
+        self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render(self, path: Path) -> None:
+        try:
+            self._loader.get_fitted(path, self.size)
+        except Exception as e:
+            logger.warning("Prefetch failed for %s: %s", path, e)
+            return
+        if self.on_frame_ready:
+            try:
+                self.on_frame_ready(path)
+            except Exception as cb_e:
+                logger.exception("on_frame_ready callback failed: %s", cb_e)
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
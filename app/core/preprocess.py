@@ -0,0 +1,334 @@
+import time
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from PIL import Image
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Preprocess")
+
+
+class PreprocessResult:
+    """Preprocessed image plus one report per stage (seconds, pixels before and after)."""
+
+    def __init__(self, image: Image.Image, stages: List[Dict]):
+        self.image = image
+        self.stages = stages
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s["seconds"] for s in self.stages)
+
+    def summary(self) -> str:
+        """
+        One line per run, e.g. 'rescale +12.1ms px x0.44'. Tesseract time grows with
+        pixel count, so the pixel ratio is what a stage saves (or adds) downstream.
+        """
+        parts = []
+        for s in self.stages:
+            ratio = s["pixels_out"] / s["pixels_in"] if s["pixels_in"] else 1.0
+            flag = "" if s["ok"] else " (failed)"
+            parts.append(f"{s['stage']} +{s['seconds'] * 1000:.1f}ms px x{ratio:.2f}{flag}")
+        return ", ".join(parts)
+
+
+class OCRPreprocessor:
+    """
+    Configurable preprocessing pipeline run before OCR (in the OCR worker, never the UI thread).
+
+    Stages, applied in the configured order on NumPy uint8 arrays:
+      - grayscale : fixed-point luminance from RGB (row strips)
+      - crop      : trim dark scanner borders and blank margins
+      - deskew    : projection-profile skew estimate over ink pixels, then rotate
+      - rescale   : scale so the estimated x-height hits target_x_height
+                    (falls back to the DPI tag -> target_dpi when no text lines are found)
+      - binarize  : Sauvola adaptive threshold from integral images; on large pages the
+                    local statistics are computed on a block-reduced grid
+    Layout analysis runs on strided views capped at a few megapixels; resampling and
+    rotation go through Pillow.
+    """
+
+    STAGES = ("grayscale", "crop", "deskew", "rescale", "binarize")
+    _STRIP_ROWS = 512
+    _ANALYSIS_MAX_SIDE = 2000
+
+    def __init__(self, stages: Optional[Sequence[str]] = None, target_x_height: Optional[int] = None,
+                 target_dpi: Optional[int] = None, window: Optional[int] = None,
+                 k: Optional[float] = None, max_skew: Optional[float] = None):
+        stages = tuple(config.OCR_PREPROCESS_STAGES if stages is None else stages)
+        unknown = [s for s in stages if s not in self.STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stage(s): {', '.join(unknown)}")
+        self.stages = stages
+        self.target_x_height = target_x_height or config.OCR_TARGET_X_HEIGHT
+        self.target_dpi = target_dpi or config.OCR_TARGET_DPI
+        self.window = (window or config.OCR_BINARIZE_WINDOW) | 1  # odd
+        self.k = config.OCR_BINARIZE_K if k is None else k
+        self.max_skew = config.OCR_DESKEW_MAX_ANGLE if max_skew is None else max_skew
+
+    def cache_key(self) -> str:
+        """Settings that change the output; part of the OCR result store key."""
+        if not self.stages:
+            return "pre:none"
+        return (f"pre:{','.join(self.stages)}|xh{self.target_x_height}|dpi{self.target_dpi}"
+                f"|w{self.window}|k{self.k}|skew{self.max_skew}")
+
+    def run(self, image: Image.Image) -> PreprocessResult:
+        dpi = _image_dpi(image)
+        arr = _to_array(image)
+        reports = []
+        for name in self.stages:
+            pixels_in = arr.shape[0] * arr.shape[1]
+            start = time.perf_counter()
+            ok = True
+            try:
+                arr = getattr(self, f"_{name}")(arr, dpi)
+            except Exception as e:
+                ok = False
+                logger.warning("Preprocessing stage '%s' failed, skipped: %s", name, e)
+            reports.append({
+                "stage": name,
+                "seconds": time.perf_counter() - start,
+                "pixels_in": pixels_in,
+                "pixels_out": arr.shape[0] * arr.shape[1],
+                "ok": ok,
+            })
+        result = PreprocessResult(Image.fromarray(np.ascontiguousarray(arr)), reports)
+        logger.debug("Preprocessed in %.1f ms: %s", result.total_seconds * 1000, result.summary())
+        return result
+
+    # -------- Stages (array in, array out) --------
+    def _grayscale(self, arr: np.ndarray, dpi: Optional[float]) -> np.ndarray:
+        return _gray(arr)
+
+    def _rescale(self, arr: np.ndarray, dpi: Optional[float]) -> np.ndarray:
+        x_height = estimate_x_height(_gray(arr))
+        if x_height:
+            scale = self.target_x_height / x_height
+        elif dpi:
+            scale = self.target_dpi / dpi
+        else:
+            return arr
+        scale = float(np.clip(scale, 0.25, 4.0))
+        if abs(scale - 1.0) < 0.1:
+            return arr
+        height, width = arr.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        resample = Image.LANCZOS if scale < 1 else Image.BICUBIC
+        return np.asarray(Image.fromarray(arr).resize(size, resample))
+
+    def _deskew(self, arr: np.ndarray, dpi: Optional[float]) -> np.ndarray:
+        angle = estimate_skew(_gray(arr), self.max_skew)
+        if abs(angle) < 0.1:
+            return arr
+        fill = 255 if arr.ndim == 2 else (255,) * arr.shape[2]
+        rotated = Image.fromarray(arr).rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+        return np.asarray(rotated)
+
+    def _binarize(self, arr: np.ndarray, dpi: Optional[float]) -> np.ndarray:
+        return sauvola(_gray(arr), self.window, self.k, strip_rows=self._STRIP_ROWS)
+
+    def _crop(self, arr: np.ndarray, dpi: Optional[float]) -> np.ndarray:
+        view, step = _analysis_view(_gray(arr))
+        ink = view <= _otsu(view)
+        # strip borders first, then measure each axis inside the other's border-free span;
+        # otherwise a dark side border puts "ink" in every row
+        top, bottom = _border_span(ink.mean(axis=1))
+        if bottom <= top:
+            return arr
+        left, right = _border_span(ink[top:bottom].mean(axis=0))
+        if right <= left:
+            return arr
+        top, bottom = _content_span(ink[:, left:right].mean(axis=1), top, bottom)
+        if bottom <= top:  # blank page
+            return arr
+        left, right = _content_span(ink[top:bottom].mean(axis=0), left, right)
+        if right <= left:
+            return arr
+        top, bottom, left, right = top * step, bottom * step, left * step, right * step
+        pad = 10 + step
+        top, left = max(0, top - pad), max(0, left - pad)
+        bottom, right = min(arr.shape[0], bottom + pad), min(arr.shape[1], right + pad)
+        return arr[top:bottom, left:right]
+
+
+# -------- Array helpers --------
+def _image_dpi(image: Image.Image) -> Optional[float]:
+    dpi = image.info.get("dpi")
+    try:
+        value = float(dpi[0]) if dpi else None
+    except (TypeError, ValueError, IndexError):
+        return None
+    # many files carry a meaningless 72/96 placeholder or 1
+    return value if value and value >= 100 else None
+
+
+def _to_array(image: Image.Image) -> np.ndarray:
+    if image.mode in ("L", "RGB"):
+        return np.asarray(image)
+    if image.mode in ("1", "I;16", "I", "F"):
+        return np.asarray(image.convert("L"))
+    # anything with transparency or a palette: flatten onto white
+    rgba = image.convert("RGBA")
+    background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+    return np.asarray(Image.alpha_composite(background, rgba).convert("RGB"))
+
+
+def _gray(arr: np.ndarray, strip_rows: int = 1024) -> np.ndarray:
+    """ITU-R 601 luma in 8.8 fixed point (no float temporaries), processed in row strips."""
+    if arr.ndim == 2:
+        return arr
+    out = np.empty(arr.shape[:2], dtype=np.uint8)
+    for top in range(0, arr.shape[0], strip_rows):
+        rgb = arr[top:top + strip_rows]
+        luma = rgb[..., 0].astype(np.uint16) * 77
+        luma += rgb[..., 1].astype(np.uint16) * 150
+        luma += rgb[..., 2].astype(np.uint16) * 29
+        luma += 128
+        out[top:top + strip_rows] = luma >> 8
+    return out
+
+
+def _otsu(gray: np.ndarray) -> int:
+    """Global Otsu threshold of a uint8 image; ink is `gray <= threshold`."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    prob = hist / hist.sum()
+    omega = np.cumsum(prob)
+    mu = np.cumsum(prob * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma_b = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    sigma_b[~np.isfinite(sigma_b)] = 0
+    return int(np.argmax(sigma_b))
+
+
+def _analysis_view(gray: np.ndarray, max_side: int = OCRPreprocessor._ANALYSIS_MAX_SIDE):
+    """Strided (no copy) view for layout analysis plus the step used."""
+    step = max(1, int(np.ceil(max(gray.shape) / max_side)))
+    return gray[::step, ::step], step
+
+
+def _runs(mask: np.ndarray):
+    """(starts, ends) of consecutive True runs in a 1-D boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def estimate_x_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Rough x-height in pixels from the horizontal projection profile: text lines are
+    runs of rows containing ink, and a Latin/Persian line is about twice its x-height.
+    """
+    view, step = _analysis_view(gray)
+    # middle half of the columns: keeps side borders and residual skew out of the profile
+    quarter = view.shape[1] // 4
+    view = view[:, quarter:view.shape[1] - quarter] if quarter else view
+    ink = view <= _otsu(view)
+    profile = ink.mean(axis=1)
+    if not profile.any():
+        return None
+    starts, ends = _runs(profile > max(0.005, profile.mean() * 0.25))
+    heights = (ends - starts) * step
+    heights = heights[heights >= 4]
+    if len(heights) < 2:
+        return None
+    return float(np.median(heights)) / 2.0
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 10.0) -> float:
+    """
+    Skew in degrees (counter-clockwise rotation that straightens the text). Ink pixel
+    coordinates are projected onto rotated axes for every candidate angle; the angle
+    whose row histogram is sharpest (largest sum of squares) wins. Coarse 1 degree
+    search, then 0.1 degree refinement.
+    """
+    view, _ = _analysis_view(gray, 1500)
+    ys, xs = np.nonzero(view <= _otsu(view))
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > 200_000:
+        pick = np.linspace(0, len(ys) - 1, 200_000).astype(np.int64)
+        ys, xs = ys[pick], xs[pick]
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+
+    def best(angles: np.ndarray) -> float:
+        scores = np.empty(len(angles))
+        for i, angle in enumerate(np.deg2rad(angles)):
+            proj = np.rint(ys * np.cos(angle) - xs * np.sin(angle)).astype(np.int64)
+            hist = np.bincount(proj - proj.min()).astype(np.float64)
+            scores[i] = hist @ hist
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = best(np.arange(-max_angle, max_angle + 0.5, 1.0))
+    return best(np.arange(coarse - 1.0, coarse + 1.05, 0.1))
+
+
+def _box_mean(a: np.ndarray, window: int) -> np.ndarray:
+    """Mean over a window x window neighbourhood (reflect padding) via an integral image."""
+    r = window // 2
+    padded = np.pad(a, r, mode="reflect")
+    ii = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    np.cumsum(np.cumsum(padded, axis=0), axis=1, out=ii[1:, 1:])
+    w = window
+    return (ii[w:, w:] - ii[:-w, w:] - ii[w:, :-w] + ii[:-w, :-w]) / float(w * w)
+
+
+def sauvola(gray: np.ndarray, window: int = 31, k: float = 0.2,
+            max_stat_pixels: int = 4_000_000, strip_rows: int = 512) -> np.ndarray:
+    """
+    Sauvola binarization: threshold = mean * (1 + k * (std / 128 - 1)) over a window.
+    Local mean/std come from integral images. Pages above max_stat_pixels get their
+    statistics on an f x f block-reduced grid (sums of x and x^2 per block, so the
+    variance stays exact at block resolution) and the threshold map is expanded back;
+    every full-size pass runs in row strips, so a 100 MP page needs no full-size floats.
+    """
+    height, width = gray.shape
+    f = 1
+    while height * width / (f * f) > max_stat_pixels and window // (2 * f) >= 3:
+        f *= 2
+    hh, ww = -(-height // f), -(-width // f)
+    rows_per = max(1, strip_rows // f)
+    strip = rows_per * f
+
+    s1 = np.empty((hh, ww))
+    s2 = np.empty((hh, ww))
+    for sr in range(0, hh, rows_per):
+        er = min(hh, sr + rows_per)
+        block = gray[sr * f:er * f]
+        block = np.pad(block, ((0, (er - sr) * f - block.shape[0]), (0, ww * f - width)), mode="edge")
+        block = block.astype(np.float64)
+        s1[sr:er] = block.reshape(er - sr, f, ww, f).mean(axis=(1, 3))
+        s2[sr:er] = (block * block).reshape(er - sr, f, ww, f).mean(axis=(1, 3))
+
+    small_window = max(3, (window // f) | 1)
+    mean = _box_mean(s1, small_window)
+    std = np.sqrt(np.maximum(_box_mean(s2, small_window) - mean * mean, 0.0))
+    threshold = mean * (1.0 + k * (std / 128.0 - 1.0))
+    del s1, s2, mean, std
+
+    out = np.empty_like(gray)
+    for top in range(0, height, strip):
+        bottom = min(height, top + strip)
+        thr = threshold[top // f:-(-bottom // f)]
+        if f > 1:
+            thr = np.repeat(np.repeat(thr, f, axis=0), f, axis=1)
+        out[top:bottom] = np.where(gray[top:bottom] > thr[:bottom - top, :width], 255, 0)
+    return out
+
+
+def _border_span(ink_fraction: np.ndarray):
+    """[start, end) along one axis without the dark (>50% ink) borders at either end."""
+    start, end = 0, len(ink_fraction)
+    while start < end and ink_fraction[start] > 0.5:
+        start += 1
+    while end > start and ink_fraction[end - 1] > 0.5:
+        end -= 1
+    return start, end
+
+
+def _content_span(ink_fraction: np.ndarray, start: int, end: int):
+    """[start, end) narrowed to the lines/columns that actually contain ink."""
+    content = np.flatnonzero(ink_fraction[start:end] > 0.002)
+    if len(content) == 0:
+        return 0, 0
+    return start + int(content[0]), start + int(content[-1]) + 1
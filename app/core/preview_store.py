@@ -0,0 +1,197 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+from app.core.raster import split_frame
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("PreviewStore")
+
+
+class PreviewStore:
+    """
+    Persistent store of display-sized and thumbnail renditions (one SQLite blob table).
+
+    - Rows are keyed by (path, rendition) and carry the file's mtime and size;
+      a row whose signature no longer matches the file on disk is a miss
+    - Renditions are stored JPEG-encoded to keep the file compact
+    - The total blob size is capped; the least recently accessed rows are
+      garbage-collected when a write pushes the store over the cap
+    - Access times are buffered and flushed in batches so reads stay read-only
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS previews (
+            path TEXT NOT NULL,
+            rendition TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            file_size INTEGER NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            nbytes INTEGER NOT NULL,
+            last_access REAL NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (path, rendition)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS previews_lru ON previews(last_access);
+    """
+    _ACCESS_FLUSH_EVERY = 256
+
+    def __init__(self, db_path=None, max_bytes: Optional[int] = None, quality: int = 85):
+        self.db_path = Path(db_path or config.PREVIEW_STORE_PATH).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = config.PREVIEW_STORE_MAX_BYTES if max_bytes is None else max_bytes
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM previews").fetchone()[0]
+        self._pending_access: Dict[Tuple[str, str], float] = {}
+        logger.debug("Preview store %s opened (%d bytes)", self.db_path, self._total_bytes)
+
+    @staticmethod
+    def rendition_name(size, kind: str = "display") -> str:
+        return f"{kind}:{size[0]}x{size[1]}"
+
+    @staticmethod
+    def signature(path) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of path's file, or None if it cannot be stat'ed."""
+        try:
+            st = os.stat(split_frame(path)[0])
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    # -------- Lookup --------
+    def get(self, path, rendition: str) -> Optional[Image.Image]:
+        found = self.get_many([path], rendition)
+        return found.get(str(path))
+
+    def get_many(self, paths: Iterable, rendition: str) -> Dict[str, Image.Image]:
+        """Fetch one rendition for many paths; only valid (signature-matching) rows are returned."""
+        wanted = {}
+        for p in paths:
+            sig = self.signature(p)
+            if sig is not None:
+                wanted[str(p)] = sig
+        if not wanted:
+            return {}
+
+        rows: List[tuple] = []
+        keys = list(wanted)
+        with self._lock:
+            # stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT path, mtime_ns, file_size, data FROM previews "
+                    f"WHERE rendition = ? AND path IN ({marks})",
+                    [rendition, *chunk],
+                ).fetchall())
+
+            now = time.time()
+            result = {}
+            for path, mtime_ns, file_size, data in rows:
+                if wanted[path] != (mtime_ns, file_size):
+                    continue
+                result[path] = data
+                self._pending_access[(path, rendition)] = now
+            if len(self._pending_access) >= self._ACCESS_FLUSH_EVERY:
+                self._flush_access()
+
+        images = {}
+        for path, data in result.items():
+            try:
+                img = Image.open(io.BytesIO(data))
+                img.load()
+                images[path] = img
+            except Exception as e:
+                logger.warning("Corrupt preview for %s (%s): %s", path, rendition, e)
+        return images
+
+    # -------- Update --------
+    def put(self, path, rendition: str, image: Image.Image) -> bool:
+        sig = self.signature(path)
+        if sig is None:
+            return False
+        buf = io.BytesIO()
+        image.convert("RGB").save(buf, format="JPEG", quality=self.quality)
+        data = buf.getvalue()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT nbytes FROM previews WHERE path = ? AND rendition = ?", (str(path), rendition)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO previews "
+                "(path, rendition, mtime_ns, file_size, width, height, nbytes, last_access, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(path), rendition, sig[0], sig[1], image.width, image.height, len(data), time.time(), data),
+            )
+            self._total_bytes += len(data) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._gc(int(self.max_bytes * 0.9))
+        return True
+
+    def invalidate(self, path) -> int:
+        """Drop every rendition of path and of its pages ("<path>#N"). Returns the number of rows removed."""
+        where = "path = ? OR substr(path, 1, ?) = ?"
+        params = (str(path), len(str(path)) + 1, f"{path}#")
+        with self._lock:
+            freed, count = self._conn.execute(
+                f"SELECT COALESCE(SUM(nbytes), 0), COUNT(*) FROM previews WHERE {where}", params
+            ).fetchone()
+            self._conn.execute(f"DELETE FROM previews WHERE {where}", params)
+            self._total_bytes -= freed
+            return count
+
+    def gc(self, target_bytes: Optional[int] = None) -> int:
+        """Evict least recently accessed rows until the store is under target_bytes."""
+        with self._lock:
+            return self._gc(self.max_bytes if target_bytes is None else target_bytes)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access()
+            self._conn.close()
+
+    # -------- Internals (caller holds the lock) --------
+    def _flush_access(self) -> None:
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE previews SET last_access = ? WHERE path = ? AND rendition = ?",
+            [(ts, path, rendition) for (path, rendition), ts in self._pending_access.items()],
+        )
+        self._pending_access.clear()
+
+    def _gc(self, target_bytes: int) -> int:
+        self._flush_access()
+        removed = 0
+        cursor = self._conn.execute("SELECT path, rendition, nbytes FROM previews ORDER BY last_access")
+        victims = []
+        total = self._total_bytes
+        for path, rendition, nbytes in cursor:
+            if total <= target_bytes:
+                break
+            victims.append((path, rendition))
+            total -= nbytes
+        if victims:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM previews WHERE path = ? AND rendition = ?", victims)
+            self._conn.execute("COMMIT")
+            removed = len(victims)
+            self._total_bytes = total
+            logger.debug("Preview store GC removed %d renditions", removed)
+        return removed
@@ -0,0 +1,223 @@
+import importlib
+import mmap
+import os
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from PIL import Image
+from app.core.file_operations import FileHelper, frame_path, split_frame
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Raster")
+
+# -------- Pillow plugins --------
+# Image.open() preloads only the BMP/GIF/JPEG/PPM/PNG plugins; a file none of them accepts
+# makes it import every plugin Pillow ships (~30 ms per process). The plugins our other
+# extensions need are registered here instead, so workers never pay for the rest.
+_EXTRA_PLUGINS = {".tif": "TiffImagePlugin", ".tiff": "TiffImagePlugin", ".webp": "WebPImagePlugin"}
+
+
+def register_plugins(extensions) -> None:
+    for name in sorted({_EXTRA_PLUGINS[ext] for ext in extensions if ext in _EXTRA_PLUGINS}):
+        importlib.import_module(f"PIL.{name}")
+
+
+register_plugins(FileHelper.VALID_IMAGE_EXT)
+
+
+def open_image(path) -> Image.Image:
+    """Image.open() positioned on the frame path addresses (use as a context manager)."""
+    real, frame = split_frame(path)
+    img = Image.open(real)
+    if frame:
+        try:
+            img.seek(frame)
+        except EOFError:
+            img.close()
+            raise
+    return img
+
+
+def frame_count(path) -> int:
+    """Frames in path's file; 1 without opening it unless the extension can hold several."""
+    real, _ = split_frame(path)
+    if Path(real).suffix.lower() not in config.MULTI_FRAME_EXTENSIONS:
+        return 1
+    try:
+        with Image.open(real) as img:
+            return getattr(img, "n_frames", 1)
+    except Exception as e:
+        logger.debug("Could not count frames of %s: %s", real, e)
+        return 1
+
+
+def iter_frames(path) -> Iterator[Path]:
+    """Frame paths of path's file, counted when first advanced (no pixels decoded)."""
+    real, _ = split_frame(path)
+    for frame in range(frame_count(real)):
+        yield frame_path(real, frame)
+
+
+# -------- Memory-mapped pixels --------
+class MappedRaster:
+    """
+    Pixels of an uncompressed TIFF/BMP frame read through a read-only mmap.
+
+    - Nothing is decoded or copied on open; pixel rows are a NumPy view of the file
+      (bottom-up BMPs and BGR channel order are handled by the view)
+    - region()/reduce()/fit() copy only what they return, in the native mode
+      ("L", "RGB" or "RGBA"); full-width row ranges are unpacked by Pillow straight from
+      the map, so to_image() is a single full-size copy in the requested mode
+    - open() returns None for anything else (compressed, bilevel, 16-bit, tiled), and
+      callers fall back to a regular Pillow decode
+    """
+
+    # raw mode in the file -> (bytes per pixel, image mode, channel order or None)
+    _LAYOUTS = {
+        "L": (1, "L", None),
+        "RGB": (3, "RGB", None),
+        "BGR": (3, "RGB", (2, 1, 0)),
+        "RGBA": (4, "RGBA", None),
+        "RGBX": (4, "RGB", (0, 1, 2)),
+        "BGRX": (4, "RGB", (2, 1, 0)),
+        "BGRA": (4, "RGBA", (2, 1, 0, 3)),
+    }
+    FORMATS = ("TIFF", "BMP")
+    EXTENSIONS = (".tif", ".tiff", ".bmp", ".dib")
+
+    def __init__(self, path: str, size: Tuple[int, int], rawmode: str, offset: int, stride: int,
+                 bottom_up: bool):
+        self.path = path
+        self.size = size
+        bpp, self.mode, self._order = self._LAYOUTS[rawmode]
+        self._rawmode, self._offset, self._stride, self._bottom_up = rawmode, offset, stride, bottom_up
+        width, height = size
+        with open(split_frame(path)[0], "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        rows = np.ndarray((height, stride), np.uint8, buffer=self._map, offset=offset)
+        pixels = rows[:, :width * bpp].reshape(height, width, bpp)
+        self._pixels = pixels[::-1] if bottom_up else pixels
+
+    @classmethod
+    def open(cls, path) -> Optional["MappedRaster"]:
+        real, frame = split_frame(path)
+        if Path(real).suffix.lower() not in cls.EXTENSIONS:
+            return None  # not even opened: most folders are JPEG/PNG
+        with Image.open(real) as img:
+            if frame:
+                img.seek(frame)
+            if img.format not in cls.FORMATS:
+                return None
+            layout = cls._layout(img)
+            size = img.size
+        if layout is None:
+            return None
+        rawmode, offset, stride, bottom_up = layout
+        if offset + stride * size[1] > os.path.getsize(real):
+            return None
+        return cls(str(path), size, rawmode, offset, stride, bottom_up)
+
+    @classmethod
+    def _layout(cls, img: Image.Image) -> Optional[Tuple[str, int, int, bool]]:
+        """(raw mode, offset, stride, bottom_up) if the frame is one contiguous raw block."""
+        tiles = sorted(img.tile, key=lambda t: t[1][1])
+        if not tiles:
+            return None
+        width, height = img.size
+        rawmode = tiles[0][3][0] if tiles[0][3] else None
+        if rawmode not in cls._LAYOUTS:
+            return None
+        first_offset = tiles[0][2]
+        stride = orientation = None
+        for codec, extents, offset, args in tiles:
+            if codec != "raw" or args[0] != rawmode or extents[0] != 0 or extents[2] != width:
+                return None
+            tile_stride = (args[1] if len(args) > 1 else 0) or width * cls._LAYOUTS[rawmode][0]
+            tile_orientation = args[2] if len(args) > 2 else 1
+            if stride is None:
+                stride, orientation = tile_stride, tile_orientation
+            elif tile_stride != stride or tile_orientation != orientation:
+                return None
+            # strips must follow each other in the file (one block, row after row)
+            if orientation == 1 and offset != first_offset + extents[1] * stride:
+                return None
+        if tiles[-1][1][3] != height or (orientation == -1 and len(tiles) > 1):
+            return None
+        return rawmode, first_offset, stride, orientation == -1
+
+    @property
+    def nbytes(self) -> int:
+        width, height = self.size
+        return width * height * len(self.mode)
+
+    def region(self, box: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+        """Copy of box (left, top, right, bottom; default the whole frame) in the native mode."""
+        left, top, right, bottom = box or (0, 0, *self.size)
+        if left == 0 and right == self.size[0]:
+            return self._rows(top, bottom)
+        return self._to_image(self._pixels[top:bottom, left:right])
+
+    def reduce(self, factor: int) -> Image.Image:
+        """Box-averaged 1/factor copy, made in row bands so memory stays near the output size."""
+        if factor <= 1:
+            return self.region()
+        width, height = self.size
+        out_w, out_h = width // factor, height // factor
+        out = Image.new(self.mode, (out_w, out_h))
+        # each band is copied out of the map (~16 MB) and reduced by Pillow
+        rows_per_band = max(1, (16 << 20) // max(1, width * len(self.mode) * factor))
+        for y in range(0, out_h, rows_per_band):
+            n = min(rows_per_band, out_h - y)
+            band = self._rows(y * factor, (y + n) * factor)
+            out.paste(band.reduce(factor, box=(0, 0, out_w * factor, n * factor)), (0, y))
+        return out
+
+    def fit(self, size: Tuple[int, int], resample: int = Image.LANCZOS) -> Image.Image:
+        """
+        RGB copy resized to size with resample (callers pass the configured filter),
+        box-reduced straight from the map first when it is 2x+ larger.
+        """
+        factor = min(self.size[0] // size[0], self.size[1] // size[1])
+        img = self.reduce(factor) if factor >= 2 else self.region()
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        return img if img.size == tuple(size) else img.resize(tuple(size), resample)
+
+    def to_image(self, mode: str = "RGB") -> Image.Image:
+        width, height = self.size
+        if mode == self.mode:
+            return self._rows(0, height)
+        # converted band by band into the output, so the native copy never exists in full
+        out = Image.new(mode, self.size)
+        step = max(1, (16 << 20) // self._stride)
+        for top in range(0, height, step):
+            out.paste(self._rows(top, min(height, top + step), mode), (0, top))
+        return out
+
+    def close(self) -> None:
+        self._pixels = None
+        try:
+            self._map.close()
+        except BufferError:
+            # a view is still alive somewhere; the map goes when it does
+            pass
+
+    def _rows(self, top: int, bottom: int, mode: Optional[str] = None) -> Image.Image:
+        # full-width rows [top, bottom) unpacked by Pillow from the map: one copy, channel
+        # order and bottom-up storage handled by the raw decoder
+        mode = mode or self.mode
+        start = self.size[1] - bottom if self._bottom_up else top
+        begin = self._offset + start * self._stride
+        with memoryview(self._map) as view, view[begin:begin + (bottom - top) * self._stride] as data:
+            img = Image.frombytes(self.mode, (self.size[0], bottom - top), data, "raw", self._rawmode,
+                                  self._stride, -1 if self._bottom_up else 1)
+        return img if img.mode == mode else img.convert(mode)
+
+    def _to_image(self, pixels: np.ndarray) -> Image.Image:
+        if self._order is not None:
+            pixels = pixels[..., list(self._order)]
+        if pixels.shape[2] == 1:
+            pixels = pixels[..., 0]
+        # always a copy: an image must not keep pointing into a file that can change on disk
+        return Image.fromarray(np.array(pixels, order="C"))
@@ -0,0 +1,287 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from app.core.ocr_engine import OCREngine
+from app.core.preprocess import (
+    OCRPreprocessor,
+    PreprocessResult,
+    _analysis_view,
+    _gray,
+    _otsu,
+    _runs,
+    _to_array,
+    estimate_x_height,
+)
+from app.utils.config import config
+from app.utils.exceptions import OCRExtractionError
+from app.utils.log_manager import get_logger
+
+logger = get_logger("RegionOCR")
+
+Box = Tuple[int, int, int, int]  # left, top, right, bottom (PIL crop order)
+
+
+class RegionOCRResult:
+    """
+    Stitched text plus how the page was split (for logs and batch records).
+    failed counts regions whose OCR failed: such a partial text must not be stored as the page's result.
+    """
+
+    def __init__(self, text: str, boxes: List[Box], mode: str, preprocess: Optional[PreprocessResult],
+                 seconds: float, failed: int = 0):
+        self.text = text
+        self.boxes = boxes
+        self.mode = mode
+        self.preprocess = preprocess
+        self.seconds = seconds
+        self.failed = failed
+
+    @property
+    def partial(self) -> bool:
+        return self.failed > 0
+
+    def summary(self) -> str:
+        pre = self.preprocess.summary() if self.preprocess else "no preprocessing"
+        failed = f", {self.failed} failed" if self.failed else ""
+        return f"{self.mode} x{len(self.boxes)}{failed} in {self.seconds * 1000:.0f}ms ({pre})"
+
+
+class RegionOCR:
+    """
+    OCR for very large pages: find text blocks first, OCR them in parallel, stitch the text.
+
+    - The page is preprocessed once (deskew needs the whole page), then split
+    - mode "auto": recursive XY-cut on the ink projection profiles gives text blocks in
+      reading order (columns left-to-right, each top-to-bottom); blocks above max_region_pixels
+      are cut again at blank rows. If nothing usable is found it falls back to tiles
+    - mode "tiles": full-width horizontal bands with overlap; lines repeated in the overlap
+      are dropped when the band texts are stitched
+    - a region that fails is left out and counted in RegionOCRResult.failed (all failing raises)
+    - mode "off", or pages under min_pixels after preprocessing: a single engine call
+    - box (left, top, right, bottom in source pixels) OCRs only that crop
+    """
+
+    MODES = ("auto", "tiles", "off")
+
+    def __init__(self, engine: OCREngine, preprocessor: Optional[OCRPreprocessor] = None,
+                 mode: Optional[str] = None, workers: Optional[int] = None,
+                 min_pixels: Optional[int] = None, max_region_pixels: Optional[int] = None):
+        self.engine = engine
+        self.preprocessor = preprocessor
+        self.mode = mode or config.OCR_REGION_MODE
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown region OCR mode: {self.mode}")
+        self.workers = max(1, workers or config.OCR_REGION_WORKERS)
+        self.min_pixels = min_pixels or config.OCR_REGION_MIN_PIXELS
+        self.max_region_pixels = max_region_pixels or config.OCR_REGION_MAX_PIXELS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def cache_key(self) -> str:
+        """Settings that change the stitched output; part of the OCR result store key."""
+        if self.mode == "off":
+            return "regions:off"
+        return f"regions:{self.mode}|min{self.min_pixels}|max{self.max_region_pixels}"
+
+    # -------- OCR --------
+    def extract(self, image: Image.Image, box: Optional[Box] = None) -> str:
+        return self.run(image, box).text
+
+    def run(self, image: Image.Image, box: Optional[Box] = None) -> RegionOCRResult:
+        start = time.perf_counter()
+        if box is not None:
+            image = image.crop(_clip_box(box, image.size))
+        prepared = self.preprocessor.run(image) if self.preprocessor else None
+        page = prepared.image if prepared else image
+
+        mode, boxes = self.plan(page)
+        failed = 0
+        if len(boxes) == 1 and boxes[0] == (0, 0, page.width, page.height):
+            texts = [self.engine.extract(page)]
+        else:
+            texts, failed = self._extract_all(page, boxes)
+        text = stitch_bands(texts) if mode == "tiles" else "\n\n".join(t.strip("\n") for t in texts if t.strip())
+        result = RegionOCRResult(text, boxes, mode, prepared, time.perf_counter() - start, failed)
+        logger.info("Region OCR: %s", result.summary())
+        return result
+
+    def plan(self, page: Image.Image) -> Tuple[str, List[Box]]:
+        """(mode used, boxes in reading order) for a preprocessed page."""
+        width, height = page.size
+        whole = [(0, 0, width, height)]
+        if self.mode == "off" or width * height < self.min_pixels:
+            return "page", whole
+        if self.mode == "auto":
+            gray = _gray(_to_array(page))
+            boxes = detect_text_regions(gray, max_region_pixels=self.max_region_pixels)
+            if boxes:
+                return "regions", boxes
+            logger.debug("No text blocks found, falling back to tiles")
+        return "tiles", tile_boxes(width, height, config.OCR_TILE_HEIGHT, config.OCR_TILE_OVERLAP)
+
+    def close(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _extract_all(self, page: Image.Image, boxes: Sequence[Box]) -> Tuple[List[str], int]:
+        """(texts of the regions that succeeded, in order; number that failed)."""
+        crops = [page.crop(b) for b in boxes]
+        if self.workers == 1 or len(crops) == 1:
+            outcomes = [self._extract_one(c) for c in crops]
+        else:
+            # concurrent OCR jobs share one pool: created once, under the lock
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="region-ocr")
+                executor = self._executor
+            outcomes = list(executor.map(self._extract_one, crops))
+
+        errors = [o for o in outcomes if isinstance(o, Exception)]
+        if errors and len(errors) == len(outcomes):
+            raise errors[0]
+        if errors:
+            logger.warning("%d of %d regions failed; returning partial text", len(errors), len(outcomes))
+        return [o for o in outcomes if isinstance(o, str)], len(errors)
+
+    def _extract_one(self, crop: Image.Image):
+        # errors are returned, not raised, so one bad region does not sink the page
+        try:
+            return self.engine.extract(crop)
+        except OCRExtractionError as e:
+            return e
+        except Exception as e:
+            return OCRExtractionError(f"Region OCR failed: {e}")
+
+
+# -------- Layout --------
+def detect_text_regions(gray: np.ndarray, max_region_pixels: int = 2_000_000,
+                        max_regions: int = 64) -> List[Box]:
+    """
+    Text blocks of a grayscale page as (left, top, right, bottom) in reading order.
+
+    Recursive XY-cut on a strided analysis view: split at horizontal whitespace bands at
+    least ~2 x-heights tall or at vertical gutters at least ~3 x-heights wide, widest gap
+    first, until no block splits further. Gaps grow until there are at most max_regions blocks.
+    """
+    view, step = _analysis_view(gray)
+    ink = view <= _otsu(view)
+    if ink.mean() > 0.5:  # mostly "ink": photo or inverted page, no layout to find
+        return []
+    x_height = (estimate_x_height(gray) or 10.0) / step
+    row_gap = max(2, int(round(2 * x_height)))
+    col_gap = max(3, int(round(3 * x_height)))
+
+    blocks: List[Box] = []
+    while True:
+        blocks = []
+        _xy_cut(ink, (0, 0, ink.shape[1], ink.shape[0]), row_gap, col_gap, blocks)
+        if len(blocks) <= max_regions:
+            break
+        row_gap, col_gap = row_gap * 2, col_gap * 2
+
+    height, width = gray.shape
+    pad = max(2, int(round(x_height * step / 2)))
+    out: List[Box] = []
+    for left, top, right, bottom in blocks:
+        full = (max(0, left * step - pad), max(0, top * step - pad),
+                min(width, right * step + pad), min(height, bottom * step + pad))
+        out.extend(_split_tall(ink, full, step, max_region_pixels))
+    return out
+
+
+def _xy_cut(ink: np.ndarray, box: Box, row_gap: int, col_gap: int, out: List[Box], depth: int = 0) -> None:
+    left, top, right, bottom = box
+    sub = ink[top:bottom, left:right]
+    rows = _merge_runs(*_runs(sub.any(axis=1)), row_gap)
+    cols = _merge_runs(*_runs(sub.any(axis=0)), col_gap)
+    if not rows or not cols:
+        return
+    if depth > 32 or (len(rows) == 1 and len(cols) == 1):
+        out.append((left + cols[0][0], top + rows[0][0], left + cols[-1][1], top + rows[-1][1]))
+        return
+    # cut along the widest gap first: a column gutter beats the paragraph breaks inside
+    # the columns, so two-column pages are read column by column
+    if len(cols) == 1 or (len(rows) > 1 and _widest_gap(rows) / row_gap >= _widest_gap(cols) / col_gap):
+        for s, e in rows:
+            _xy_cut(ink, (left, top + s, right, top + e), row_gap, col_gap, out, depth + 1)
+    else:
+        for s, e in cols:
+            _xy_cut(ink, (left + s, top, left + e, bottom), row_gap, col_gap, out, depth + 1)
+
+
+def _widest_gap(spans: List[Tuple[int, int]]) -> int:
+    return max(b[0] - a[1] for a, b in zip(spans, spans[1:]))
+
+
+def _merge_runs(starts: np.ndarray, ends: np.ndarray, min_gap: int) -> List[Tuple[int, int]]:
+    """Join runs separated by fewer than min_gap empty cells; drop 1-cell specks."""
+    spans: List[Tuple[int, int]] = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        if spans and s - spans[-1][1] < min_gap:
+            spans[-1] = (spans[-1][0], e)
+        else:
+            spans.append((s, e))
+    return [(s, e) for s, e in spans if e - s > 1]
+
+
+def _split_tall(ink: np.ndarray, box: Box, step: int, max_pixels: int) -> List[Box]:
+    """Cut a block into horizontal slices under max_pixels, at the emptiest rows near each cut."""
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    pieces = -(-width * height // max_pixels)
+    if pieces <= 1:
+        return [box]
+    rows = ink[top // step:-(-bottom // step), left // step:-(-right // step)].sum(axis=1)
+    window = max(1, len(rows) // (pieces * 4))
+    cuts = [top]
+    for i in range(1, pieces):
+        target = i * len(rows) // pieces
+        lo, hi = max(0, target - window), min(len(rows), target + window + 1)
+        best = lo + int(np.argmin(rows[lo:hi]))
+        # rows[0] is analysis row top // step, so the cut is on the step grid, not offset from top
+        cut = min(bottom, max(top, (top // step + best) * step))
+        if cuts[-1] < cut < bottom:
+            cuts.append(cut)
+    cuts.append(bottom)
+    return [(left, a, right, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def tile_boxes(width: int, height: int, tile_height: int = 2048, overlap: int = 128) -> List[Box]:
+    """Full-width horizontal bands of tile_height rows, each overlapping the next by overlap rows."""
+    tile_height = max(tile_height, 2 * overlap + 1)
+    boxes: List[Box] = []
+    top = 0
+    while True:
+        bottom = min(height, top + tile_height)
+        boxes.append((0, top, width, bottom))
+        if bottom >= height:
+            return boxes
+        top = bottom - overlap
+
+
+def stitch_bands(texts: Sequence[str], max_overlap_lines: int = 5) -> str:
+    """Join band texts top to bottom, dropping lines the overlap made appear twice."""
+    lines: List[str] = []
+    for text in texts:
+        new = [ln for ln in text.splitlines() if ln.strip()]
+        for n in range(min(max_overlap_lines, len(lines), len(new)), 0, -1):
+            if [ln.strip() for ln in lines[-n:]] == [ln.strip() for ln in new[:n]]:
+                new = new[n:]
+                break
+        lines.extend(new)
+    return "\n".join(lines)
+
+
+def _clip_box(box: Box, size: Tuple[int, int]) -> Box:
+    left, top, right, bottom = (int(round(v)) for v in box)
+    width, height = size
+    left, right = sorted((max(0, min(width, left)), max(0, min(width, right))))
+    top, bottom = sorted((max(0, min(height, top)), max(0, min(height, bottom))))
+    if right - left < 2 or bottom - top < 2:
+        raise ValueError(f"Region {box} is empty inside a {width}x{height} image")
+    return left, top, right, bottom
@@ -0,0 +1,163 @@
+import re
+import sqlite3
+import unicodedata
+from typing import List, NamedTuple, Optional
+from app.utils.log_manager import get_logger
+
+logger = get_logger("TextIndex")
+
+# -------- Normalization --------
+# Applied to indexed text and to queries alike, so OCR output and what the user types
+# meet in one spelling: Arabic letter variants -> Persian, Persian/Arabic digits -> ASCII,
+# harakat/tatweel dropped, ZWNJ joined ("می‌خواهم" == "میخواهم"). Latin case and accents
+# are folded by the FTS5 tokenizer.
+_LETTERS = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ؤ": "و",
+    "\u200c": "", "\u200d": "", "\u0640": "",  # ZWNJ, ZWJ, tatweel
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+})
+_MARKS = re.compile("[\u064b-\u065f\u0670\u06d6-\u06ed]")  # harakat, superscript alef, Quranic marks
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    # NFKC first: OCR output may carry Arabic presentation forms (e.g. U+FEFB for "لا")
+    return _MARKS.sub("", unicodedata.normalize("NFKC", text).translate(_LETTERS))
+
+
+def build_query(query: str, prefix: bool = True) -> Optional[str]:
+    """
+    FTS5 MATCH expression for what a user typed: every word must appear (AND),
+    "quoted words" must appear as a phrase, and the last bare word also matches as a
+    prefix ("inv" finds "invoice"; numbers match exactly). None if nothing searchable is left.
+    """
+    parts = []
+    last_bare = False
+    for phrase, word in _TERM.findall(normalize_text(query)):
+        tokens = _WORD.findall(phrase or word)
+        if tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+            last_bare = not phrase and not tokens[-1].isdigit()
+    if not parts:
+        return None
+    if prefix and last_bare:
+        parts[-1] += "*"
+    return " AND ".join(parts)
+
+
+class SearchHit(NamedTuple):
+    path: str
+    snippet: str  # matched words in [brackets], from the normalized text
+    score: float  # bm25; lower is better
+
+
+class TextIndex:
+    """
+    Inverted index over OCR text (SQLite FTS5), living in the OCR result store's database.
+
+    - One document per image path (pages: "<file>#N"); re-OCR replaces it under a new id
+    - Maintained by OCRResultStore as results are written, invalidated or purged, so it
+      grows incrementally with every finished OCR job; a store created before the index
+      existed is backfilled once on open
+    - unicode61 tokenizer (Latin case/accent folding) over Persian-normalized text, with
+      2- and 3-character prefix indexes so search-as-you-type prefixes stay fast
+    - Queries matching more than RANK_MAX_MATCHES documents are not ranked (bm25 over
+      most of the corpus costs hundreds of ms at 100k documents); the most recently
+      written are returned
+    - Methods take the store's connection; the caller holds the store's lock
+    """
+
+    RANK_MAX_MATCHES = 5000
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ocr_docs (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            signature TEXT NOT NULL,
+            engine_key TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ocr_docs_signature ON ocr_docs(signature);
+        CREATE VIRTUAL TABLE IF NOT EXISTS ocr_fts USING fts5(
+            body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ocr_fts'").fetchone() is not None
+        conn.executescript(self._SCHEMA)
+        if not existed:
+            self.rebuild()
+
+    # -------- Update --------
+    def add(self, path, signature: str, engine_key: str, text: str, replace: bool = True) -> bool:
+        """Index text for path. With replace=False an up-to-date document is left alone. True if written."""
+        path = str(path)
+        row = self._conn.execute("SELECT id, signature, engine_key FROM ocr_docs WHERE path = ?", (path,)).fetchone()
+        if row is not None and not replace and row[1:] == (signature, engine_key):
+            return False
+        if row is not None:
+            # a rewrite gets a fresh id: ids follow write order, which broad queries list newest first
+            self._conn.execute("DELETE FROM ocr_fts WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM ocr_docs WHERE id = ?", (row[0],))
+        doc_id = self._conn.execute(
+            "INSERT INTO ocr_docs (path, signature, engine_key) VALUES (?, ?, ?)", (path, signature, engine_key)
+        ).lastrowid
+        self._conn.execute("INSERT INTO ocr_fts (rowid, body) VALUES (?, ?)", (doc_id, normalize_text(text)))
+        return True
+
+    def remove_where(self, where: str, params=()) -> int:
+        """Drop documents matching a WHERE clause over ocr_docs (path, signature, engine_key)."""
+        ids = [(i,) for (i,) in self._conn.execute(f"SELECT id FROM ocr_docs WHERE {where}", params)]
+        if ids:
+            self._conn.executemany("DELETE FROM ocr_fts WHERE rowid = ?", ids)
+            self._conn.executemany("DELETE FROM ocr_docs WHERE id = ?", ids)
+        return len(ids)
+
+    def rebuild(self) -> int:
+        """Re-index every stored result (newest per path wins)."""
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DELETE FROM ocr_fts")
+            self._conn.execute("DELETE FROM ocr_docs")
+            count = 0
+            for path, signature, engine_key, text in self._conn.execute(
+                    "SELECT path, signature, engine_key, text FROM ocr_results ORDER BY created").fetchall():
+                self.add(path, signature, engine_key, text)
+                count += 1
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if count:
+            logger.info("Indexed %d stored OCR results for search", count)
+        return count
+
+    # -------- Query --------
+    def search(self, query: str, limit: int = 100) -> List[SearchHit]:
+        """Best-ranked documents containing every word of query (see build_query)."""
+        match = build_query(query)
+        if match is None:
+            return []
+        try:
+            # walking rowids is cheap; scoring every match is not
+            broad = self._conn.execute(
+                "SELECT rowid FROM ocr_fts WHERE ocr_fts MATCH ? LIMIT 1 OFFSET ?", (match, self.RANK_MAX_MATCHES)
+            ).fetchone() is not None
+            order = "ocr_fts.rowid DESC" if broad else "bm25(ocr_fts)"
+            rows = self._conn.execute(
+                "SELECT d.path, snippet(ocr_fts, 0, '[', ']', '…', 12), bm25(ocr_fts) "
+                "FROM ocr_fts JOIN ocr_docs d ON d.id = ocr_fts.rowid "
+                f"WHERE ocr_fts MATCH ? ORDER BY {order} LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning("Search for %r (%s) failed: %s", query, match, e)
+            return []
+        return [SearchHit(*row) for row in rows]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM ocr_docs").fetchone()[0]
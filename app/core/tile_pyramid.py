@@ -0,0 +1,176 @@
+import math
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+from PIL import Image
+from app.core.image_cache import ImageCache
+from app.core.image_loader import ImageLoader
+from app.core.raster import open_image
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("TilePyramid")
+
+View = Tuple[float, float, float, float]  # left, top, right, bottom in source pixels
+
+
+class TilePyramid:
+    """
+    Multi-resolution tiles of one image, for zooming and panning without decoding or
+    resizing the whole image per step.
+
+    - Level 0 is full resolution; every next level halves both sides, down to the first
+      level that fits in a single tile. Nothing is built up front
+    - A level's pixels are produced only when one of its tiles is asked for: reduced from
+      the nearest finer level already in memory, else decoded (JPEGs via draft() at the
+      level's scale, so zoomed-out levels never need a full decode). Memory-mapped files
+      (uncompressed TIFF/BMP) cut level-0 tiles straight from the map and box-reduce
+      levels from it, so they are never decoded whole
+    - Tiles (tile_size square, edge tiles smaller) go into a byte-bounded tile LRU and
+      level images into a second one. Level 0 of a decoded file is decoded once and held by
+      the pyramid itself (not the shared ImageCache, which refuses images over its budget),
+      so the pyramid for the image on screen adds at most one full decode to those budgets
+    - render() composes only the tiles that intersect the requested view
+    """
+
+    def __init__(self, path, loader: ImageLoader, tiles: ImageCache, levels: ImageCache,
+                 tile_size: Optional[int] = None):
+        self.path = str(path)
+        self.loader = loader
+        self.tiles = tiles
+        self.levels = levels
+        self.tile_size = tile_size or config.TILE_SIZE
+        self.size = loader.image_size(path)
+        self._full: Optional[Image.Image] = None
+        self._full_lock = threading.Lock()
+        longest = max(self.size)
+        self.level_count = 1 + (math.ceil(math.log2(longest / self.tile_size)) if longest > self.tile_size else 0)
+
+    # -------- Geometry --------
+    def level_size(self, level: int) -> Tuple[int, int]:
+        factor = 1 << level
+        return -(-self.size[0] // factor), -(-self.size[1] // factor)
+
+    def level_for_scale(self, scale: float) -> int:
+        """Coarsest level that still has at least `scale` pixels per source pixel."""
+        if scale >= 1.0:
+            return 0
+        return min(self.level_count - 1, int(math.floor(math.log2(1.0 / scale))))
+
+    def tile_range(self, level: int, view: View) -> Iterator[Tuple[int, int]]:
+        """(col, row) of every tile of level that intersects view."""
+        factor = 1 << level
+        width, height = self.level_size(level)
+        t = self.tile_size
+        left, top, right, bottom = (v / factor for v in view)
+        cols = range(max(0, int(left // t)), min(-(-width // t), int(math.ceil(right / t))))
+        rows = range(max(0, int(top // t)), min(-(-height // t), int(math.ceil(bottom / t))))
+        for row in rows:
+            for col in cols:
+                yield col, row
+
+    def clamp_view(self, view: View) -> View:
+        width, height = self.size
+        left, top, right, bottom = view
+        left, top = max(0.0, left), max(0.0, top)
+        right, bottom = min(float(width), right), min(float(height), bottom)
+        if right - left < 1 or bottom - top < 1:
+            raise ValueError(f"View {view} is outside a {width}x{height} image")
+        return left, top, right, bottom
+
+    # -------- Pixels --------
+    def render(self, view: View, out_size: Tuple[int, int]) -> Image.Image:
+        """The part of the image inside view (source pixels), resampled to out_size."""
+        start = time.perf_counter()
+        view = self.clamp_view(view)
+        left, top, right, bottom = view
+        level = self.level_for_scale(min(out_size[0] / (right - left), out_size[1] / (bottom - top)))
+        factor = 1 << level
+        t = self.tile_size
+
+        cells = list(self.tile_range(level, view))
+        col0, row0 = cells[0]
+        col1, row1 = cells[-1]
+        level_w, level_h = self.level_size(level)
+        mosaic = Image.new("RGB", (min(level_w, (col1 + 1) * t) - col0 * t, min(level_h, (row1 + 1) * t) - row0 * t))
+        for col, row in cells:
+            mosaic.paste(self.tile(level, col, row), ((col - col0) * t, (row - row0) * t))
+
+        ox, oy = col0 * t, row0 * t
+        box = (left / factor - ox, top / factor - oy,
+               min(mosaic.width, right / factor - ox), min(mosaic.height, bottom / factor - oy))
+        # the level is at most 2x the output, so BILINEAR (Pillow's is area-aware) is enough
+        frame = mosaic.resize(tuple(out_size), Image.BILINEAR, box=box)
+        logger.debug("Rendered %s level %d (%d tiles) in %.1f ms", self.path, level, len(cells),
+                     (time.perf_counter() - start) * 1000)
+        return frame
+
+    def tile(self, level: int, col: int, row: int) -> Image.Image:
+        key = ("tile", self.path, self.tile_size, level, col, row)
+        tile = self.tiles.get(key)
+        if tile is None:
+            t = self.tile_size
+            width, height = self.level_size(level)
+            box = (col * t, row * t, min(width, (col + 1) * t), min(height, (row + 1) * t))
+            raster = self.loader.raster(self.path) if level == 0 else None
+            if raster is not None:
+                tile = raster.region(box)
+                tile = tile if tile.mode == "RGB" else tile.convert("RGB")
+            else:
+                tile = self.level_image(level).crop(box)
+                tile.load()
+            self.tiles.set(key, tile)
+        return tile
+
+    def level_image(self, level: int) -> Image.Image:
+        if level == 0:
+            return self._level0()
+        key = ("level", self.path, level)
+        image = self.levels.get(key)
+        if image is not None:
+            return image
+        source = self._finer_level(level)
+        if source is None:
+            raster = self.loader.raster(self.path)
+            if raster is not None:
+                source = raster.reduce(1 << level)
+                source = source if source.mode == "RGB" else source.convert("RGB")
+            else:
+                source = self._decode_for_level(level)
+        size = self.level_size(level)
+        factor = min(source.width // size[0], source.height // size[1])
+        if factor >= 2:
+            source = source.reduce(factor)
+        image = source if source.size == size else source.resize(size, Image.LANCZOS)
+        self.levels.set(key, image)
+        return image
+
+    def _finer_level(self, level: int) -> Optional[Image.Image]:
+        # nearest finer level that is already decoded; reducing it beats another decode
+        for finer in range(level - 1, 0, -1):
+            image = self.levels.get(("level", self.path, finer))
+            if image is not None:
+                return image
+        return self._full or self.loader.cache.get(self.path)
+
+    def _level0(self) -> Image.Image:
+        # the loader's copy if it already has one, else our own decode, done once
+        with self._full_lock:
+            if self._full is None:
+                cached = self.loader.cache.get(self.path)
+                if cached is not None:
+                    return cached
+                with open_image(self.path) as src:
+                    src.load()
+                    self._full = src if src.mode == "RGB" else src.convert("RGB")
+                logger.debug("Decoded level 0 of %s (%dx%d)", self.path, *self._full.size)
+            return self._full
+
+    def _decode_for_level(self, level: int) -> Image.Image:
+        with open_image(self.path) as src:
+            if src.format == "JPEG":
+                # decodes at 1/2..1/8 scale inside libjpeg, never below the requested size
+                src.draft("RGB", self.level_size(level))
+                src.load()
+                return src if src.mode == "RGB" else src.convert("RGB")
+        return self._level0()
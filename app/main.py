@@ -1,11 +1,31 @@
+import argparse
+import sys
+from app.cli import add_config_arguments, apply_config_arguments
 from app.utils.config import config
-import customtkinter as ctk
-from app.ui.photo_slider import PhotoSliderFrame
+from app.utils.exceptions import ConfigError
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=config.APP_TITLE)
+    add_config_arguments(parser)
+    try:
+        apply_config_arguments(parser.parse_args(argv))
+    except ConfigError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # GUI imports stay in here: process-pool workers re-import this module when the app
+    # starts them, and must not load customtkinter/Tk to do so
+    import customtkinter as ctk
+    from app.ui.photo_slider import PhotoSliderFrame
 
-if __name__ == "__main__":
     ctk.set_appearance_mode("dark")
     app = ctk.CTk()
     app.title("Photo Slider Test")
     frame = PhotoSliderFrame(master=app)
     app.geometry(config.WINDOW_SIZE)
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
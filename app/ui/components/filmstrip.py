@@ -0,0 +1,169 @@
+import tkinter as tk
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import customtkinter as ctk
+from PIL import Image, ImageTk
+from app.ui.style import StyleConfig
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Filmstrip")
+
+
+class _Tile:
+    """One recycled slot: a label plus a PhotoImage that thumbnails are pasted into."""
+
+    def __init__(self, master, size, on_click: Callable[["_Tile"], None]):
+        self.size = size
+        self.photo = ImageTk.PhotoImage(Image.new("RGB", size, StyleConfig.COLORS["bg"]))
+        self.label = tk.Label(master, image=self.photo, bd=0, highlightthickness=2,
+                              bg=StyleConfig.COLORS["bg"], highlightbackground=StyleConfig.COLORS["bg"])
+        self.label.bind("<Button-1>", lambda e: on_click(self))
+        self.index: Optional[int] = None
+        self.path: Optional[str] = None
+        self.loaded = False
+
+    def show(self, thumb: Optional[Image.Image]) -> None:
+        # letterbox onto a tile-sized frame so the same PhotoImage is reused for every thumbnail
+        frame = Image.new("RGB", self.size, StyleConfig.COLORS["button"])
+        if thumb is not None:
+            frame.paste(thumb, ((self.size[0] - thumb.width) // 2, (self.size[1] - thumb.height) // 2))
+        self.photo.paste(frame)
+        self.loaded = thumb is not None
+
+    def highlight(self, on: bool) -> None:
+        color = StyleConfig.COLORS["accent"] if on else StyleConfig.COLORS["bg"]
+        self.label.configure(highlightbackground=color)
+
+
+class ThumbnailStrip(ctk.CTkFrame):
+    """
+    Virtualized horizontal filmstrip over the controller's ImageIterator.
+
+    - Only as many tiles exist as fit the widget width (+1); scrolling re-binds the same
+      tiles to other indices, so widgets and PhotoImages stay constant for any folder size
+    - Thumbnails come from AppController.request_thumbnails: memory hits paint at once,
+      the rest arrive through on_thumbnail_ready
+    - Clicking a tile calls AppController.goto_image(index)
+    """
+
+    GAP = 6
+
+    def __init__(self, master, controller, tile_size=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.controller = controller
+        self.tile_size = tuple(tile_size or config.FILMSTRIP_TILE_SIZE)
+        self._first = 0
+        self._tiles: List[_Tile] = []
+        self._by_path: Dict[str, _Tile] = {}
+
+        self._track = tk.Frame(self, height=self.tile_size[1] + 4, bg=StyleConfig.COLORS["bg"])
+        self._track.pack(fill="x", expand=True)
+        self._scrollbar = ctk.CTkScrollbar(self, orientation="horizontal", command=self._on_scrollbar)
+        self._scrollbar.pack(fill="x")
+
+        self._track.bind("<Configure>", lambda e: self._layout())
+        self._bind_wheel(self._track)
+
+    # -------- Public --------
+    @property
+    def pitch(self) -> int:
+        return self.tile_size[0] + self.GAP
+
+    def total(self) -> int:
+        iterator = self.controller.iterator
+        return len(iterator) if iterator else 0
+
+    def refresh(self, reload: bool = False) -> None:
+        """Re-bind tiles after the folder changed or grew; reload=True re-requests shown thumbnails."""
+        if reload:
+            for tile in self._tiles:
+                tile.path = None
+        self._first = max(0, min(self._first, self.total() - len(self._tiles) + 1))
+        self._render()
+
+    def show_index(self, index: int) -> None:
+        """Scroll just enough to make index visible, and highlight it."""
+        visible = max(1, len(self._tiles) - 1)
+        if index < self._first:
+            self._first = index
+        elif index >= self._first + visible:
+            self._first = index - visible + 1
+        self._render()
+
+    def scroll_by(self, tiles: int) -> None:
+        self._first = max(0, min(self._first + tiles, self.total() - 1))
+        self._render()
+
+    def on_thumbnail_ready(self, path: Path, thumb: Image.Image) -> None:
+        tile = self._by_path.get(str(path))
+        if tile is not None:
+            tile.show(thumb)
+
+    # -------- Layout / rendering --------
+    def _layout(self) -> None:
+        count = max(1, self._track.winfo_width() // self.pitch + 1)
+        while len(self._tiles) < count:
+            tile = _Tile(self._track, self.tile_size, self._on_tile_click)
+            self._bind_wheel(tile.label)
+            self._tiles.append(tile)
+        while len(self._tiles) > count:
+            self._tiles.pop().label.destroy()
+        self._render()
+
+    def _render(self) -> None:
+        total = self.total()
+        iterator = self.controller.iterator
+        current = iterator.index if iterator else -1
+        self._by_path.clear()
+        wanted = []
+        for i, tile in enumerate(self._tiles):
+            index = self._first + i
+            path = iterator.path_at(index) if iterator else None
+            if path is None:
+                tile.index, tile.path = None, None
+                tile.label.place_forget()
+                continue
+            tile.label.place(x=i * self.pitch, y=0)
+            key = str(path)
+            tile.index = index
+            if tile.path != key:
+                tile.path = key
+                tile.show(None)
+            self._by_path[key] = tile
+            tile.highlight(index == current)
+            if not tile.loaded:
+                wanted.append(path)
+        if wanted:
+            for key, thumb in self.controller.request_thumbnails(wanted, self.tile_size).items():
+                self._by_path[key].show(thumb)
+        self._update_scrollbar(total)
+
+    def _update_scrollbar(self, total: int) -> None:
+        if total == 0:
+            self._scrollbar.set(0.0, 1.0)
+            return
+        visible = max(1, len(self._tiles) - 1)
+        self._scrollbar.set(self._first / total, min(1.0, (self._first + visible) / total))
+
+    # -------- Events --------
+    def _on_tile_click(self, tile: _Tile) -> None:
+        if tile.index is not None:
+            self.controller.goto_image(tile.index)
+
+    def _on_scrollbar(self, *args) -> None:
+        total = self.total()
+        if args[0] == "moveto":
+            self._first = max(0, min(int(float(args[1]) * total), total - 1))
+            self._render()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (max(1, len(self._tiles) - 1) if args[2] == "pages" else 1)
+            self.scroll_by(step)
+
+    def _on_wheel(self, event) -> None:
+        self.scroll_by(-1 if event.delta > 0 else 1)
+
+    def _bind_wheel(self, widget) -> None:
+        widget.bind("<MouseWheel>", self._on_wheel)  # Windows / macOS
+        widget.bind("<Button-4>", lambda e: self.scroll_by(-1))  # X11
+        widget.bind("<Button-5>", lambda e: self.scroll_by(1))
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import customtkinter as ctk
+from PIL import Image, ImageTk
+from app.ui.style import StyleConfig
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger("PhotoSurface")
+
+
+class PhotoSurface:
+    """
+    Shows PIL frames on a label without allocating a Tk image per frame.
+
+    - One ImageTk.PhotoImage per box size is attached to the label once; every new frame
+      is letterboxed onto a box-sized canvas and paste()d into it, so Tk updates pixels in
+      place and fitted frames of other aspect ratios do not allocate. set_box() follows the
+      viewer size; a frame larger than the box grows the canvas
+    - Frames are prepared (RGB, resized only if not already at the target size) once,
+      and the last few prepared frames are kept by key, so flipping back and forth is a
+      straight paste
+    - use_ctkimage=True goes through a single CTkImage instead (customtkinter scales it
+      for HiDPI); light and dark images are the same PIL frame, not copies
+    """
+
+    def __init__(self, label, cache_frames: Optional[int] = None, use_ctkimage: Optional[bool] = None):
+        self.label = label
+        self.cache_frames = config.DISPLAY_FRAME_CACHE if cache_frames is None else cache_frames
+        self.use_ctkimage = config.DISPLAY_USE_CTKIMAGE if use_ctkimage is None else use_ctkimage
+        self._frames: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._photo: Optional[ImageTk.PhotoImage] = None
+        self._ctk_image: Optional[ctk.CTkImage] = None
+        self._box: Optional[Tuple[int, int]] = None
+        self._canvas: Optional[Image.Image] = None  # letterboxed copy of what the PhotoImage shows
+        self._placed: Optional[Tuple[int, int, int, int]] = None  # frame's box on the canvas
+        self.current: Optional[Image.Image] = None
+
+    def set_box(self, box: Tuple[int, int]) -> None:
+        """Size of the area frames are shown in; the Tk image is reallocated on the next frame."""
+        box = (int(box[0]), int(box[1]))
+        if box != self._box:
+            self._box = box
+            self._canvas = None
+
+    def show(self, image: Image.Image, key: Hashable = None, size=None) -> Image.Image:
+        """Put image (resized to size if given) on the label. Returns the frame shown."""
+        frame = self.prepare(image, size)
+        if key is not None and self.cache_frames:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.cache_frames:
+                self._frames.popitem(last=False)
+        self._put(frame)
+        return frame
+
+    def show_cached(self, key: Hashable) -> bool:
+        """Show a previously prepared frame; False if it is not cached any more."""
+        frame = self._frames.get(key)
+        if frame is None:
+            return False
+        self._frames.move_to_end(key)
+        self._put(frame)
+        return True
+
+    def overlay(self, frame: Image.Image) -> None:
+        """Show a transient frame (e.g. the current frame with a selection drawn on it); not cached."""
+        self._put(self.prepare(frame), keep_current=True)
+
+    def frame_coords(self, event) -> Optional[Tuple[int, int]]:
+        """Mouse event position in current-frame pixels (the label centers the image), clamped."""
+        if self.current is None:
+            return None
+        w, h = self.current.size
+        if self.use_ctkimage:
+            # CTkImage is drawn at frame size x widget scaling
+            scale = self.label._get_widget_scaling()
+            x = (event.x - (event.widget.winfo_width() - w * scale) / 2) / scale
+            y = (event.y - (event.widget.winfo_height() - h * scale) / 2) / scale
+        else:
+            # the label centers the canvas, and the frame sits at _placed on it
+            canvas_w, canvas_h = self._canvas.size if self._canvas is not None else (w, h)
+            left, top = self._placed[:2] if self._placed is not None else (0, 0)
+            x = event.x - (event.widget.winfo_width() - canvas_w) / 2 - left
+            y = event.y - (event.widget.winfo_height() - canvas_h) / 2 - top
+        return min(max(int(x), 0), w - 1), min(max(int(y), 0), h - 1)
+
+    def clear_cache(self) -> None:
+        self._frames.clear()
+
+    @staticmethod
+    def prepare(image: Image.Image, size=None) -> Image.Image:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if size is not None and image.size != tuple(size):
+            image = image.resize(tuple(size), Image.BILINEAR)
+        return image
+
+    def _put(self, frame: Image.Image, keep_current: bool = False) -> None:
+        if not keep_current:
+            self.current = frame
+        # PhotoImage creation / pixel transfer into Tk
+        with metrics.span("photo_image"):
+            self._show(frame)
+
+    def _show(self, frame: Image.Image) -> None:
+        if self.use_ctkimage:
+            if self._ctk_image is None:
+                self._ctk_image = ctk.CTkImage(light_image=frame, dark_image=frame, size=frame.size)
+                self.label.configure(image=self._ctk_image, text="")
+            else:
+                self._ctk_image.configure(light_image=frame, dark_image=frame, size=frame.size)
+            return
+        canvas = self._canvas
+        if canvas is None or frame.width > canvas.width or frame.height > canvas.height:
+            box = self._box or frame.size
+            canvas = self._canvas = Image.new("RGB", (max(box[0], frame.width), max(box[1], frame.height)),
+                                              self._background())
+            self._placed = None
+            # new box size: the only time a Tk image is allocated
+            self._photo = ImageTk.PhotoImage(canvas)
+            self.label.configure(image=self._photo, text="")
+            self.label.image = self._photo  # keep ref
+            logger.debug("Display surface allocated at %dx%d", *canvas.size)
+        left, top = (canvas.width - frame.width) // 2, (canvas.height - frame.height) // 2
+        placed = (left, top, left + frame.width, top + frame.height)
+        if placed != self._placed:
+            # the previous frame had another size: clear its margins
+            canvas.paste(self._background(), (0, 0, *canvas.size))
+            self._placed = placed
+        canvas.paste(frame, placed[:2])
+        self._photo.paste(canvas)
+
+    def _background(self):
+        # the label's own background, so the letterbox margins do not show
+        try:
+            color = self.label._apply_appearance_mode(self.label.cget("bg_color"))
+            return tuple(c >> 8 for c in self.label.winfo_rgb(color))
+        except Exception:
+            return StyleConfig.COLORS["bg"]
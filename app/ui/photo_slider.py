@@ -1,12 +1,16 @@
 import os
+import time
 from pathlib import Path
 import customtkinter as ctk
-from PIL import Image, ImageTk, UnidentifiedImageError
+from PIL import Image, ImageDraw, ImageTk, UnidentifiedImageError
 from tkinter import filedialog, messagebox
 from app.utils.config import config
-from typing import Optional
+from typing import Optional, Tuple
 from app.controller.app_controller import AppController
+from app.ui.components.filmstrip import ThumbnailStrip
+from app.ui.components.photo_surface import PhotoSurface
 from app.utils.log_manager import get_logger
+from app.utils.metrics import metrics
 
 logger = get_logger("PhotoSliderUI")
 
@@ -15,9 +19,12 @@ class SimpleObserver:
     def __init__(self, status_label: ctk.CTkLabel):
         self.status_label = status_label
 
-    def update(self, current: int, total: int):
+    def update(self, current: int, total: int, page: int = 0, pages: int = 1):
         try:
-            self.status_label.configure(text=f"Image {current}/{total}")
+            text = f"Image {current}/{total}"
+            if pages > 1:
+                text += f"  ·  page {page + 1}/{pages}"
+            self.status_label.configure(text=text)
         except Exception as e:
             logger.exception("Observer update failed: %s", e)
 
@@ -25,25 +32,78 @@ class PhotoSliderFrame(ctk.CTkFrame):
     """
     Connects to AppController.
     """
+
+    # sort menu label -> ImageCatalog sort key (None keeps the order the scan found)
+    SORT_LABELS = {"Scan order": None, "Name": "name", "Date taken": "taken", "Modified": "mtime",
+                   "File size": "size", "Dimensions": "dimensions"}
+    _icon: Optional[ImageTk.PhotoImage] = None
+
     def __init__(self, master=ctk.CTk, **kwargs):
         super().__init__(master, **kwargs)
-        image_path = os.path.join(config.BASE_DIR,"..","assests","icons","images.png")
-        image = ImageTk.PhotoImage(Image.open(image_path))
+        image = self._load_icon()
         master.iconphoto(False,image)
+        # customtkinter sets its own icon shortly after start-up; put ours back (same image)
         master.after(250, lambda: master.iconphoto(False, image))
         self.controller = AppController()
-        # Set callbacks
+        # Set callbacks; workers only queue them on the controller's event bus, and
+        # _pump_events delivers them here on Tk's thread (never touch widgets off it)
         self.controller.on_images_loaded = self._on_images_loaded
+        self.controller.on_scan_progress = self._on_scan_progress
+        self.controller.on_images_arranged = self._on_images_arranged
         self.controller.on_image_changed = self._on_image_changed
+        self.controller.on_display_ready = self._on_display_ready
+        self.controller.on_view_ready = self._on_view_ready
+        self.controller.on_folder_changed = self._on_folder_changed
         self.controller.on_ocr_complete = self._on_ocr_complete
+        self.controller.on_search_results = self._on_search_results
         self.controller.on_error = self._on_error
+        self.controller.attach_dispatcher()
+        self._pump_id = self.after(config.UI_DISPATCH_MS, self._pump_events)
 
         # layout
         self.pack(fill="both", expand=True, padx=12, pady=12)
 
-        # image display area
-        self.image_label = ctk.CTkLabel(self, text="No image", width=500, height=350)
-        self.image_label.pack(pady=(0, 8))
+        # image display area: takes all spare height; images are fitted into it (aspect kept)
+        self.viewport = ctk.CTkFrame(self, height=350, fg_color="transparent")
+        self.viewport.pack(fill="both", expand=True, pady=(0, 8))
+        self.viewport.pack_propagate(False)
+        self.image_label = ctk.CTkLabel(self.viewport, text="No image", width=200, height=150)
+        self.image_label.place(relx=0.5, rely=0.5, anchor="center")
+        self._box: Tuple[int, int] = tuple(config.DISPLAY_SIZE)  # bucketed display box
+        self._base_frame: Optional[Image.Image] = None  # best-quality frame of the current image
+        self._resize_id = None
+        # animated GIFs: frames come from the controller's player, one after() per frame
+        self._player = None
+        self._anim_id = None
+        self._anim_due = 0.0
+        self.viewport.bind("<Configure>", self._on_viewport_resize, add="+")
+        # frames are pasted into one reusable Tk image; the last few are kept ready
+        self.surface = PhotoSurface(self.image_label)
+        self.surface.set_box(self._box)
+        # drag a rectangle over the image to OCR only that region
+        self._drag_start: Optional[Tuple[int, int]] = None
+        self.image_label.bind("<ButtonPress-1>", self._on_select_start, add="+")
+        self.image_label.bind("<B1-Motion>", self._on_select_drag, add="+")
+        self.image_label.bind("<ButtonRelease-1>", self._on_select_end, add="+")
+        # wheel zooms at the cursor (tile pyramid past fit size), right-drag pans,
+        # double-click toggles fit / 100%
+        self._zoom: Optional[float] = None  # screen px per source px; None = fit to viewer
+        self._center: Tuple[float, float] = (0.0, 0.0)
+        self._view: Optional[Tuple[float, float, float, float]] = None  # source rect on screen when zoomed
+        self._pan_from = None
+        for widget in (self.viewport, self.image_label):
+            widget.bind("<MouseWheel>", lambda e: self._zoom_at(e, config.ZOOM_STEP if e.delta > 0
+                                                                else 1 / config.ZOOM_STEP), add="+")
+            widget.bind("<Button-4>", lambda e: self._zoom_at(e, config.ZOOM_STEP), add="+")  # X11
+            widget.bind("<Button-5>", lambda e: self._zoom_at(e, 1 / config.ZOOM_STEP), add="+")
+        self.image_label.bind("<ButtonPress-3>", self._on_pan_start, add="+")
+        self.image_label.bind("<B3-Motion>", self._on_pan_drag, add="+")
+        self.image_label.bind("<Double-Button-1>", self._on_zoom_toggle, add="+")
+
+        # virtualized thumbnail strip: click a tile to jump to it
+        self.filmstrip = ThumbnailStrip(self, self.controller, height=config.FILMSTRIP_TILE_SIZE[1] + 24)
+        self.filmstrip.pack(fill="x", pady=(0, 6))
+        self.controller.on_thumbnail_ready = self.filmstrip.on_thumbnail_ready
 
         # controls
         controls = ctk.CTkFrame(self)
@@ -61,6 +121,29 @@ class PhotoSliderFrame(ctk.CTkFrame):
         self.ocr_btn = ctk.CTkButton(controls, text="OCR (current)", command=self._on_ocr_clicked)
         self.ocr_btn.grid(row=0, column=3, padx=6)
 
+        # sort order (header metadata, read once per file) and jump-to-file by name
+        self.sort_menu = ctk.CTkOptionMenu(controls, values=list(self.SORT_LABELS), command=self._on_sort_changed)
+        self.sort_menu.set("Scan order")
+        self.sort_menu.grid(row=1, column=0, padx=6, pady=(6, 0))
+        self.reverse_box = ctk.CTkCheckBox(controls, text="Reverse", command=self._on_sort_changed)
+        self.reverse_box.grid(row=1, column=1, padx=6, pady=(6, 0))
+        self.dedupe_box = ctk.CTkCheckBox(controls, text="Hide duplicates", command=self._on_sort_changed)
+        self.dedupe_box.grid(row=1, column=4, padx=6, pady=(6, 0))
+        self.goto_entry = ctk.CTkEntry(controls, placeholder_text="Go to file name…")
+        self.goto_entry.grid(row=1, column=2, columnspan=2, padx=6, pady=(6, 0), sticky="ew")
+        self.goto_entry.bind("<Return>", self._on_goto_name)
+
+        # full-text search over OCR'd images; Enter again steps to the next match
+        self.search_entry = ctk.CTkEntry(controls, placeholder_text="Search OCR text…")
+        self.search_entry.grid(row=2, column=0, columnspan=3, padx=6, pady=(6, 0), sticky="ew")
+        self.search_entry.bind("<Return>", self._on_search)
+        self.search_btn = ctk.CTkButton(controls, text="Find", command=self._on_search)
+        self.search_btn.grid(row=2, column=3, padx=6, pady=(6, 0))
+        self._search_query = ""
+        self._search_hits = []
+        self._hit_pos = -1
+        self._pending_hit = None  # hit whose image is being shown; described once it is
+
         # status and output
         self.status_label = ctk.CTkLabel(self, text="No images loaded.")
         self.status_label.pack(pady=(6, 4))
@@ -71,14 +154,32 @@ class PhotoSliderFrame(ctk.CTkFrame):
         # simple observer
         self.observer = SimpleObserver(self.status_label)
 
+        # performance overlay over the image (F12): span percentiles and gauges, refreshed every second
+        self.metrics_label = ctk.CTkLabel(self.viewport, text="", justify="left", anchor="nw",
+                                          font=ctk.CTkFont(family="Courier", size=11),
+                                          fg_color=("gray90", "gray15"), corner_radius=4)
+        self._metrics_id = None
+        master.bind("<F12>", self._toggle_metrics, add="+")
+        if config.METRICS_OVERLAY:
+            self._toggle_metrics()
+
+    def destroy(self):
+        self.after_cancel(self._pump_id)
+        if self._metrics_id is not None:
+            self.after_cancel(self._metrics_id)
+        if self._resize_id is not None:
+            self.after_cancel(self._resize_id)
+        self._stop_animation()
+        self.controller.shutdown()
+        super().destroy()
+
     def _on_load_clicked(self):
         folder = filedialog.askdirectory(title="Select image folder")
         if not folder:
             return
         try:
-            count = self.controller.load_folder(Path(folder))
-            if count == 0:
-                messagebox.showinfo("No images", "No images found in selected folder.")
+            self.status_label.configure(text="Scanning folder...")
+            self.controller.load_folder_async(Path(folder))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load images: {e}")
 
@@ -101,36 +202,378 @@ class PhotoSliderFrame(ctk.CTkFrame):
         self._set_text("Processing OCR...")
         started = self.controller.extract_text_async(current, callback=self._set_text)
         if not started:
-            self._set_text("OCR engine not available or already running.")
+            self._set_text("OCR engine not available.")
+
+    def _pump_events(self):
+        try:
+            with metrics.span("ui_dispatch"):
+                self.controller.dispatch()
+        except Exception as e:
+            logger.exception("Event dispatch failed: %s", e)
+        self._pump_id = self.after(config.UI_DISPATCH_MS, self._pump_events)
+
+    def _toggle_metrics(self, event=None):
+        if self._metrics_id is not None:
+            self.after_cancel(self._metrics_id)
+            self._metrics_id = None
+            self.metrics_label.place_forget()
+            return
+        if not metrics.enabled:
+            # the overlay needs samples: record from now on (exporters stay as configured)
+            metrics.enabled = True
+            logger.info("Metrics recording enabled for the overlay")
+        self.metrics_label.place(x=8, y=8, anchor="nw")
+        self._refresh_metrics()
+
+    def _refresh_metrics(self):
+        self.metrics_label.configure(text="\n".join(metrics.summary_lines()) or "No samples yet")
+        self.metrics_label.lift()
+        self._metrics_id = self.after(1000, self._refresh_metrics)
+
+    def _on_scan_progress(self, count: int):
+        if self.controller.iterator:
+            self.observer.update(self.controller.iterator.index + 1, count)
+        self.filmstrip.refresh()
+
+    def _on_sort_changed(self, *_):
+        sort = self.SORT_LABELS[self.sort_menu.get()]
+        if not self.controller.iterator:
+            return
+        self.status_label.configure(text="Sorting…")
+        hide = bool(self.dedupe_box.get())
+        if hide:
+            self.status_label.configure(text="Sorting and finding duplicates…")
+        self.controller.arrange_images(sort, reverse=bool(self.reverse_box.get()), hide_duplicates=hide)
+
+    def _on_goto_name(self, event=None):
+        name = self.goto_entry.get().strip()
+        if name and self.controller.goto_name(name) is None:
+            self.status_label.configure(text=f"No image named {name}")
+
+    def _on_images_arranged(self, count: int):
+        self.filmstrip.refresh(reload=True)
+        iterator = self.controller.iterator
+        if count == 0 or not iterator:
+            self.status_label.configure(text="No images match.")
+            return
+        self.observer.update(iterator.index + 1, count, iterator.frame, iterator.frame_count())
+        self.filmstrip.show_index(iterator.index)
+
+    # -------- Search --------
+    def _on_search(self, event=None):
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        if query == self._search_query and self._search_hits:
+            self._next_hit()
+            return
+        self._search_query, self._search_hits, self._hit_pos = query, [], -1
+        self.status_label.configure(text="Searching…")
+        self.controller.search_text_async(query)
+
+    def _on_search_results(self, query: str, hits):
+        if query != self._search_query:
+            return  # superseded by a newer search
+        self._search_hits = hits
+        if not hits:
+            self.status_label.configure(text=f"No OCR text matches “{query}”.")
+            return
+        self._next_hit()
+
+    def _next_hit(self):
+        # next match that is in the loaded folder; matches elsewhere are only counted
+        hits = self._search_hits
+        for step in range(1, len(hits) + 1):
+            pos = (self._hit_pos + step) % len(hits)
+            self._pending_hit = hits[pos]
+            if self.controller.goto_path(hits[pos].path) is not None:
+                self._hit_pos = pos
+                return
+        self._pending_hit = None
+        self.status_label.configure(
+            text=f"{len(hits)} matches, none in the loaded folder (first: {Path(hits[0].path).name})")
+
+    def _show_hit(self, hit):
+        self.status_label.configure(
+            text=f"Match {self._hit_pos + 1}/{len(self._search_hits)}: {Path(hit.path).name} — {hit.snippet}")
+        # the stored OCR text comes straight back from the result store
+        self.controller.extract_text_async(self.controller.current_image(), callback=self._set_text)
 
     def _on_images_loaded(self, count: int):
+        self.filmstrip.refresh()
+        if count == 0:
+            self.status_label.configure(text="No images loaded.")
+            messagebox.showinfo("No images", "No images found in selected folder.")
+            return
         self._set_text(f"Loaded {count} images.")
         # update observer display (1/total if available)
         if self.controller.current_image():
             total = len(self.controller.iterator)
-            current_index = (self.controller.iterator._index + 1) if self.controller.iterator else 0
+            current_index = (self.controller.iterator.index + 1) if self.controller.iterator else 0
             self.observer.update(current_index, total)
 
+    def _on_folder_changed(self, summary: dict):
+        # the watcher already updated the iterator; drop frames of changed files and re-bind tiles
+        if summary["removed"] or summary["modified"]:
+            self.surface.clear_cache()
+        self.filmstrip.refresh(reload=bool(summary["modified"]))
+        parts = [f"{summary[k]} {k}" for k in ("added", "removed", "modified", "renamed") if summary[k]]
+        if parts:
+            self.status_label.configure(text=f"Folder changed: {', '.join(parts)} ({summary['total']} images)")
+
     def _on_image_changed(self, path: Path):
         try:
-            # load and show resized image
-            pil = Image.open(path)
-            pil = pil.resize((700, 450), Image.LANCZOS)
-            photo = ImageTk.PhotoImage(pil)
-            self.image_label.configure(image=photo, text="")
-            self.image_label.image = photo  # keep ref
+            # show the resized image (a recently shown one is pasted straight from the surface cache)
+            self._drag_start = None
+            self._zoom, self._view = None, None
+            self._show_fit(path)
+            self._start_animation(path)
             # update observer label
-            total = len(self.controller.iterator) if self.controller.iterator else 0
-            cur = (self.controller.iterator._index + 1) if self.controller.iterator else 0
-            self.observer.update(cur, total)
+            iterator = self.controller.iterator
+            total = len(iterator) if iterator else 0
+            cur = (iterator.index + 1) if iterator else 0
+            if iterator:
+                self.observer.update(cur, total, iterator.frame, iterator.frame_count())
+            else:
+                self.observer.update(cur, total)
+            if self.controller.iterator:
+                self.filmstrip.show_index(self.controller.iterator.index)
             # clear OCR box
             self._set_text("")
+            hit, self._pending_hit = self._pending_hit, None
+            if hit is not None:
+                self._show_hit(hit)
         except UnidentifiedImageError:
             self._set_text("Unable to open image (unidentified).")
         except Exception as e:
             logger.exception("Failed to display image: %s", e)
             self._set_text(f"Failed to display: {e}")
 
+    # -------- Resizing --------
+    def _on_viewport_resize(self, event):
+        box = (event.width, event.height)
+        if min(box) < config.DISPLAY_SIZE_BUCKET:
+            return
+        current = self.controller.current_image()
+        if current is not None and self._base_frame is not None and self._zoom is None:
+            # while the window is being dragged: stretch what is on screen (cheap BILINEAR)
+            try:
+                size = self.controller.image_loader.fit_size(self.controller.image_loader.image_size(current), box)
+                if size != self.surface.current.size:
+                    self.surface.show(self._base_frame, size=size)
+            except Exception as e:
+                logger.debug("Live resize skipped: %s", e)
+        # once it stops for RESIZE_DEBOUNCE_MS, re-render properly for the new size
+        if self._resize_id is not None:
+            self.after_cancel(self._resize_id)
+        self._resize_id = self.after(config.RESIZE_DEBOUNCE_MS, lambda: self._apply_box(box))
+
+    def _apply_box(self, box: Tuple[int, int]):
+        self._resize_id = None
+        self._box = self.controller.set_display_box(box)
+        self.surface.set_box(self._box)
+        current = self.controller.current_image()
+        if current is None:
+            return
+        if self._zoom is not None:
+            self._render_zoom()
+            return
+        if self._player is not None:
+            self._start_animation(current)  # frames for the new size
+            return
+        key = (str(current), self._box)
+        if self.surface.show_cached(key):
+            self._base_frame = self.surface.current
+        else:
+            self.controller.render_display_async(current, self._box)
+
+    def _on_display_ready(self, path: Path, box: Tuple[int, int], frame: Image.Image):
+        current = self.controller.current_image()
+        if current is None or str(current) != str(path) or tuple(box) != self._box or self._zoom is not None:
+            return  # the user moved on, resized again or zoomed in
+        self.surface.show(frame, key=(str(path), self._box))
+        self._base_frame = self.surface.current
+
+    def _show_fit(self, path: Path):
+        # the fitted frame (a recently shown one is pasted straight from the surface cache)
+        key = (str(path), self._box)
+        if not self.surface.show_cached(key):
+            pil = self.controller.get_display_image(path, self._box)
+            self.surface.show(pil, key=key)
+        self._base_frame = self.surface.current
+
+    # -------- Animation --------
+    def _start_animation(self, path: Path):
+        self._stop_animation()
+        self._player = self.controller.play_animation(path, self._box)
+        if self._player is not None:
+            self._anim_due = time.monotonic()
+            self._anim_id = self.after(1, self._animate)
+
+    def _stop_animation(self):
+        if self._anim_id is not None:
+            self.after_cancel(self._anim_id)
+            self._anim_id = None
+        if self._player is not None:
+            self.controller.stop_animation()
+            self._player = None
+
+    def _animate(self):
+        self._anim_id = None
+        player = self._player
+        if player is None or not player.running:
+            return
+        frame = player.next_frame()
+        if frame is None:
+            # decoder is behind: try again shortly, the frame is simply late
+            self._anim_id = self.after(10, self._animate)
+            return
+        image, duration = frame
+        self.surface.show(image)
+        # schedule from when the frame was due, not from now, so timing does not drift
+        now = time.monotonic()
+        self._anim_due = max(self._anim_due + duration / 1000.0, now)
+        self._anim_id = self.after(max(1, int((self._anim_due - now) * 1000)), self._animate)
+
+    # -------- Zoom / pan --------
+    def _source_point(self, event) -> Optional[Tuple[float, float]]:
+        """Mouse position in source-image pixels."""
+        xy = self.surface.frame_coords(event)
+        current = self.controller.current_image()
+        if xy is None or current is None:
+            return None
+        fw, fh = self.surface.current.size
+        left, top, right, bottom = self._view or (0, 0, *self.controller.image_loader.image_size(current))
+        return left + xy[0] * (right - left) / fw, top + xy[1] * (bottom - top) / fh
+
+    def _fit_scale(self, size: Tuple[int, int]) -> float:
+        width, height = max(1, self.viewport.winfo_width()), max(1, self.viewport.winfo_height())
+        return min(width / size[0], height / size[1], 1.0)
+
+    def _zoom_at(self, event, factor: float):
+        current = self.controller.current_image()
+        if current is None:
+            return
+        size = self.controller.image_loader.image_size(current)
+        fit = self._fit_scale(size)
+        old = self._zoom or fit
+        zoom = min(old * factor, config.ZOOM_MAX)
+        if zoom <= fit * 1.001:
+            if self._zoom is not None:
+                self._zoom, self._view = None, None
+                self._show_fit(current)
+            return
+        # keep the pixel under the cursor where it is
+        center = self._center if self._view else (size[0] / 2, size[1] / 2)
+        point = self._source_point(event) or center
+        self._center = (point[0] + (center[0] - point[0]) * old / zoom,
+                        point[1] + (center[1] - point[1]) * old / zoom)
+        self._zoom = zoom
+        self._stop_animation()
+        self._render_zoom()
+
+    def _on_zoom_toggle(self, event):
+        current = self.controller.current_image()
+        if current is None:
+            return
+        if self._zoom is not None:
+            self._zoom, self._view = None, None
+            self._show_fit(current)
+            return
+        point = self._source_point(event)
+        if point is None or self._fit_scale(self.controller.image_loader.image_size(current)) >= 1.0:
+            return  # already shown at full size
+        self._zoom, self._center = 1.0, point
+        self._stop_animation()
+        self._render_zoom()
+
+    def _on_pan_start(self, event):
+        self._pan_from = (event.x, event.y, self._center)
+
+    def _on_pan_drag(self, event):
+        if self._zoom is None or self._pan_from is None:
+            return
+        x0, y0, (cx, cy) = self._pan_from
+        self._center = (cx - (event.x - x0) / self._zoom, cy - (event.y - y0) / self._zoom)
+        self._render_zoom()
+
+    def _render_zoom(self):
+        """Ask for the tiles under the viewer at the current zoom and center (clamped to the image)."""
+        current = self.controller.current_image()
+        if current is None or self._zoom is None:
+            return
+        width, height = self.controller.image_loader.image_size(current)
+        zoom = self._zoom
+        half_w = min(width, self.viewport.winfo_width() / zoom) / 2
+        half_h = min(height, self.viewport.winfo_height() / zoom) / 2
+        cx = min(max(self._center[0], half_w), width - half_w)
+        cy = min(max(self._center[1], half_h), height - half_h)
+        self._center = (cx, cy)
+        self._view = (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+        out_size = (max(1, round(2 * half_w * zoom)), max(1, round(2 * half_h * zoom)))
+        self.controller.render_view_async(current, self._view, out_size)
+        self.status_label.configure(text=f"Zoom {zoom * 100:.0f}%")
+
+    def _on_view_ready(self, path: Path, view, frame: Image.Image):
+        current = self.controller.current_image()
+        if self._zoom is None or current is None or str(current) != str(path) or view != self._view:
+            return  # superseded by a newer zoom/pan or a fit
+        self.surface.show(frame)
+
+    @classmethod
+    def _load_icon(cls) -> ImageTk.PhotoImage:
+        # read and converted once per process, however often the frame is rebuilt
+        if cls._icon is None:
+            image_path = os.path.join(config.BASE_DIR,"..","assests","icons","images.png")
+            with Image.open(image_path) as icon:
+                cls._icon = ImageTk.PhotoImage(icon)
+        return cls._icon
+
+    # -------- Region selection --------
+    def _selection_box(self, event) -> Optional[Tuple[int, int, int, int]]:
+        end = self.surface.frame_coords(event)
+        if self._drag_start is None or end is None:
+            return None
+        (x0, y0), (x1, y1) = self._drag_start, end
+        return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+    def _on_select_start(self, event):
+        self._drag_start = self.surface.frame_coords(event)
+
+    def _on_select_drag(self, event):
+        box = self._selection_box(event)
+        if box is None:
+            return
+        framed = self.surface.current.copy()
+        ImageDraw.Draw(framed).rectangle(box, outline=(255, 0, 0), width=2)
+        self.surface.overlay(framed)
+
+    def _on_select_end(self, event):
+        box = self._selection_box(event)
+        self._drag_start = None
+        if box is None:
+            return
+        left, top, right, bottom = box
+        if right - left < 5 or bottom - top < 5:
+            # a click, not a drag: drop the selection
+            self.surface.overlay(self.surface.current)
+            return
+        current = self.controller.current_image()
+        if not current:
+            return
+        w, h = self.surface.current.size
+        region = (left / w, top / h, (right + 1) / w, (bottom + 1) / h)
+        if self._view is not None:
+            # zoomed in: the frame shows only the view rectangle of the image
+            vl, vt, vr, vb = self._view
+            sw, sh = self.controller.image_loader.image_size(current)
+            region = ((vl + region[0] * (vr - vl)) / sw, (vt + region[1] * (vb - vt)) / sh,
+                      (vl + region[2] * (vr - vl)) / sw, (vt + region[3] * (vb - vt)) / sh)
+        self._set_text("Processing OCR (selection)...")
+        started = self.controller.extract_text_async(current, callback=self._set_text, region=region)
+        if not started:
+            self._set_text("OCR engine not available.")
+
     def _on_ocr_complete(self, text: str):
         self._set_text(text or "No text found.")
 
@@ -1,11 +1,386 @@
+import difflib
 import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from app.utils.exceptions import ConfigError
+
 
 class Config:
-    ENGINE_CONFIG = "--psm 6 --oem 3",
+    """
+    Application settings. Every UPPER_CASE attribute below is a knob whose default also
+    fixes its type; load() layers a TOML/YAML file, IMAGE_SLIDER_<KNOB> environment
+    variables and command-line overrides on top (see "Layered loading" below).
+    The module-level config holds the defaults until an entry point calls load(), so
+    importing this module never fails on a bad file or variable.
+    """
+
+    # Tesseract languages ("eng+fas"), page segmentation / engine modes and extra options
+    # (ENGINE_CONFIG is built from these)
+    OCR_LANG = "eng+fas"
+    OCR_PSM = 6
+    OCR_OEM = 3
+    OCR_EXTRA_OPTIONS = ""
     APP_TITLE = "Photo Slider with OCR"
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    WINDOW_SIZE = "800x600"
-    TESSERACT_CMD = 'C:/Program Files/Tesseract-OCR/tesseract.exe'
-    TESSDATA_DIR = r'--tessdata-dir "C:\Program Files\Tesseract-OCR\tessdata"'
-    
+    WINDOW_SIZE = "800x720"
+    # Tesseract binary; when this path does not exist, "tesseract" is looked up on PATH
+    TESSERACT_CMD = "C:/Program Files/Tesseract-OCR/tesseract.exe" if os.name == "nt" else "tesseract"
+    # tessdata folder; None keeps TESSDATA_PREFIX from the environment, else the folder
+    # next to the binary (Windows installer layout), else tesseract's built-in default
+    TESSDATA_DIR = None
+
+    # Memory budget for decoded images held by ImageCache
+    IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    # Decode scale policy for display frames and thumbnails: JPEGs decode at 1/2..1/8 scale
+    # inside libjpeg (DECODE_DRAFT), images at least DECODE_REDUCE_MIN_FACTOR times the
+    # target are box-reduced first (0 never), and DECODE_RESAMPLE does the final resize
+    DECODE_DRAFT = True
+    DECODE_REDUCE_MIN_FACTOR = 2
+    DECODE_RESAMPLE = "lanczos"
+
+    # Display frame size and background prefetch window (images ahead/behind the cursor)
+    DISPLAY_SIZE = (700, 450)
+    # Initial display box; the viewer then fits images (aspect kept) into its actual size,
+    # rounded down to DISPLAY_SIZE_BUCKET px so nearby sizes share cached renditions
+    DISPLAY_SIZE_BUCKET = 32
+    # Quiet time after the last <Configure> before re-rendering at full quality (ms)
+    RESIZE_DEBOUNCE_MS = 150
+    # Prepared display frames kept by the UI for instant back/forward, and whether to show
+    # them through CTkImage (HiDPI scaling) instead of a plain PhotoImage
+    DISPLAY_FRAME_CACHE = 6
+    DISPLAY_USE_CTKIMAGE = False
+    # Uncompressed TIFF/BMP are read through a read-only mmap (no full decode + copy);
+    # up to MMAP_OPEN_FILES maps stay open. Pages of these extensions are stepped through
+    MMAP_UNCOMPRESSED = True
+    MMAP_OPEN_FILES = 16
+    MULTI_FRAME_EXTENSIONS = (".tif", ".tiff")
+    # Animated files play instead of paging; only ANIMATION_RING_FRAMES decoded frames are held
+    ANIMATED_EXTENSIONS = (".gif",)
+    ANIMATION_RING_FRAMES = 8
+    ANIMATION_MIN_FRAME_MS = 20
+    # Zoom/pan: the image is cut into TILE_SIZE px tiles per pyramid level; tiles and
+    # reduced levels are kept in their own byte-bounded LRUs (full decodes use the image cache)
+    TILE_SIZE = 256
+    TILE_CACHE_BYTES = 96 * 1024 * 1024
+    PYRAMID_LEVEL_BYTES = 192 * 1024 * 1024
+    ZOOM_STEP = 1.25
+    ZOOM_MAX = 8.0
+    PREFETCH_AHEAD = 3
+    PREFETCH_BEHIND = 1
+    PREFETCH_WORKERS = 2
+
+    # Persistent display/thumbnail renditions (SQLite) reused across sessions
+    PREVIEW_STORE_ENABLED = True
+    PREVIEW_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "image_slider", "previews.sqlite3")
+    PREVIEW_STORE_MAX_BYTES = 1024 * 1024 * 1024
+    THUMBNAIL_SIZE = (128, 128)
+    # Filmstrip tiles under the main image
+    FILMSTRIP_TILE_SIZE = (96, 72)
+
+    # Header metadata (size, EXIF capture time) for sorting/filtering, read on this many
+    # threads and persisted so each file version is read once
+    CATALOG_ENABLED = True
+    CATALOG_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "image_slider", "catalog.sqlite3")
+    CATALOG_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+    # Near-duplicate detection: perceptual hashes from reduced decodes (persisted in the
+    # catalog), grouped when their pHashes differ in at most this many of 64 bits.
+    # DUPLICATE_REUSE_OCR answers OCR for an image from an identical-hash copy's stored text
+    HASH_WORKERS = os.cpu_count() or 1
+    DUPLICATE_MAX_DISTANCE = 6
+    DUPLICATE_REUSE_OCR = True
+
+    # Folder scanning: paths are streamed to the iterator in batches of this size
+    SCAN_BATCH_SIZE = 256
+    SCAN_RECURSIVE = False
+
+    # Batch OCR process pool size
+    OCR_WORKERS = os.cpu_count() or 1
+    # How pool workers start: "auto" forks them from a server process that has the OCR
+    # modules imported already (forkserver, where the platform has it), else "spawn"
+    OCR_WORKER_START = "auto"
+    # Initialized tesseract API handles kept warm by the "tesserocr" engine
+    OCR_API_POOL_SIZE = 2
+
+    # OCR preprocessing (app/core/preprocess.py); an empty tuple disables it
+    OCR_PREPROCESS_STAGES = ("grayscale", "crop", "deskew", "rescale", "binarize")
+    OCR_TARGET_X_HEIGHT = 20
+    OCR_TARGET_DPI = 300
+    OCR_BINARIZE_WINDOW = 31
+    OCR_BINARIZE_K = 0.2
+    OCR_DESKEW_MAX_ANGLE = 10.0
+
+    # Large pages are split into text blocks ("auto") or overlapping bands ("tiles") and
+    # OCR'd in parallel (app/core/region_ocr.py); "off" always sends the whole page
+    OCR_REGION_MODE = "auto"
+    OCR_REGION_MIN_PIXELS = 6_000_000
+    OCR_REGION_MAX_PIXELS = 2_000_000
+    OCR_REGION_WORKERS = min(4, os.cpu_count() or 1)
+    OCR_TILE_HEIGHT = 2048
+    OCR_TILE_OVERLAP = 128
+
+    # Interactive OCR job queue: worker threads, per-job timeout (s, counted from the job's
+    # start; 0 disables), and how many images past the current one are OCR'd
+    # speculatively into the store (0 disables)
+    OCR_JOB_WORKERS = 2
+    OCR_JOB_TIMEOUT = 120.0
+    OCR_PREFETCH_AHEAD = 1
+    # Watch the loaded folder and apply adds/removes/renames in place: inotify on Linux
+    # ("auto"/"inotify"), else polling directory mtimes every WATCH_POLL_SECONDS ("poll").
+    # WATCH_AUTO_OCR queues background OCR (into the result store) for new arrivals
+    WATCH_FOLDER = True
+    WATCH_MODE = "auto"
+    WATCH_POLL_SECONDS = 2.0
+    WATCH_DEBOUNCE_MS = 300
+    WATCH_AUTO_OCR = False
+    # Batch OCR reads every page of multi-page files (one record per "<file>#N")
+    OCR_ALL_PAGES = True
+    # How often the UI drains the controller's event bus, and the time slice per drain (ms)
+    UI_DISPATCH_MS = 16
+    UI_DISPATCH_BUDGET_MS = 8
+
+    # Persistent OCR results keyed by image content + engine settings
+    OCR_STORE_ENABLED = True
+    OCR_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "image_slider", "ocr_results.sqlite3")
+    # Full-text index over stored OCR results (FTS5, same database), and hits per search
+    OCR_SEARCH_ENABLED = True
+    SEARCH_RESULT_LIMIT = 200
+
+    # Logging: level for every module's logger, and an optional log file next to the console
+    LOG_LEVEL = "DEBUG"
+    LOG_FILE = None
+    # Performance metrics (app/utils/metrics.py): timing spans with p50/p95/p99, counters and
+    # cache/queue gauges. Off by default (near-zero cost); when on, optionally written to
+    # METRICS_FILE every METRICS_FILE_INTERVAL s (.json, or .prom for Prometheus text),
+    # served on http://127.0.0.1:METRICS_PORT/metrics (0 = off), and shown as an overlay
+    # in the viewer (METRICS_OVERLAY; F12 toggles it)
+    METRICS_ENABLED = False
+    METRICS_FILE = None
+    METRICS_FILE_INTERVAL = 10.0
+    METRICS_PORT = 0
+    METRICS_OVERLAY = False
+
+    def __init__(self):
+        self._sources: Dict[str, str] = {}
+        self.config_file: Optional[Path] = None
+
+    @property
+    def ENGINE_CONFIG(self) -> str:
+        """Tesseract option string, e.g. "--psm 6 --oem 3"."""
+        return f"--psm {self.OCR_PSM} --oem {self.OCR_OEM} {self.OCR_EXTRA_OPTIONS}".strip()
+
+    # -------- Layered loading --------
+    @classmethod
+    def keys(cls) -> List[str]:
+        """Every settable knob, in declaration order."""
+        return [k for k, v in vars(cls).items()
+                if k.isupper() and k not in _DERIVED and not isinstance(v, property)]
+
+    def load(self, path=None, env: Optional[Mapping[str, str]] = None,
+             overrides: Optional[Mapping[str, Any]] = None) -> "Config":
+        """
+        Reset to the defaults, then apply in order (later wins):
+
+        - the config file: path, else $IMAGE_SLIDER_CONFIG, else the first of
+          ~/.config/image_slider/config.{toml,yaml,yml} that exists
+        - IMAGE_SLIDER_<KNOB> environment variables
+        - overrides (command-line --set KNOB=VALUE, see parse_overrides)
+
+        Each layer is validated as a whole before any of it is applied; errors raise ConfigError.
+        """
+        env = os.environ if env is None else env
+        for key in self.keys():
+            self.__dict__.pop(key, None)
+        self._sources.clear()
+        self.config_file = _find_config_file(path or env.get(_ENV_PREFIX + "CONFIG"))
+        if self.config_file is not None:
+            self.apply(read_config_file(self.config_file), str(self.config_file))
+        self.apply({k[len(_ENV_PREFIX):]: v for k, v in env.items()
+                    if k.startswith(_ENV_PREFIX) and k != _ENV_PREFIX + "CONFIG"}, "environment")
+        if overrides:
+            self.apply(overrides, "command line")
+        return self
+
+    def apply(self, values: Mapping[str, Any], source: str = "code") -> None:
+        """Validate values (knob -> value; nested tables join into knob names) and set them."""
+        parsed = {}
+        for name, value in _flatten(values).items():
+            key = name.upper()
+            if key in _DERIVED:
+                raise ConfigError(f"{key} cannot be set ({_DERIVED[key]})", {"source": source})
+            if key not in self.keys():
+                close = difflib.get_close_matches(key, self.keys(), n=1)
+                hint = f"; did you mean {close[0]}?" if close else ""
+                raise ConfigError(f"Unknown setting {name!r}{hint}", {"source": source})
+            parsed[key] = _coerce(key, value, getattr(type(self), key), source)
+        for key, value in parsed.items():
+            setattr(self, key, value)
+            self._sources[key] = source
+
+    def source(self, key: str) -> str:
+        """Where a knob's current value came from ("default", a file path, "environment", ...)."""
+        return self._sources.get(key.upper(), "default")
+
+    def changed(self) -> Dict[str, Any]:
+        """Knobs that differ from their defaults (however they were set), e.g. to hand to worker processes."""
+        return {k: getattr(self, k) for k in self.keys() if k in self.__dict__}
+
+
+# -------- Schema --------
+_ENV_PREFIX = "IMAGE_SLIDER_"
+_CONFIG_DIR = Path("~/.config/image_slider")
+_DERIVED = {"BASE_DIR": "location of the package", "ENGINE_CONFIG": "set OCR_PSM, OCR_OEM, OCR_EXTRA_OPTIONS"}
+# type of knobs whose default is None
+_OPTIONAL = {"TESSDATA_DIR": str, "LOG_FILE": str, "METRICS_FILE": str}
+_CHOICES = {
+    "DECODE_RESAMPLE": ("lanczos", "bicubic", "bilinear", "nearest"),
+    "OCR_REGION_MODE": ("auto", "tiles", "off"),
+    "OCR_WORKER_START": ("auto", "forkserver", "spawn"),
+    "WATCH_MODE": ("auto", "inotify", "poll"),
+    "LOG_LEVEL": ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+    "OCR_PREPROCESS_STAGES": ("grayscale", "crop", "deskew", "rescale", "binarize"),
+}
+# (minimum, maximum) inclusive; other numbers must be >= 0 (0 disables a timeout), and
+# counts, sizes and byte budgets (see _POSITIVE) >= 1
+_RANGES = {
+    "OCR_PSM": (0, 13),
+    "OCR_OEM": (0, 3),
+    "ZOOM_STEP": (1.0, None),
+    "ZOOM_MAX": (1.0, None),
+    "DISPLAY_SIZE_BUCKET": (1, None),
+    "OCR_BINARIZE_K": (0.0, 1.0),
+    "WATCH_POLL_SECONDS": (0.1, None),
+    "UI_DISPATCH_MS": (1, None),  # 0 would make the Tk after() drain loop spin
+    "METRICS_FILE_INTERVAL": (0.5, None),
+    "METRICS_PORT": (0, 65535),
+}
+_POSITIVE = re.compile(r"_(WORKERS|BYTES|SIZE|FILES|FRAMES|HEIGHT|WINDOW)$")
+_OCR_LANG = re.compile(r"^[A-Za-z0-9_]+(\+[A-Za-z0-9_]+)*$")
+_BYTES = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+def parse_overrides(items: Iterable[str]) -> Dict[str, str]:
+    """Command-line ["OCR_WORKERS=8", "thumbnail_size=256x256"] -> {knob: raw value}."""
+    result = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            raise ConfigError(f"Expected KNOB=VALUE, got {item!r}")
+        result[key.strip()] = value.strip()
+    return result
+
+
+def read_config_file(path) -> Dict[str, Any]:
+    """Settings from a .toml or .yaml/.yml file (YAML needs PyYAML)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    try:
+        if suffix == ".toml":
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                import tomli as tomllib
+            with open(path, "rb") as fh:
+                data = tomllib.load(fh)
+        elif suffix in (".yaml", ".yml"):
+            import yaml
+            with open(path, encoding="utf-8") as fh:
+                data = yaml.safe_load(fh) or {}
+        else:
+            raise ConfigError(f"Config file must be .toml, .yaml or .yml: {path}")
+    except ConfigError:
+        raise
+    except Exception as e:  # missing parser, unreadable file, syntax error
+        raise ConfigError(f"Cannot read {path}: {e}")
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path} must hold a table of settings")
+    return data
+
+
+def _find_config_file(path) -> Optional[Path]:
+    if path:
+        path = Path(path).expanduser()
+        if not path.is_file():
+            raise ConfigError(f"Config file not found: {path}")
+        return path
+    for name in ("config.toml", "config.yaml", "config.yml"):
+        candidate = (_CONFIG_DIR / name).expanduser()
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _flatten(values: Mapping[str, Any], prefix: str = "") -> Dict[str, Any]:
+    # [ocr] workers = 8  ->  OCR_WORKERS = 8
+    flat = {}
+    for key, value in values.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, Mapping):
+            flat.update(_flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _coerce(key: str, value: Any, default: Any, source: str) -> Any:
+    """value (typed, or a string from the environment/command line) as the knob's type, checked."""
+    kind = _OPTIONAL.get(key) or type(default)
+
+    def fail(expected: str) -> ConfigError:
+        return ConfigError(f"{key}: expected {expected}, got {value!r}", {"source": source})
+
+    if key in _OPTIONAL and (value is None or value == ""):
+        return None
+    if kind is tuple:
+        item_default = default[0] if default else ""
+        # "700x450" / "700,450" for sizes, ".tif, .tiff" for names
+        separators = r"[\s,x]+" if isinstance(item_default, int) else r"[\s,]+"
+        items = value if isinstance(value, (list, tuple)) else [v for v in re.split(separators, str(value)) if v]
+        if isinstance(item_default, int) and len(items) != len(default):
+            raise fail(f"{len(default)} numbers (e.g. {'x'.join(map(str, default))})")
+        return tuple(_coerce(key, v, item_default, source) for v in items)
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE or text in _FALSE:
+            return text in _TRUE
+        raise fail("true/false")
+    if kind in (int, float):
+        if isinstance(value, bool):
+            raise fail("a number")
+        try:
+            if isinstance(value, str) and key.endswith("_BYTES") and _BYTES.match(value):
+                number, unit = _BYTES.match(value).groups()
+                result = float(number) * 1024 ** " kmgt".index(unit.lower() or " ")
+            else:
+                result = float(str(value).replace("_", "")) if isinstance(value, str) else float(value)
+        except ValueError:
+            raise fail("a number" + (" or a size like 512MB" if key.endswith("_BYTES") else ""))
+        if kind is int:
+            if result != int(result):
+                raise fail("a whole number")
+            result = int(result)
+        low, high = _RANGES.get(key, (1 if _POSITIVE.search(key) else 0, None))
+        if result < low or (high is not None and result > high):
+            raise fail(f"a number in [{low}, {'...' if high is None else high}]")
+        return result
+    # strings
+    if key == "OCR_LANG" and isinstance(value, (list, tuple)):
+        value = "+".join(map(str, value))
+    if not isinstance(value, str):
+        raise fail("a string")
+    if key == "LOG_LEVEL":
+        value = value.upper()
+    if key in _CHOICES and value not in _CHOICES[key]:
+        raise fail(" | ".join(_CHOICES[key]))
+    if key == "OCR_LANG" and not _OCR_LANG.match(value):
+        raise fail('languages like "eng+fas"')
+    if key.endswith(("_PATH", "_DIR", "_FILE")):
+        value = os.path.expanduser(value)
+    return value
+
+
 config = Config()
\ No newline at end of file
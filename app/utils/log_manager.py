@@ -1,8 +1,18 @@
 import logging
+import os
 from threading import Lock
+from app.utils.config import config
 
 
 class LogManager:
+    """
+    Process-wide logging setup (thread-safe singleton).
+
+    - One formatter and console handler (plus a LOG_FILE handler when set) are shared by
+      every logger handed out, so each module's records carry its own name
+    - Level comes from config.LOG_LEVEL; configure() re-applies it (and LOG_FILE) after the
+      settings were re-layered, e.g. by command-line flags
+    """
     _instance = None
     _lock = Lock()
     _initialized = False
@@ -15,7 +25,7 @@ class LogManager:
                     cls._instance = super(LogManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, name="AppLogger"):
+    def __init__(self):
         """Initialize logging only once."""
         if LogManager._initialized:
             return
@@ -24,33 +34,68 @@ class LogManager:
             if LogManager._initialized:
                 return
 
-            # Create logger using string name
-            self.logger = logging.getLogger(name)
-            self.logger.setLevel(logging.DEBUG)
-
             # Formatter
-            formatter = logging.Formatter(
+            self.formatter = logging.Formatter(
                 "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
 
             # Console handler
             console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.DEBUG)
-            console_handler.setFormatter(formatter)
-
-            # Add handler only once
-            if not self.logger.handlers:
-                self.logger.addHandler(console_handler)
+            console_handler.setFormatter(self.formatter)
+            self.handlers = [console_handler]
+            self._file_handler = None
+            self._loggers = {}
+            self._apply()
 
             LogManager._initialized = True
 
-    def get_logger(self):
-        return self.logger
+    def get_logger(self, name="AppLogger") -> logging.Logger:
+        with LogManager._lock:
+            logger = self._loggers.get(name)
+            if logger is None:
+                logger = logging.getLogger(name)
+                logger.setLevel(config.LOG_LEVEL)
+                # Add handlers only once
+                for handler in self.handlers:
+                    if handler not in logger.handlers:
+                        logger.addHandler(handler)
+                logger.propagate = False
+                self._loggers[name] = logger
+            return logger
+
+    def configure(self) -> None:
+        """Re-apply LOG_LEVEL and LOG_FILE to every logger handed out so far."""
+        with LogManager._lock:
+            self._apply()
+
+    def _apply(self) -> None:
+        # caller holds the lock (or is __init__)
+        wanted = os.path.abspath(config.LOG_FILE) if config.LOG_FILE else None
+        current = self._file_handler.baseFilename if self._file_handler else None
+        if wanted != current:
+            if self._file_handler:
+                self.handlers.remove(self._file_handler)
+                self._file_handler.close()
+                self._file_handler = None
+            if wanted:
+                self._file_handler = logging.FileHandler(wanted, encoding="utf-8")
+                self._file_handler.setFormatter(self.formatter)
+                self.handlers.append(self._file_handler)
+        for handler in self.handlers:
+            handler.setLevel(config.LOG_LEVEL)
+        for logger in self._loggers.values():
+            logger.setLevel(config.LOG_LEVEL)
+            for handler in list(logger.handlers):
+                if handler not in self.handlers:
+                    logger.removeHandler(handler)
+            for handler in self.handlers:
+                if handler not in logger.handlers:
+                    logger.addHandler(handler)
+
 
 def get_logger(name="AppLogger"):
     """
-    Returns a global logger instance with custom name support.
+    Returns the logger of that name, sharing the application's handlers and level.
     """
-    manager = LogManager(name)
-    return manager.get_logger()
+    return LogManager().get_logger(name)
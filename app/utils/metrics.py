@@ -0,0 +1,313 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from app.utils.config import config
+from app.utils.log_manager import get_logger
+
+logger = get_logger("Metrics")
+
+# -------- Histograms --------
+# Fixed log-spaced buckets from 0.05 ms to ~2 min (each 15% wider than the last): recording
+# is one bisect and an increment, and percentiles are interpolated within a bucket (a few % error)
+_BOUNDS = tuple(0.00005 * 1.15 ** i for i in range(106))
+_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Latency distribution of one span: count, sum, max and bucketed percentiles (seconds)."""
+
+    __slots__ = ("count", "total", "max", "_buckets", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = [0] * (len(_BOUNDS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect_left(_BOUNDS, seconds)
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self._buckets[i] += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            count, buckets, top = self.count, list(self._buckets), self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            if n and seen + n >= rank:
+                low = _BOUNDS[i - 1] if i else 0.0
+                high = _BOUNDS[i] if i < len(_BOUNDS) else top
+                return min(top, low + (high - low) * (rank - seen) / n)
+            seen += n
+        return top
+
+    def summary(self) -> Dict[str, float]:
+        result = {"count": self.count, "sum": self.total, "max": self.max}
+        for q in _QUANTILES:
+            result[f"p{int(q * 100)}"] = self.percentile(q)
+        return result
+
+
+# -------- Spans --------
+class _Span:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Metrics:
+    """
+    In-process performance metrics: timing spans, counters and sampled gauges.
+
+    - span(name) times a block and timed(name) a function into a latency Histogram
+      (p50/p95/p99); counters count events; gauges are callables sampled only when a
+      snapshot is taken (cache hit rates, queue depths), so they cost nothing in between
+    - Disabled (METRICS_ENABLED False), span() hands back one shared no-op context manager
+      and timed()/count() return after a flag check: near-zero overhead on hot paths
+    - Exports: snapshot()/to_json() (dict / JSON dump), to_prometheus() (text exposition
+      format), periodic writes to METRICS_FILE (.json, or .prom for Prometheus text) and a
+      /metrics HTTP endpoint on METRICS_PORT
+    - Per process: batch OCR workers keep their own (their per-image seconds are in the results)
+    """
+
+    PREFIX = "image_slider_"
+
+    def __init__(self):
+        self.enabled = config.METRICS_ENABLED
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._server = None
+
+    # -------- Recording --------
+    def span(self, name: str):
+        """Context manager timing its block into the histogram name."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self.histogram(name))
+
+    def observe(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Register (or replace) a gauge; fn is called at snapshot time and may raise (skipped)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def remove_gauges(self, prefix: str) -> None:
+        with self._lock:
+            for name in [n for n in self._gauges if n.startswith(prefix)]:
+                del self._gauges[name]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    # -------- Export --------
+    def snapshot(self) -> Dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        sampled = {}
+        for name, fn in gauges.items():
+            try:
+                sampled[name] = float(fn())
+            except Exception as e:
+                logger.debug("Gauge %s failed: %s", name, e)
+        return {
+            "time": time.time(),
+            "since": self._started,
+            "enabled": self.enabled,
+            "spans": {name: h.summary() for name, h in sorted(histograms.items())},
+            "counters": dict(sorted(counters.items())),
+            "gauges": dict(sorted(sampled.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        for name, s in snap["spans"].items():
+            metric = self._metric_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in _QUANTILES:
+                lines.append(f'{metric}{{quantile="{q}"}} {s[f"p{int(q * 100)}"]:.6g}')
+            lines.append(f"{metric}_sum {s['sum']:.6g}")
+            lines.append(f"{metric}_count {s['count']}")
+        for name, value in snap["counters"].items():
+            metric = self._metric_name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, value in snap["gauges"].items():
+            metric = self._metric_name(name)
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value:.6g}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path) -> None:
+        """Write a snapshot: Prometheus text for a .prom file, else JSON (atomically replaced)."""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.to_prometheus() if path.suffix == ".prom" else self.to_json()
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def summary_lines(self, names: Optional[List[str]] = None) -> List[str]:
+        """Short human-readable lines (ms) for spans, then gauges, e.g. for an overlay or a CLI summary."""
+        snap = self.snapshot()
+        lines = []
+        for name, s in snap["spans"].items():
+            if names is None or name in names:
+                lines.append(f"{name:<16} n={s['count']:<6} p50 {s['p50'] * 1000:7.1f}  "
+                             f"p95 {s['p95'] * 1000:7.1f}  p99 {s['p99'] * 1000:7.1f} ms")
+        for name, value in snap["gauges"].items():
+            lines.append(f"{name:<28} {value:.3g}")
+        return lines
+
+    # -------- Exporters --------
+    def configure(self) -> None:
+        """Apply the METRICS_* settings: enable/disable recording, start the file writer and HTTP endpoint."""
+        self.enabled = config.METRICS_ENABLED
+        if not self.enabled:
+            return
+        if config.METRICS_FILE and self._writer is None:
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+            self._writer.start()
+        if config.METRICS_PORT and self._server is None:
+            self.serve(config.METRICS_PORT)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> int:
+        """Serve /metrics (Prometheus text) and /metrics.json on a daemon thread. Returns the port."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics.json":
+                    body, kind = metrics.to_json(), "application/json"
+                elif self.path.split("?")[0] == "/metrics":
+                    body, kind = metrics.to_prometheus(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logger.warning("Metrics endpoint on %s:%d unavailable: %s", host, port, e)
+            return 0
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        port = self._server.server_address[1]
+        logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+        return port
+
+    def close(self) -> None:
+        """Stop the exporters; the metrics file gets a last write."""
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join(timeout=2)
+            self._writer = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _write_loop(self) -> None:
+        while True:
+            stopping = self._stop.wait(config.METRICS_FILE_INTERVAL)
+            try:
+                self.write(config.METRICS_FILE)
+            except Exception as e:
+                logger.warning("Could not write metrics to %s: %s", config.METRICS_FILE, e)
+            if stopping:
+                return
+
+    def _metric_name(self, name: str) -> str:
+        return self.PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+metrics = Metrics()
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call into the span name (a flag check when metrics are off)."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.histogram(name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,110 @@
+"""
+Benchmark: full-resolution decode + resize vs ImageLoader.decode_for_display.
+
+Each mode runs in a fresh process so peak RSS is measured independently.
+
+    python -m benchmarks.bench_display_decode [FOLDER] [--count 12] [--size 700x450]
+
+Without FOLDER a corpus of synthetic 24 MP JPEGs is generated in a temp dir.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PIL import Image  # noqa: E402
+
+
+def make_corpus(folder: Path, count: int, size=(6000, 4000)) -> List[Path]:
+    """Write `count` noisy JPEGs (noise keeps libjpeg from taking shortcuts)."""
+    paths = []
+    base = Image.effect_noise(size, 64).convert("RGB")
+    for i in range(count):
+        path = folder / f"large_{i:03d}.jpg"
+        if not path.exists():
+            base.rotate(i * 7).save(path, quality=92)
+        paths.append(path)
+    return paths
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_mode(mode: str, paths: List[str], size: Tuple[int, int], out) -> None:
+    from app.core.image_loader import ImageLoader
+
+    timings = []
+    for path in paths:
+        start = time.perf_counter()
+        if mode == "full":
+            with Image.open(path) as img:
+                img = img.convert("RGB")
+            img.resize(size, Image.LANCZOS)
+        else:
+            ImageLoader.decode_for_display(path, size)
+        timings.append(time.perf_counter() - start)
+    out.put((mode, timings, _peak_rss_mb()))
+
+
+def run(paths: List[Path], size: Tuple[int, int]) -> None:
+    # Linux carries ru_maxrss across exec, so the parent must stay small:
+    # corpus generation also happens in a child (see main()).
+    ctx = mp.get_context("spawn")
+    results = {}
+    for mode in ("full", "display"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_mode, args=(mode, [str(p) for p in paths], size, queue))
+        proc.start()
+        results[mode] = queue.get()
+        proc.join()
+
+    print(f"{len(paths)} images, target {size[0]}x{size[1]}")
+    print(f"{'mode':<10}{'mean ms':>10}{'median ms':>12}{'peak RSS MB':>14}")
+    for mode, timings, rss in results.values():
+        ordered = sorted(timings)
+        mean = sum(ordered) / len(ordered) * 1000
+        median = ordered[len(ordered) // 2] * 1000
+        print(f"{mode:<10}{mean:>10.1f}{median:>12.1f}{rss:>14.1f}")
+    full, display = results["full"], results["display"]
+    speedup = sum(full[1]) / sum(display[1])
+    print(f"speedup x{speedup:.1f}, peak RSS {full[2] - display[2]:+.1f} MB saved")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", help="folder of JPEGs (default: synthetic corpus)")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--size", default="700x450")
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+
+    if args.folder:
+        paths = sorted(p for p in Path(args.folder).iterdir() if p.suffix.lower() in (".jpg", ".jpeg"))
+        run(paths[: args.count], size)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = mp.get_context("spawn")
+            proc = ctx.Process(target=make_corpus, args=(Path(tmp), args.count))
+            proc.start()
+            proc.join()
+            run(sorted(Path(tmp).glob("large_*.jpg")), size)
+
+
+if __name__ == "__main__":
+    main()
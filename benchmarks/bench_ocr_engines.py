@@ -0,0 +1,74 @@
+"""
+Benchmark: per-image OCR latency, cold vs warm, for each available engine.
+
+"cold" is engine construction plus the first extract(); "warm" is the mean of the
+following calls. Engines that cannot be created here (missing binary or bindings)
+are reported and skipped.
+
+    python -m benchmarks.bench_ocr_engines [--images 20] [--engines tesseract,tesserocr]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+
+def make_pages(count: int, size=(1200, 400)) -> List[Image.Image]:
+    try:
+        font = ImageFont.load_default(size=36)
+    except TypeError:  # Pillow < 10.1 has only the fixed bitmap font
+        font = ImageFont.load_default()
+    pages = []
+    for i in range(count):
+        img = Image.new("L", size, 255)
+        draw = ImageDraw.Draw(img)
+        for line in range(6):
+            draw.text((40, 30 + line * 55), f"Invoice {4400 + i} line {line}: total {i * 17 + line}.00",
+                      fill=0, font=font)
+        pages.append(img)
+    return pages
+
+
+def bench(engine_name: str, pages: List[Image.Image]) -> None:
+    from app.core.ocr_engine import OCREngineFactory
+
+    start = time.perf_counter()
+    try:
+        engine = OCREngineFactory.create_engine(engine_name)
+    except Exception as e:
+        print(f"{engine_name:<12} unavailable: {e}")
+        return
+    engine.extract(pages[0])
+    cold = time.perf_counter() - start
+
+    warm = []
+    for page in pages[1:]:
+        t = time.perf_counter()
+        engine.extract(page)
+        warm.append(time.perf_counter() - t)
+    engine.close()
+    print(f"{engine_name:<12}{cold * 1000:>10.1f}{statistics.mean(warm) * 1000:>12.1f}"
+          f"{statistics.median(warm) * 1000:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--engines", default="tesseract,tesserocr")
+    args = parser.parse_args()
+
+    pages = make_pages(max(2, args.images))
+    print(f"{len(pages)} synthetic text pages")
+    print(f"{'engine':<12}{'cold ms':>10}{'warm mean':>12}{'warm p50':>12}")
+    for name in args.engines.split(","):
+        bench(name.strip(), pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from collections import deque
+from concurrent.futures import Future
+from app.core.batch_ocr import BatchOCRRunner
+
+
+def test_take_back_returns_unstarted_work_in_order():
+    futures = [Future() for _ in range(5)]
+    for running in futures[:2]:
+        running.set_running_or_notify_cancel()  # picked up by a worker: cannot be taken back
+    submitted = {f: f"page{i}" for i, f in enumerate(futures)}
+    pending = set(futures)
+    taken_back = deque(["earlier"])
+    BatchOCRRunner._take_back(pending, submitted, taken_back)
+    assert pending == set(futures[:2])
+    assert list(submitted.values()) == ["page0", "page1"]
+    assert list(taken_back) == ["page2", "page3", "page4", "earlier"]
@@ -0,0 +1,42 @@
+from pathlib import Path
+import pytest
+from PIL import Image
+from app import cli
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    Image.new("RGB", (64, 48), "red").save(src / "a.png")
+    Image.new("RGB", (64, 48), "blue").save(src / "a.jpg")
+    Image.new("RGB", (48, 64), "green").save(src / "sub" / "b.png")
+    return src
+
+
+def test_thumbnail_keeps_source_extension(folder, tmp_path):
+    out = tmp_path / "out"
+    assert cli.main(["thumbnail", str(folder), str(out), "--recursive", "--no-store", "--size", "32"]) == 0
+    written = sorted(p.relative_to(out).as_posix() for p in out.rglob("*.jpg"))
+    assert written == ["a.jpg.jpg", "a.png.jpg", "sub/b.png.jpg"]
+    with Image.open(out / "a.png.jpg") as thumb:
+        assert max(thumb.size) <= 32
+
+
+def test_thumbnail_status_counts_written_files(folder, tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    # a directory where a thumbnail should go: that one cannot be written
+    (out / "a.png.jpg").mkdir()
+    assert cli.main(["thumbnail", str(folder), str(out), "--no-store"]) == 2
+    assert (out / "a.jpg.jpg").is_file()
+
+
+def test_thumbnail_path():
+    assert cli.thumbnail_path(Path("out"), Path("/src"), "/src/x/page.tif#2") == Path("out/x/page.tif#2.jpg")
+
+
+def test_errors_are_reported(folder, tmp_path, capsys):
+    assert cli.main(["--set", "thumbnail_size=big", "thumbnail", str(folder), str(tmp_path / "out")]) == 1
+    assert capsys.readouterr().err.startswith("error: THUMBNAIL_SIZE")
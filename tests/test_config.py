@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from app.utils.config import Config, parse_overrides
+from app.utils.exceptions import ConfigError
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    # no ~/.config/image_slider file of the machine running the tests
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return Config()
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_defaults_until_loaded(settings):
+    settings.load(env={})
+    assert settings.changed() == {}
+    assert settings.source("OCR_WORKERS") == "default"
+
+
+def test_layers_later_wins(settings, tmp_path):
+    path = write(tmp_path / "settings.toml", 'ocr_workers = 3\nthumbnail_size = [64, 48]\n[prefetch]\nahead = 7\n')
+    settings.load(path=path, env={"IMAGE_SLIDER_OCR_WORKERS": "5", "IMAGE_SLIDER_OCR_JOB_WORKERS": "4"},
+                  overrides=parse_overrides(["ocr_job_workers=6"]))
+    assert settings.PREFETCH_AHEAD == 7
+    assert settings.THUMBNAIL_SIZE == (64, 48)
+    assert settings.OCR_WORKERS == 5
+    assert settings.OCR_JOB_WORKERS == 6
+    assert settings.source("PREFETCH_AHEAD") == str(path)
+    assert settings.source("OCR_WORKERS") == "environment"
+    assert settings.source("OCR_JOB_WORKERS") == "command line"
+
+
+def test_reload_resets_to_defaults(settings):
+    settings.load(env={}, overrides={"OCR_WORKERS": "9"})
+    settings.load(env={})
+    assert settings.OCR_WORKERS == Config.OCR_WORKERS
+
+
+def test_config_file_from_environment(settings, tmp_path):
+    path = write(tmp_path / "settings.toml", 'decode_resample = "bilinear"\n')
+    settings.load(env={"IMAGE_SLIDER_CONFIG": str(path)})
+    assert settings.DECODE_RESAMPLE == "bilinear"
+    assert settings.config_file == path
+
+
+def test_coercion(settings):
+    settings.load(env={}, overrides={"IMAGE_CACHE_MAX_BYTES": "2MiB", "DISPLAY_SIZE": "1280x800",
+                                     "LOG_LEVEL": "warning", "METRICS_ENABLED": "yes"})
+    assert settings.IMAGE_CACHE_MAX_BYTES == 2 * 1024 ** 2
+    assert settings.DISPLAY_SIZE == (1280, 800)
+    assert settings.LOG_LEVEL == "WARNING"
+    assert settings.METRICS_ENABLED is True
+
+
+def test_zero_timeout_disables(settings):
+    settings.load(env={"IMAGE_SLIDER_OCR_JOB_TIMEOUT": "0"})
+    assert settings.OCR_JOB_TIMEOUT == 0
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"OCR_WORKERZ": "2"}, "did you mean OCR_WORKERS"),
+    ({"OCR_WORKERS": "0"}, "OCR_WORKERS"),
+    ({"OCR_WORKERS": "two"}, "a number"),
+    ({"OCR_PSM": "14"}, "OCR_PSM"),
+    ({"UI_DISPATCH_MS": "0"}, "UI_DISPATCH_MS"),
+    ({"DECODE_RESAMPLE": "cubic"}, "lanczos"),
+    ({"DISPLAY_SIZE": "1280"}, "2 numbers"),
+    ({"ENGINE_CONFIG": "--psm 3"}, "cannot be set"),
+])
+def test_invalid_values(settings, overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        settings.load(env={}, overrides=overrides)
+
+
+def test_invalid_layer_is_not_applied(settings):
+    with pytest.raises(ConfigError):
+        settings.apply({"OCR_WORKERS": "3", "OCR_PSM": "99"})
+    assert settings.OCR_WORKERS == Config.OCR_WORKERS
+
+
+def test_bad_files(settings, tmp_path):
+    with pytest.raises(ConfigError, match="not found"):
+        settings.load(path=tmp_path / "missing.toml", env={})
+    with pytest.raises(ConfigError, match="Cannot read"):
+        settings.load(path=write(tmp_path / "broken.toml", "x = ["), env={})
+    with pytest.raises(ConfigError, match=".toml, .yaml or .yml"):
+        settings.load(path=write(tmp_path / "settings.ini", "x=1"), env={})
+
+
+def test_bad_override_syntax():
+    with pytest.raises(ConfigError, match="KNOB=VALUE"):
+        parse_overrides(["OCR_WORKERS"])
+
+
+def test_bad_environment_reported_by_entry_point(tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path), IMAGE_SLIDER_OCR_WORKERZ="2",
+               PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+    imported = subprocess.run([sys.executable, "-c", "import app.utils.config"], env=env,
+                              capture_output=True, text=True)
+    assert imported.returncode == 0, imported.stderr
+    cli = subprocess.run([sys.executable, "-m", "app.cli", "config"], env=env, capture_output=True, text=True)
+    assert cli.returncode == 1
+    assert cli.stderr.startswith("error: Unknown setting 'OCR_WORKERZ'")
+    assert "Traceback" not in cli.stderr
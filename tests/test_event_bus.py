@@ -0,0 +1,57 @@
+import threading
+from app.controller.event_bus import EventBus
+
+
+def test_queued_events_keep_posting_order():
+    bus = EventBus(inline=False)
+    seen = []
+    bus.subscribe("a", lambda x: seen.append(("a", x)))
+    bus.subscribe("b", lambda x: seen.append(("b", x)))
+    bus.publish("a", 1)
+    bus.publish("b", 2)
+    bus.call_soon(seen.append, "call")
+    bus.publish("a", 3)
+    assert seen == []
+    assert bus.drain() == 4
+    assert seen == [("a", 1), ("b", 2), "call", ("a", 3)]
+
+
+def test_coalesced_topic_delivers_newest_per_key():
+    bus = EventBus(coalesce={"progress"}, inline=False)
+    seen = []
+    bus.subscribe("progress", lambda key, n: seen.append((key, n)))
+    for n in range(100):
+        bus.publish("progress", "x", n, key="x")
+    bus.publish("progress", "y", 7, key="y")
+    assert bus.pending() == 2
+    bus.drain()
+    assert seen == [("x", 99), ("y", 7)]
+    assert bus.stats()["merged"] == 99
+
+
+def test_drain_stops_at_max_events():
+    bus = EventBus(inline=False)
+    seen = []
+    bus.subscribe("t", seen.append)
+    for n in range(10):
+        bus.publish("t", n)
+    assert bus.drain(max_events=4) == 4
+    assert bus.pending() == 6
+    bus.drain()
+    assert seen == list(range(10))
+
+
+def test_publish_from_many_threads():
+    bus = EventBus(inline=False)
+    seen = []
+    bus.subscribe("t", seen.append)
+    threads = [threading.Thread(target=lambda i=i: [bus.publish("t", (i, n)) for n in range(500)]) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    while bus.drain():
+        pass
+    assert len(seen) == 4000
+    for i in range(8):
+        assert [n for j, n in seen if j == i] == list(range(500))
@@ -0,0 +1,57 @@
+import os
+import queue
+import sys
+import pytest
+from app.core.folder_watch import InotifyWatcher, PollingWatcher
+
+
+def changes_of(watcher):
+    return sorted((c.kind, c.path.name, c.old_path.name if c.old_path else None) for c in watcher)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "old.png").write_bytes(b"x")
+    return tmp_path
+
+
+def test_polling_watcher_reports_settled_files(folder):
+    watcher = PollingWatcher(folder, recursive=False, interval=1)
+    (folder / "new.png").write_bytes(b"data")
+    (folder / "notes.txt").write_bytes(b"data")
+    (folder / "sub" / "deep.png").write_bytes(b"data")
+    os.remove(folder / "old.png")
+    # a new file is reported once it held still between two polls
+    first = watcher._poll()
+    assert changes_of(first) == [("removed", "old.png", None)]
+    assert changes_of(watcher._poll()) == [("added", "new.png", None), ("added", "notes.txt", None)]
+
+
+def test_polling_watcher_recursive_and_filtered(folder):
+    watcher = PollingWatcher(folder, recursive=True, interval=1)
+    delivered = []
+    watcher.on_changes = delivered.extend
+    (folder / "sub" / "deep.png").write_bytes(b"data")
+    (folder / "notes.txt").write_bytes(b"data")
+    watcher._poll()
+    watcher._deliver(watcher._poll())
+    assert changes_of(delivered) == [("added", "deep.png", None)]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_reports_adds_and_renames(folder):
+    watcher = InotifyWatcher(folder, recursive=False, debounce=0.05)
+    received = queue.Queue()
+    watcher.on_changes = lambda changes: [received.put(c) for c in changes]
+    watcher.start()
+    try:
+        (folder / "new.png").write_bytes(b"data")
+        (folder / "sub" / "deep.png").write_bytes(b"data")  # outside a non-recursive watch
+        os.rename(folder / "old.png", folder / "renamed.png")
+        got = [received.get(timeout=5), received.get(timeout=5)]
+        assert changes_of(got) == [("added", "new.png", None), ("renamed", "renamed.png", "old.png")]
+        with pytest.raises(queue.Empty):
+            received.get(timeout=0.3)
+    finally:
+        watcher.stop()
@@ -0,0 +1,105 @@
+import threading
+import pytest
+from PIL import Image
+from app.core.image_cache import ImageCache, image_nbytes
+
+
+def img(side, mode="RGB"):
+    return Image.new(mode, (side, side))
+
+
+def test_image_nbytes():
+    assert image_nbytes(img(10)) == 300
+    assert image_nbytes(img(10, "L")) == 100
+    assert image_nbytes(img(10, "RGBA")) == 400
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = ImageCache(max_bytes=1000)  # three 300-byte images fit
+    for key in "abc":
+        assert cache.set(key, img(10))
+    assert cache.get("a") is not None  # a is now the most recently used
+    cache.set("d", img(10))
+    assert [k for k in "abcd" if k in cache] == ["a", "c", "d"]
+    cache.set("e", img(10))
+    assert "c" not in cache and "a" in cache
+    assert cache.current_bytes <= cache.max_bytes
+    assert cache.evictions == 2
+
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = ImageCache(max_bytes=1000)
+    cache.set("a", img(10))
+    cache.set("a", img(10, "L"))
+    assert cache.current_bytes == 100
+    assert len(cache) == 1
+
+
+def test_refuses_images_larger_than_the_budget():
+    cache = ImageCache(max_bytes=1000)
+    cache.set("small", img(10))
+    assert not cache.set("big", img(20))  # 1200 bytes
+    assert "big" not in cache
+    # the refusal evicts nothing
+    assert "small" in cache and cache.evictions == 0
+
+
+def test_resize_shrinks_immediately():
+    cache = ImageCache(max_bytes=1000)
+    for key in "abc":
+        cache.set(key, img(10))
+    cache.resize(650)
+    assert [k for k in "abc" if k in cache] == ["b", "c"]
+    assert cache.current_bytes == 600
+    with pytest.raises(ValueError):
+        cache.resize(0)
+    with pytest.raises(ValueError):
+        ImageCache(max_bytes=0)
+
+
+def test_invalidate_matching():
+    cache = ImageCache(max_bytes=10_000)
+    for key in ("/a.png", ("/a.png", "display"), "/b.png", ("/b.png", "thumb")):
+        cache.set(key, img(10))
+    dropped = cache.invalidate_matching(lambda k: (k[0] if isinstance(k, tuple) else k) == "/a.png")
+    assert dropped == 2
+    assert len(cache) == 2 and cache.current_bytes == 600
+    assert cache.invalidate("/b.png") and not cache.invalidate("/b.png")
+
+
+def test_counters():
+    cache = ImageCache(max_bytes=700)
+    cache.get("a")
+    cache.set("a", img(10))
+    cache.get("a")
+    cache.get("a")
+    cache.set("b", img(10))
+    cache.set("c", img(10))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    assert stats["entries"] == 2 and stats["bytes"] == 600
+
+
+def test_concurrent_get_and_set():
+    cache = ImageCache(max_bytes=300 * 20)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(300):
+                key = (n + i) % 40
+                if cache.get(key) is None:
+                    cache.set(key, img(10))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    stats = cache.stats()
+    assert stats["bytes"] == 300 * stats["entries"] <= cache.max_bytes
+    assert stats["hits"] + stats["misses"] == 8 * 300
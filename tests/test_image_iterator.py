@@ -0,0 +1,43 @@
+from pathlib import Path
+import pytest
+from app.core.image_loader import ImageIterator
+
+
+def make(names, pages=None):
+    pages = pages or {}
+    return ImageIterator([Path(n) for n in names], frame_counter=lambda p: pages.get(p.name, 1))
+
+
+def test_goto_out_of_range_raises():
+    iterator = make(["a", "b"])
+    with pytest.raises(IndexError):
+        iterator.goto(2)
+    with pytest.raises(IndexError):
+        iterator.goto(-1)
+    assert iterator.index == 0
+    assert iterator.goto(1) == Path("b")
+
+
+def test_goto_page_of_multi_page_file():
+    iterator = make(["a.tif", "b"], pages={"a.tif": 3})
+    assert str(iterator.goto(0, frame=2)) == "a.tif#2"
+    assert iterator.frame == 2
+
+
+def test_reorder_keeps_page_only_on_the_same_file():
+    iterator = make(["a.tif", "b.tif"], pages={"a.tif": 3, "b.tif": 3})
+    iterator.goto(0, frame=2)
+    iterator.reorder([Path("b.tif"), Path("a.tif")], index=1)
+    assert (iterator.index, iterator.frame) == (1, 2)
+    # a.tif filtered out: the cursor lands on another file, at its first page
+    iterator.reorder([Path("b.tif")], index=None)
+    assert (iterator.index, iterator.frame) == (0, 0)
+    iterator.goto(0, frame=1)
+    iterator.reorder([Path("a.tif"), Path("b.tif")], index=0)
+    assert (str(iterator.current()), iterator.frame) == ("a.tif", 0)
+
+
+def test_next_steps_through_pages_then_files():
+    iterator = make(["a.tif", "b"], pages={"a.tif": 2})
+    assert str(iterator.next()) == "a.tif#1"
+    assert iterator.next() == Path("b")
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+from PIL import Image
+from app.core.image_cache import image_nbytes
+from app.core.image_loader import ImageLoader
+from app.core.raster import MappedRaster
+
+
+def test_ocr_image_keeps_a_grayscale_scan_grayscale(tmp_path):
+    path = tmp_path / "scan.tif"
+    Image.new("L", (300, 200), 128).save(path)  # uncompressed: memory-mapped
+    loader = ImageLoader(max_cache_bytes=1024 * 1024)
+    image = loader.load_ocr_image(path)
+    assert image.mode == "L" and image.size == (300, 200)
+    assert loader.cache.current_bytes == image_nbytes(image) == 300 * 200
+    assert loader.load_ocr_image(path) is image
+    # the display copy is RGB, and OCR reuses it once it exists
+    assert loader.load_pil_image(path).mode == "RGB"
+    loader.invalidate(path)
+    rgb = loader.load_pil_image(path)
+    assert loader.load_ocr_image(path) is rgb
+    loader.close()
+
+
+def test_ocr_image_converts_palette_files(tmp_path):
+    path = tmp_path / "page.png"
+    Image.new("P", (40, 30)).save(path)
+    assert ImageLoader().load_ocr_image(path).mode == "RGB"
+
+
+def test_unmappable_files_are_checked_once_and_take_no_map_slot(tmp_path):
+    loader = ImageLoader()
+    mapped = tmp_path / "raw.bmp"
+    Image.new("RGB", (20, 10)).save(mapped)
+    compressed = tmp_path / "packed.tif"
+    Image.new("RGB", (20, 10)).save(compressed, compression="tiff_lzw")
+    assert loader.raster(mapped) is not None
+
+    real_open = MappedRaster.open.__func__
+    calls = []
+
+    def counting(cls, path):
+        calls.append(str(path))
+        return real_open(cls, path)
+
+    with patch.object(MappedRaster, "open", classmethod(counting)), \
+            patch("app.core.image_loader.config.MMAP_OPEN_FILES", 1):
+        for _ in range(3):
+            assert loader.raster(compressed) is None
+        assert loader.raster(mapped) is not None  # still mapped: the failures took no slot
+        assert calls == [str(compressed)]
+        loader.invalidate(compressed)  # the file changed: check it again
+        loader.raster(compressed)
+        assert calls == [str(compressed)] * 2
+    loader.close()
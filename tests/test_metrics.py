@@ -0,0 +1,56 @@
+import pytest
+from PIL import Image
+from app.core.file_operations import FileHelper
+from app.core.image_cache import ImageCache
+from app.utils.metrics import Histogram, metrics
+
+
+@pytest.fixture
+def recording():
+    enabled = metrics.enabled
+    metrics.enabled = True
+    metrics.reset()
+    yield metrics
+    metrics.enabled = enabled
+    metrics.reset()
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    summary = histogram.summary()
+    assert summary["count"] == 100 and summary["max"] == pytest.approx(0.1)
+    assert summary["p50"] == pytest.approx(0.050, rel=0.1)
+    assert summary["p99"] == pytest.approx(0.099, rel=0.1)
+
+
+def test_named_cache_counts_into_metrics(recording):
+    cache = ImageCache(max_bytes=300, name="test_cache")
+    cache.get("a")
+    cache.set("a", Image.new("RGB", (10, 10)))
+    cache.get("a")
+    cache.set("b", Image.new("RGB", (10, 10)))
+    counters = recording.snapshot()["counters"]
+    assert counters == {"test_cache_evictions": 1, "test_cache_hits": 1, "test_cache_misses": 1}
+    assert "image_slider_test_cache_hits_total 1" in recording.to_prometheus()
+
+
+def test_list_files_is_spanned(recording, tmp_path):
+    (tmp_path / "a.png").write_bytes(b"")
+    FileHelper.list_files(tmp_path)
+    assert recording.snapshot()["spans"]["list_files"]["count"] == 1
+
+
+def test_disabled_metrics_record_nothing():
+    enabled = metrics.enabled
+    metrics.enabled = False
+    try:
+        metrics.reset()
+        with metrics.span("off"):
+            pass
+        metrics.count("off")
+        snapshot = metrics.snapshot()
+        assert snapshot["spans"] == {} and snapshot["counters"] == {}
+    finally:
+        metrics.enabled = enabled
@@ -0,0 +1,63 @@
+import sys
+import types
+from unittest.mock import patch
+from PIL import Image
+from app.core.ocr_engine import TesserocrOCR, tesseract_variables
+from app.utils.config import config
+
+
+def test_tesseract_variables_from_extra_options():
+    options = '-c preserve_interword_spaces=1 -ctessedit_char_whitelist="0123 456" --dpi 300'
+    assert tesseract_variables(options) == [
+        ("preserve_interword_spaces", "1"),
+        ("tessedit_char_whitelist", "0123 456"),
+        ("user_defined_dpi", "300"),
+    ]
+
+
+def test_tesseract_variables_skip_unsupported_options():
+    assert tesseract_variables("") == []
+    assert tesseract_variables("--user-words words.txt -c a=b") == [("a", "b")]
+
+
+class _FakeAPI:
+    def __init__(self, lang, psm, oem, path=None):
+        self.settings = (lang, psm, oem)
+        self.variables = {}
+        self.ended = False
+
+    def SetVariable(self, name, value):
+        self.variables[name] = value
+        return True
+
+    def SetImage(self, image):
+        pass
+
+    def GetUTF8Text(self):
+        return f"{self.settings} {sorted(self.variables.items())}"
+
+    def Clear(self):
+        pass
+
+    def End(self):
+        self.ended = True
+
+
+def test_tesserocr_pool_follows_config_changes():
+    fake = types.SimpleNamespace(PyTessBaseAPI=_FakeAPI)
+    with patch.dict(sys.modules, {"tesserocr": fake}), \
+            patch.multiple(config, OCR_LANG="eng", OCR_PSM=6, OCR_OEM=3, OCR_EXTRA_OPTIONS="-c a=1"):
+        engine = TesserocrOCR(pool_size=2)
+        first = engine._all[0]
+        assert first.variables == {"a": "1"}
+        key = engine.cache_key()
+        assert key == "tesserocr|eng|--psm 6 --oem 3 -c a=1"
+
+        config.OCR_PSM = 4
+        assert engine.cache_key() != key
+        text = engine.extract(Image.new("L", (4, 4)))
+        assert first.ended
+        assert text.startswith("('eng', 4, 3)")
+        rebuilt = engine._all[0]
+        engine.close()
+        assert rebuilt.ended
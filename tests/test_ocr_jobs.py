@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+import pytest
+from app.core.ocr_jobs import OCRJobScheduler, Priority
+
+
+@pytest.fixture
+def scheduler():
+    jobs = OCRJobScheduler(workers=1, default_timeout=0)
+    yield jobs
+    jobs.shutdown()
+
+
+def block(jobs):
+    """Occupy the only worker until the returned event is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+    jobs.submit("blocker", run)
+    assert started.wait(5)
+    return release
+
+
+def test_runs_by_priority(scheduler):
+    release = block(scheduler)
+    order = []
+    futures = [scheduler.submit(name, lambda n=name: order.append(n), priority=priority)
+               for name, priority in (("background", Priority.BACKGROUND), ("prefetch", Priority.PREFETCH),
+                                      ("interactive", Priority.INTERACTIVE))]
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert order == ["interactive", "prefetch", "background"]
+
+
+def test_same_key_shares_future_and_raises_priority(scheduler):
+    release = block(scheduler)
+    order = []
+    first = scheduler.submit("a", lambda: order.append("a"), priority=Priority.BACKGROUND)
+    scheduler.submit("b", lambda: order.append("b"), priority=Priority.PREFETCH)
+    again = scheduler.submit("a", lambda: order.append("a2"), priority=Priority.INTERACTIVE)
+    release.set()
+    assert again is first
+    first.result(5)
+    time.sleep(0.05)
+    assert order == ["a", "b"]
+
+
+def test_cancel_drops_queued_jobs(scheduler):
+    release = block(scheduler)
+    queued = scheduler.submit("queued", lambda: "never")
+    assert scheduler.pending() == 1
+    assert scheduler.cancel(lambda job: job.key == "queued") == 1
+    release.set()
+    with pytest.raises(CancelledError):
+        queued.result(5)
+
+
+def test_timeout_counts_from_start_not_submit():
+    jobs = OCRJobScheduler(workers=1, default_timeout=0.3)
+    try:
+        futures = [jobs.submit(i, lambda: time.sleep(0.1) or "ok", priority=Priority.BACKGROUND) for i in range(6)]
+        # 0.6 s of queued work: every job still gets its own 0.3 s once it starts
+        assert [f.result(5) for f in futures] == ["ok"] * 6
+    finally:
+        jobs.shutdown()
+
+
+def test_running_job_times_out():
+    jobs = OCRJobScheduler(workers=1, default_timeout=0.1)
+    release = threading.Event()
+    try:
+        slow = jobs.submit("slow", lambda: release.wait(5))
+        with pytest.raises(TimeoutError):
+            slow.result(5)
+        # the worker is free for the next job once the abandoned one returns
+        release.set()
+        assert jobs.submit("next", lambda: "ok").result(5) == "ok"
+    finally:
+        release.set()
+        jobs.shutdown()
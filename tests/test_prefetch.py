@@ -0,0 +1,67 @@
+import threading
+from pathlib import Path
+from app.core.image_loader import ImageIterator
+from app.core.prefetch import PrefetchScheduler
+
+
+class BlockingLoader:
+    """Stands in for ImageLoader: every render waits until release is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def is_fitted_cached(self, path, box) -> bool:
+        return False
+
+    def get_fitted(self, path, box):
+        self.started.set()
+        self.release.wait(5)
+
+
+def make_scheduler(loader):
+    # one worker: the first job blocks it, the rest stay queued (cancellable)
+    return PrefetchScheduler(loader, size=(100, 100), ahead=4, behind=0, workers=1)
+
+
+def make_iterator(n=10):
+    return ImageIterator([Path(f"/images/{i}.png") for i in range(n)], frame_counter=lambda p: 1)
+
+
+def test_cancel_all_with_queued_jobs():
+    loader = BlockingLoader()
+    prefetcher = make_scheduler(loader)
+    try:
+        assert prefetcher.schedule(make_iterator()) == 4
+        assert loader.started.wait(5)
+        prefetcher.cancel_all()
+        assert prefetcher.pending() == 0
+    finally:
+        loader.release.set()
+        prefetcher.shutdown()
+
+
+def test_shutdown_with_queued_jobs():
+    loader = BlockingLoader()
+    prefetcher = make_scheduler(loader)
+    prefetcher.schedule(make_iterator())
+    assert loader.started.wait(5)
+    prefetcher.shutdown()
+    loader.release.set()
+    assert prefetcher.schedule(make_iterator()) == 0
+
+
+def test_set_size_replans_queued_jobs():
+    loader = BlockingLoader()
+    prefetcher = make_scheduler(loader)
+    iterator = make_iterator()
+    try:
+        prefetcher.schedule(iterator)
+        assert loader.started.wait(5)
+        # a debounced window resize while jobs for the old box are still queued
+        prefetcher.set_size((200, 150), iterator)
+        assert prefetcher.size == (200, 150)
+        assert prefetcher.pending() == 4
+    finally:
+        loader.release.set()
+        prefetcher.shutdown()
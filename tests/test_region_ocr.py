@@ -0,0 +1,107 @@
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core import region_ocr
+from app.core.region_ocr import RegionOCR, _split_tall, stitch_bands, tile_boxes
+from app.utils.exceptions import OCRExtractionError
+
+
+def test_split_tall_cuts_on_the_blank_row():
+    step = 8
+    ink = np.ones((50, 5), dtype=np.int64)
+    ink[25] = 0  # pixel rows 200..207 are blank
+    # top is not a multiple of step: the cut must still land on the blank row, not 2 px below it
+    boxes = _split_tall(ink, (0, 10, 40, 400), step, max_pixels=10_000)
+    assert boxes == [(0, 10, 40, 200), (0, 200, 40, 400)]
+
+
+def test_split_tall_small_block_is_kept():
+    ink = np.ones((10, 10), dtype=np.int64)
+    assert _split_tall(ink, (0, 0, 80, 80), 8, max_pixels=10_000) == [(0, 0, 80, 80)]
+
+
+def test_tile_boxes_cover_the_page_with_overlap():
+    boxes = tile_boxes(100, 5000, tile_height=2048, overlap=128)
+    assert boxes[0] == (0, 0, 100, 2048)
+    assert boxes[-1][3] == 5000
+    for (_, _, _, bottom), (_, top, _, _) in zip(boxes, boxes[1:]):
+        assert bottom - top == 128
+
+
+def test_tile_boxes_short_page_and_tiny_tiles():
+    assert tile_boxes(100, 500) == [(0, 0, 100, 500)]
+    # tile height is raised above twice the overlap, so tiles always advance
+    boxes = tile_boxes(10, 1000, tile_height=100, overlap=128)
+    assert all(b[3] - b[1] == 257 for b in boxes[:-1])
+    assert boxes[-1][3] == 1000
+
+
+def test_stitch_bands_drops_duplicated_overlap_lines():
+    bands = ["first line\nsecond line\nshared a\nshared b", "shared a \n shared b\nthird line", "fourth line"]
+    assert stitch_bands(bands) == "first line\nsecond line\nshared a\nshared b\nthird line\nfourth line"
+
+
+def test_stitch_bands_keeps_repeats_beyond_the_overlap():
+    assert stitch_bands(["total\n", "\nsubtotal\ntotal"]) == "total\nsubtotal\ntotal"
+    assert stitch_bands(["a\nb", "b\nc"], max_overlap_lines=0) == "a\nb\nb\nc"
+    assert stitch_bands([]) == ""
+
+
+class _FlakyEngine:
+    """Returns the crop's top-left pixel value as text; fails on crops whose value is 0."""
+
+    def extract(self, image):
+        value = image.getpixel((0, 0))
+        if value == 0:
+            raise RuntimeError("engine crashed")
+        return f"band {value}"
+
+
+def _banded_page():
+    page = Image.new("L", (50, 600), 255)
+    page.paste(0, (0, 200, 50, 400))
+    page.paste(128, (0, 400, 50, 600))
+    return page
+
+
+def test_failed_region_marks_result_partial():
+    ocr = RegionOCR(_FlakyEngine(), mode="tiles", workers=2, min_pixels=1)
+    with patch.object(region_ocr, "tile_boxes", lambda w, h, *_: [(0, 0, w, 200), (0, 200, w, 400), (0, 400, w, h)]):
+        result = ocr.run(_banded_page())
+    ocr.close()
+    assert result.failed == 1 and result.partial
+    assert result.text == "band 255\nband 128"
+
+
+def test_all_regions_failing_raises():
+    ocr = RegionOCR(_FlakyEngine(), mode="tiles", workers=1, min_pixels=1)
+    with patch.object(region_ocr, "tile_boxes", lambda w, h, *_: [(0, 200, w, 300), (0, 300, w, 400)]):
+        with pytest.raises(OCRExtractionError):
+            ocr.run(_banded_page())
+
+
+def test_concurrent_jobs_share_one_executor():
+    ocr = RegionOCR(_FlakyEngine(), mode="tiles", workers=2, min_pixels=1)
+    created = []
+    real = region_ocr.ThreadPoolExecutor
+
+    def counting(*args, **kwargs):
+        created.append(1)
+        time.sleep(0.05)  # widen the window between the None check and the assignment
+        return real(*args, **kwargs)
+
+    page = Image.new("L", (50, 600), 255)
+    with patch.object(region_ocr, "ThreadPoolExecutor", counting), \
+            patch.object(region_ocr, "tile_boxes", lambda w, h, *_: [(0, 0, w, 300), (0, 300, w, h)]):
+        threads = [threading.Thread(target=ocr.run, args=(page,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    ocr.close()
+    assert len(created) == 1
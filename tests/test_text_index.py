@@ -0,0 +1,34 @@
+import sqlite3
+import pytest
+from app.core.text_index import TextIndex, build_query
+
+
+@pytest.fixture
+def index():
+    conn = sqlite3.connect(":memory:")
+    # the columns of OCRResultStore's table that rebuild() reads
+    conn.execute("CREATE TABLE ocr_results (path TEXT, signature TEXT, engine_key TEXT, text TEXT, created REAL)")
+    yield TextIndex(conn)
+    conn.close()
+
+
+def test_broad_query_lists_latest_writes_first(index):
+    index.RANK_MAX_MATCHES = 1
+    for path in ("a", "b", "c"):
+        index.add(path, "sig", "engine", f"invoice {path}")
+    index.add("a", "sig2", "engine", "invoice re-processed")
+    assert [hit.path for hit in index.search("invoice")] == ["a", "c", "b"]
+    assert index.count() == 3
+
+
+def test_unchanged_document_is_kept_without_replace(index):
+    assert index.add("a", "sig", "engine", "first")
+    assert not index.add("a", "sig", "engine", "second", replace=False)
+    assert [hit.path for hit in index.search("first")] == ["a"]
+
+
+def test_persian_normalization_and_prefix(index):
+    index.add("fa", "sig", "engine", "مي‌خواهم كتاب ۱۲")
+    assert [hit.path for hit in index.search("میخواهم کتاب 12")] == ["fa"]
+    assert build_query("inv") == '"inv"*'
+    assert build_query('"total due" 42') == '"total due" AND "42"'
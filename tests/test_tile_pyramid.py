@@ -0,0 +1,52 @@
+from contextlib import ExitStack
+from unittest.mock import patch
+from PIL import Image
+from app.core import image_loader, tile_pyramid
+from app.core.image_cache import ImageCache
+from app.core.image_loader import ImageLoader
+from app.core.tile_pyramid import TilePyramid
+
+
+def pyramid_for(path, loader_budget):
+    loader = ImageLoader(max_cache_bytes=loader_budget)
+    return TilePyramid(path, loader, ImageCache(64 * 1024 * 1024), ImageCache(64 * 1024 * 1024), tile_size=64)
+
+
+def count_decodes():
+    """Paths opened for pixels by the pyramid or the loader (header reads are done before)."""
+    opened = []
+    real = tile_pyramid.open_image
+
+    def counting(path):
+        opened.append(path)
+        return real(path)
+
+    stack = ExitStack()
+    for module in (tile_pyramid, image_loader):
+        stack.enter_context(patch.object(module, "open_image", counting))
+    return opened, stack
+
+
+def test_image_larger_than_the_cache_is_decoded_once(tmp_path):
+    path = tmp_path / "big.png"
+    Image.new("RGB", (600, 400), (10, 20, 30)).save(path)
+    pyramid = pyramid_for(path, loader_budget=1024)  # far below the 720 KB decode
+    opened, patched = count_decodes()
+    with patched:
+        for view in [(0, 0, 300, 200), (250, 150, 550, 350), (100, 100, 400, 300)]:
+            frame = pyramid.render(view, (300, 200))  # level 0, several tiles each
+            assert frame.getpixel((5, 5)) == (10, 20, 30)
+        pyramid.render((0, 0, 600, 400), (150, 100))  # a coarser level is reduced from level 0
+    assert len(opened) == 1
+    assert len(pyramid.loader.cache) == 0
+
+
+def test_level_zero_reuses_the_loader_copy(tmp_path):
+    path = tmp_path / "small.png"
+    Image.new("RGB", (200, 100), (1, 2, 3)).save(path)
+    pyramid = pyramid_for(path, loader_budget=1024 * 1024)
+    pyramid.loader.load_pil_image(path)
+    opened, patched = count_decodes()
+    with patched:
+        pyramid.render((0, 0, 200, 100), (200, 100))
+    assert opened == []